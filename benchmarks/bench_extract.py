@@ -0,0 +1,163 @@
+"""Offline benchmark of each source's HTML -> job extraction over the fixture corpus.
+
+    python benchmarks/bench_extract.py [--repeat 5] [--large-cards 300] [--no-save]
+
+Every page under benchmarks/fixtures/<host>/ is parsed with the source's
+parse_*_page() function (recorded pages and the synthetic ones from
+make_fixtures.py), plus one large synthetic page per source generated on the
+fly. Reports pages/sec, jobs/sec, peak traced memory and time spent per field
+selector, saves the numbers to benchmarks/results/ and prints the change
+against the previous saved run.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import main  # noqa: E402
+from bench_parsers import parse_page  # noqa: E402
+from sample_pages import SOURCE_HOSTS, SOURCES, sample_page  # noqa: E402
+
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+RESULTS_DIR = os.path.join(HERE, "results")
+# Which cascades belong to which source, by the prefix of their registry key
+CASCADE_PREFIX = {"LinkedIn": "LinkedIn.", "Indeed India": "Indeed.", "Internshala": "Internshala.", "Naukri.com": "Naukri."}
+
+
+def load_corpus(large_cards):
+    corpus = {source: [] for source in SOURCES}
+    for source in SOURCES:
+        for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, SOURCE_HOSTS[source], "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                corpus[source].append((os.path.basename(path), f.read()))
+        if large_cards:
+            corpus[source].append((f"synthetic-large-{large_cards}", sample_page(source, cards=large_cards, filler_kb=150)))
+    return corpus
+
+
+def source_cascades(source):
+    return [cascade for key, cascade in main.SELECTORS.cascades.items() if key.startswith(CASCADE_PREFIX[source])]
+
+
+def bench_source(source, pages, repeat):
+    cascades = source_cascades(source)
+    for cascade in cascades:
+        cascade.reset()
+    per_page = {}
+    jobs = 0
+    total = 0.0
+    # The parsers log every card they add; keep that out of the timings' output
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, html in pages:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                found = parse_page(source, html)
+            elapsed = time.perf_counter() - start
+            per_page[name] = {"pages_per_sec": repeat / elapsed, "jobs": len(found), "kb": len(html) // 1024}
+            jobs += len(found) * repeat
+            total += elapsed
+
+        # Memory is measured in a separate pass, tracemalloc slows parsing down too much to time it
+        tracemalloc.start()
+        peak = 0
+        for name, html in pages:
+            tracemalloc.reset_peak()
+            parse_page(source, html)
+            page_peak = tracemalloc.get_traced_memory()[1]
+            per_page[name]["peak_kb"] = page_peak // 1024
+            peak = max(peak, page_peak)
+        tracemalloc.stop()
+
+    parses = len(pages) * repeat
+    fields = {cascade.key: cascade.seconds * 1000 / parses for cascade in cascades}
+    return {
+        "pages_per_sec": parses / total,
+        "jobs_per_sec": jobs / total,
+        "peak_kb": peak // 1024,
+        "field_ms_per_page": fields,
+        "pages": per_page,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=HERE).stdout.strip()
+    except OSError:
+        return ""
+
+
+def previous_results():
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    if not paths:
+        return None
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+
+def change(new, old):
+    if not old:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def report(results, previous):
+    old = (previous or {}).get("sources", {})
+    print(f"{'source':<14} {'pages/sec':>10} {'':>6} {'jobs/sec':>10} {'':>6} {'peak KB':>8} {'':>6}")
+    for source, result in results.items():
+        before = old.get(source, {})
+        print(f"{source:<14} {result['pages_per_sec']:>10.1f} {change(result['pages_per_sec'], before.get('pages_per_sec')):>6}"
+              f" {result['jobs_per_sec']:>10.1f} {change(result['jobs_per_sec'], before.get('jobs_per_sec')):>6}"
+              f" {result['peak_kb']:>8} {change(result['peak_kb'], before.get('peak_kb')):>6}")
+    print("\nper-field extraction time (ms per page)")
+    for source, result in results.items():
+        before = old.get(source, {}).get("field_ms_per_page", {})
+        for key, ms in sorted(result["field_ms_per_page"].items()):
+            print(f"  {key:<22} {ms:>8.3f} {change(ms, before.get(key)):>6}")
+    print("\nper-page (pages/sec, jobs, size, peak)")
+    for source, result in results.items():
+        for name, page in result["pages"].items():
+            print(f"  {source:<14} {name:<28} {page['pages_per_sec']:>8.1f} {page['jobs']:>4} {page['kb']:>6} KB {page['peak_kb']:>6} KB")
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="parses of each page")
+    parser.add_argument("--large-cards", type=int, default=300, help="cards on the generated large page (0 to skip)")
+    parser.add_argument("--no-save", action="store_true", help="don't write the results file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.large_cards)
+    results = {source: bench_source(source, pages, args.repeat) for source, pages in corpus.items() if pages}
+    previous = previous_results()
+    if previous:
+        print(f"compared with {previous['revision'] or 'unknown revision'} from {previous['timestamp']}\n")
+    report(results, previous)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{timestamp}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "timestamp": timestamp,
+                "revision": git_revision(),
+                "parser": main.HTML_PARSER,
+                "card_scoped": main.CARD_SCOPED_PARSING,
+                "repeat": args.repeat,
+                "sources": results,
+            }, f, indent=1)
+        print(f"\nsaved {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,67 @@
+"""Compare HTML parser backends on synthetic result pages.
+
+    python benchmarks/bench_parsers.py [--pages 30] [--cards 25]
+
+Prints pages/sec per source for html.parser on the full document (the old
+behaviour), lxml on the full document, and lxml restricted to the job cards.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from sample_pages import SOURCES, sample_page  # noqa: E402
+
+BACKENDS = [
+    ("html.parser (full tree)", "html.parser", False),
+    ("lxml (full tree)", "lxml", False),
+    ("lxml (card-scoped)", "lxml", True),
+]
+
+
+def parse_page(source, html):
+    if source == "LinkedIn":
+        return main.parse_linkedin_page(html, "Software Engineer Intern", "India", "https://www.linkedin.com/jobs/search")
+    if source == "Indeed India":
+        return main.parse_indeed_page(html, "Software Engineer Intern", "Bangalore", "https://in.indeed.com/jobs")
+    if source == "Internshala":
+        return main.parse_internshala_page(html)
+    return main.parse_naukri_page(html)
+
+
+def bench(source, pages, backend, scoped):
+    main.HTML_PARSER = backend
+    main.CARD_SCOPED_PARSING = scoped
+    jobs = 0
+    start = time.perf_counter()
+    # The parsers log every card they add; keep that out of the timings' output
+    with contextlib.redirect_stdout(io.StringIO()):
+        for html in pages:
+            jobs += len(parse_page(source, html))
+    elapsed = time.perf_counter() - start
+    return len(pages) / elapsed, jobs
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=30, help="pages per source")
+    parser.add_argument("--cards", type=int, default=25, help="job cards per page")
+    args = parser.parse_args()
+
+    print(f"{'source':<14} {'backend':<26} {'pages/sec':>10} {'jobs':>6}")
+    for source in SOURCES:
+        pages = [sample_page(source, cards=args.cards, seed=n) for n in range(args.pages)]
+        baseline = None
+        for label, backend, scoped in BACKENDS:
+            rate, jobs = bench(source, pages, backend, scoped)
+            baseline = baseline or rate
+            print(f"{source:<14} {label:<26} {rate:>10.1f} {jobs:>6}  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main_()
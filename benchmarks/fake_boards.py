@@ -0,0 +1,204 @@
+"""Local stand-ins for the four job boards, for offline end-to-end and load testing.
+
+    python benchmarks/fake_boards.py [--port 8100] [--cards 25] [--latency 0.2] [--block-rate 0.05] ...
+
+Each board gets its own port (LinkedIn on --port, Indeed +1, Internshala +2,
+Naukri +3) and answers every search with realistic result markup from
+sample_pages.py, and every posting link with a detail page, the same page for
+the same URL (with an ETag, so conditional requests get 304s). Responses are delayed by a configurable latency, and a
+fraction of them can be turned into blocks (999 on LinkedIn, 403 elsewhere),
+429s with Retry-After, or hangs longer than the scraper's timeout. The script
+prints the *_BASE_URL variables that point main.py at the servers.
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sample_pages import DETAIL_BUILDERS, DETAIL_PATHS, SOURCES, blocked_page, detail_page, sample_page
+
+# Environment variable main.py reads each board's base URL from
+BASE_URL_VARIABLES = {
+    "LinkedIn": "LINKEDIN_BASE_URL",
+    "Indeed India": "INDEED_BASE_URL",
+    "Internshala": "INTERNSHALA_BASE_URL",
+    "Naukri.com": "NAUKRI_BASE_URL",
+}
+BLOCK_STATUS = {"LinkedIn": 999}
+
+
+class BoardConfig:
+    """How the fake boards behave; shared by all of them and safe to change while they run"""
+    def __init__(self, cards=25, filler_kb=40, latency=0.2, jitter=0.1, block_rate=0.0, throttle_rate=0.0,
+                 timeout_rate=0.0, hang_seconds=30.0, seed=0):
+        self.cards = cards
+        self.filler_kb = filler_kb
+        self.latency = latency
+        self.jitter = jitter
+        self.block_rate = block_rate
+        self.throttle_rate = throttle_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def roll(self):
+        """Which fault, if any, the next request gets"""
+        with self.lock:
+            draw = self.rng.random()
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+        if draw < self.block_rate:
+            return "block", delay
+        draw -= self.block_rate
+        if draw < self.throttle_rate:
+            return "throttle", delay
+        draw -= self.throttle_rate
+        if draw < self.timeout_rate:
+            return "timeout", self.hang_seconds
+        return None, delay
+
+
+class RequestLog:
+    """Every request the boards answered: (source, status, seconds, bytes)"""
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+
+    def add(self, source, status, seconds, size):
+        with self.lock:
+            self.records.append((source, status, seconds, size))
+
+    def since(self, mark):
+        with self.lock:
+            return self.records[mark:]
+
+    def mark(self):
+        with self.lock:
+            return len(self.records)
+
+
+def make_handler(source, config, log):
+    pages = {}
+    pages_lock = threading.Lock()
+
+    def page_for(path):
+        # Same URL, same page: keeps ETags stable and the cache in main.py honest
+        with pages_lock:
+            if path not in pages:
+                seed = zlib.crc32(path.encode())
+                if source in DETAIL_BUILDERS and path.startswith(DETAIL_PATHS):
+                    html = detail_page(source, seed=seed, filler_kb=config.filler_kb // 4).encode()
+                else:
+                    html = sample_page(source, cards=config.cards, seed=seed, filler_kb=config.filler_kb).encode()
+                pages[path] = (html, '"' + hashlib.sha1(html).hexdigest()[:20] + '"')
+            return pages[path]
+
+    class BoardHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start = time.perf_counter()
+            fault, delay = config.roll()
+            time.sleep(delay)
+            if fault == "timeout":
+                # The client gave up long ago; just drop the connection
+                self.close_connection = True
+                log.add(source, "timeout", time.perf_counter() - start, 0)
+                return
+            if fault == "block":
+                status, body, headers = BLOCK_STATUS.get(source, 403), blocked_page(source).encode(), {}
+            elif fault == "throttle":
+                status, body, headers = 429, blocked_page(source).encode(), {"Retry-After": "30"}
+            else:
+                body, etag = page_for(self.path)
+                if self.headers.get("If-None-Match") == etag:
+                    status, body, headers = 304, b"", {"ETag": etag}
+                else:
+                    status, headers = 200, {"ETag": etag, "Cache-Control": "no-cache"}
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                status = "reset"
+            log.add(source, status, time.perf_counter() - start, len(body))
+
+        def log_message(self, format, *args):
+            pass
+
+    return BoardHandler
+
+
+class FakeBoards:
+    """All four boards, each on its own port, served from background threads"""
+    def __init__(self, config, host="127.0.0.1", port=8100):
+        self.config = config
+        self.log = RequestLog()
+        self.servers = {}
+        for offset, source in enumerate(SOURCES):
+            server = ThreadingHTTPServer((host, port + offset), make_handler(source, config, self.log))
+            server.daemon_threads = True
+            self.servers[source] = server
+
+    def base_urls(self):
+        return {source: f"http://{server.server_address[0]}:{server.server_address[1]}" for source, server in self.servers.items()}
+
+    def environment(self):
+        return {BASE_URL_VARIABLES[source]: url for source, url in self.base_urls().items()}
+
+    def start(self):
+        for source, server in self.servers.items():
+            threading.Thread(target=server.serve_forever, name=f"fake-{source}", daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def add_board_arguments(parser):
+    parser.add_argument("--port", type=int, default=8100, help="LinkedIn's port; the other boards use the next three")
+    parser.add_argument("--cards", type=int, default=25, help="job cards per result page")
+    parser.add_argument("--filler-kb", type=int, default=40, help="roughly how much non-card markup each page carries")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before every response")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random seconds of latency")
+    parser.add_argument("--block-rate", type=float, default=0.0, help="fraction of requests blocked (999 on LinkedIn, 403 elsewhere)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang past the client's timeout")
+    parser.add_argument("--hang", type=float, default=30.0, help="how long a hanging request is held open")
+    parser.add_argument("--seed", type=int, default=0, help="seed for latency and fault injection")
+
+
+def board_config(args):
+    return BoardConfig(cards=args.cards, filler_kb=args.filler_kb, latency=args.latency, jitter=args.jitter,
+                       block_rate=args.block_rate, throttle_rate=args.throttle_rate, timeout_rate=args.timeout_rate,
+                       hang_seconds=args.hang, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_board_arguments(parser)
+    args = parser.parse_args()
+
+    boards = FakeBoards(board_config(args), port=args.port).start()
+    print("Fake job boards running, point main.py at them with:\n")
+    for name, url in boards.environment().items():
+        print(f"export {name}={url}")
+    print("\nCtrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        boards.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Local stand-in SMTP server for testing digest delivery without sending real email.
+
+    python benchmarks/fake_smtp.py [--port 2525] [--fail-rate 0.2] [--max-recipients 100] [--save-dir DIR]
+
+Speaks just enough plain SMTP for smtplib (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT); point main.py at it with SMTP_HOST=127.0.0.1 SMTP_PORT=2525
+SMTP_STARTTLS=0. A fraction of transactions can be answered with a transient
+451 after DATA, connections can be dropped, recipients past --max-recipients
+get 452, and every message accepted is counted (and optionally saved).
+"""
+import argparse
+import os
+import random
+import socketserver
+import threading
+import time
+
+
+class MailLog:
+    """Every transaction the server finished: (recipients, accepted, bytes)"""
+    def __init__(self):
+        self.transactions = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def add(self, recipients, accepted, size):
+        with self.lock:
+            self.transactions.append((recipients, accepted, size))
+
+    def connected(self):
+        with self.lock:
+            self.connections += 1
+
+    def summary(self):
+        with self.lock:
+            accepted = [t for t in self.transactions if t[1]]
+            return {
+                "connections": self.connections,
+                "transactions": len(self.transactions),
+                "accepted": len(accepted),
+                "rejected": len(self.transactions) - len(accepted),
+                "recipients": sum(len(t[0]) for t in accepted),
+                "bytes": sum(t[2] for t in accepted),
+            }
+
+
+class SmtpConfig:
+    def __init__(self, fail_rate=0.0, drop_rate=0.0, max_recipients=100, latency=0.0, save_dir=None, seed=0):
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.max_recipients = max_recipients
+        self.latency = latency
+        self.save_dir = save_dir
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        with self.lock:
+            return self.rng.random()
+
+
+def make_handler(config, log):
+    class SmtpHandler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write(line.encode() + b"\r\n")
+
+        def handle(self):
+            log.connected()
+            self.reply("220 fake-smtp ready")
+            sender, recipients = None, []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    self.wfile.write(b"250-fake-smtp\r\n250-AUTH PLAIN\r\n250-8BITMIME\r\n250 SIZE 35882577\r\n")
+                elif verb == "HELO":
+                    self.reply("250 fake-smtp")
+                elif verb == "AUTH":
+                    self.reply("235 2.7.0 Accepted")
+                elif verb == "MAIL":
+                    sender, recipients = command[10:].strip(), []
+                    self.reply("250 OK")
+                elif verb == "RCPT":
+                    if len(recipients) >= config.max_recipients:
+                        self.reply("452 4.5.3 Too many recipients")
+                    else:
+                        recipients.append(command[8:].strip())
+                        self.reply("250 OK")
+                elif verb == "DATA":
+                    self.receive(sender, recipients)
+                    sender, recipients = None, []
+                elif verb == "RSET":
+                    sender, recipients = None, []
+                    self.reply("250 OK")
+                elif verb == "NOOP":
+                    self.reply("250 OK")
+                elif verb == "QUIT":
+                    self.reply("221 Bye")
+                    return
+                else:
+                    self.reply("502 Command not implemented")
+
+        def receive(self, sender, recipients):
+            if not recipients:
+                self.reply("503 Need RCPT first")
+                return
+            self.reply("354 End data with <CR><LF>.<CR><LF>")
+            lines = []
+            while True:
+                line = self.rfile.readline()
+                if not line or line == b".\r\n":
+                    break
+                lines.append(line[1:] if line.startswith(b"..") else line)
+            body = b"".join(lines)
+            time.sleep(config.latency)
+            draw = config.draw()
+            if draw < config.drop_rate:
+                # Hang up mid-transaction, like a server going away
+                log.add(recipients, False, len(body))
+                self.connection.close()
+                raise ConnectionAbortedError("dropped on purpose")
+            if draw < config.drop_rate + config.fail_rate:
+                log.add(recipients, False, len(body))
+                self.reply("451 4.3.0 Temporary failure, try again later")
+                return
+            log.add(recipients, True, len(body))
+            if config.save_dir:
+                os.makedirs(config.save_dir, exist_ok=True)
+                with open(os.path.join(config.save_dir, f"{time.time_ns()}.eml"), "wb") as f:
+                    f.write(body)
+            self.reply("250 2.0.0 OK queued")
+
+    return SmtpHandler
+
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, config, host="127.0.0.1", port=2525):
+        self.log = MailLog()
+        super().__init__((host, port), make_handler(config, self.log))
+
+    def handle_error(self, request, client_address):
+        pass  # dropped connections are intentional
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-smtp", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def environment(self):
+        host, port = self.server_address[:2]
+        return {"SMTP_HOST": host, "SMTP_PORT": str(port), "SMTP_STARTTLS": "0"}
+
+
+def add_smtp_arguments(parser):
+    parser.add_argument("--smtp-port", type=int, default=2525, help="port for the fake SMTP server")
+    parser.add_argument("--smtp-fail-rate", type=float, default=0.0, help="fraction of messages answered with 451")
+    parser.add_argument("--smtp-drop-rate", type=float, default=0.0, help="fraction of messages whose connection is dropped")
+    parser.add_argument("--smtp-max-recipients", type=int, default=100, help="recipients accepted per message")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="seconds to accept each message")
+
+
+def smtp_config(args, save_dir=None):
+    return SmtpConfig(fail_rate=args.smtp_fail_rate, drop_rate=args.smtp_drop_rate, max_recipients=args.smtp_max_recipients,
+                      latency=args.smtp_latency, save_dir=save_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_smtp_arguments(parser)
+    parser.add_argument("--save-dir", default=None, help="save every accepted message here")
+    args = parser.parse_args()
+
+    server = FakeSmtpServer(smtp_config(args, args.save_dir), port=args.smtp_port).start()
+    print("Fake SMTP server running, point main.py at it with:\n")
+    for name, value in server.environment().items():
+        print(f"export {name}={value}")
+    print("\nCtrl+C to stop")
+    try:
+        while True:
+            time.sleep(10)
+            print(server.log.summary())
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Drive the whole main.py pipeline against the local fake job boards and report throughput and latency.
+
+    python benchmarks/load_test.py [--runs 3] [--cards 25] [--latency 0.2] [--block-rate 0.05] [--timeout-rate 0.02] ...
+
+Starts fake_boards.py in-process, then runs `python main.py` --runs times with
+every board pointed at it, the rate limits scaled down (--rate-scale), a short
+request timeout and the digest written to an outbox directory instead of being
+emailed. Each run starts from an empty state directory unless --warm is given,
+in which case the cache, selector stats and seen-jobs store carry over like
+they do between cron runs.
+
+With --smtp the digest is delivered to fake_smtp.py instead, to --recipients
+made-up addresses, so batching, retries and the send-rate cap are exercised too.
+With --shards N every run is `main.py --shards=N`: N shard processes crawl their
+slices side by side and one merge sends the digest, like the workflow's matrix.
+
+Per run it prints wall time, requests and requests/sec, the status mix, and
+p50/p95/p99/max response latency per board as measured by the fake servers.
+main.py's own run report (per-stage timings, cards vs jobs per query) is kept
+in report-<n>/ in the work directory, and the jobs and rendered emails it
+passed between stages in artifacts-<n>/; use --keep to look at them.
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from fake_boards import FakeBoards, add_board_arguments, board_config
+from fake_smtp import FakeSmtpServer, add_smtp_arguments, smtp_config
+from sample_pages import SOURCES
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_pipeline(env, log_path, argv=()):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, MAIN, *argv], env=env, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    elapsed = time.perf_counter() - start
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(result.stdout)
+        f.write(result.stderr)
+    sent = re.search(r"Jobs to be sent in email: (\d+)", result.stdout)
+    return elapsed, result.returncode, int(sent.group(1)) if sent else 0
+
+
+def report_smtp(before, after):
+    delta = {key: after[key] - before[key] for key in after}
+    print(f"  smtp: {delta['accepted']} messages accepted, {delta['rejected']} rejected, "
+          f"{delta['recipients']} recipients, {delta['connections']} connections, {delta['bytes'] / 1e3:.0f} KB")
+
+
+def report(n, elapsed, returncode, sent, records):
+    statuses = Counter(str(status) for _, status, _, _ in records)
+    megabytes = sum(size for _, _, _, size in records) / 1e6
+    print(f"\nrun {n}: {elapsed:.1f}s, exit {returncode}, {sent} jobs in the digest")
+    print(f"  {len(records)} requests, {len(records) / elapsed:.1f} req/s, {megabytes:.1f} MB served")
+    print(f"  statuses: {', '.join(f'{status} x{count}' for status, count in sorted(statuses.items()))}")
+    latencies = defaultdict(list)
+    for source, _, seconds, _ in records:
+        latencies[source].append(seconds * 1000)
+    print(f"  {'board':<14} {'reqs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for source in SOURCES:
+        values = latencies.get(source, [])
+        print(f"  {source:<14} {len(values):>5} {percentile(values, 0.5):>8.0f} {percentile(values, 0.95):>8.0f}"
+              f" {percentile(values, 0.99):>8.0f} {max(values, default=0):>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_board_arguments(parser)
+    parser.add_argument("--runs", type=int, default=3, help="how many times to run the pipeline")
+    parser.add_argument("--rate-scale", type=float, default=0.01, help="RATE_LIMIT_SCALE passed to main.py")
+    parser.add_argument("--request-timeout", type=float, default=3.0, help="REQUEST_TIMEOUT_SECONDS passed to main.py")
+    parser.add_argument("--workers", type=int, default=None, help="FETCH_WORKERS_PER_HOST passed to main.py")
+    parser.add_argument("--shards", type=int, default=0, help="run main.py as this many shards plus a merge")
+    parser.add_argument("--warm", action="store_true", help="keep the state directory between runs")
+    parser.add_argument("--keep", action="store_true", help="keep the work directory (logs, outbox, state) afterwards")
+    parser.add_argument("--smtp", action="store_true", help="deliver through the fake SMTP server instead of the outbox")
+    parser.add_argument("--recipients", type=int, default=120, help="made-up recipients with --smtp")
+    parser.add_argument("--smtp-rate", type=float, default=600, help="SMTP_SENDS_PER_MINUTE passed to main.py")
+    add_smtp_arguments(parser)
+    parser.set_defaults(hang=None)
+    args = parser.parse_args()
+    if args.hang is None:
+        # Hold hanging requests just past the client's timeout so they cost what a real one would
+        args.hang = args.request_timeout + 1
+
+    workdir = tempfile.mkdtemp(prefix="scraper-load-")
+    boards = FakeBoards(board_config(args), port=args.port).start()
+    env = {
+        **os.environ,
+        **boards.environment(),
+        "RATE_LIMIT_SCALE": str(args.rate_scale),
+        "REQUEST_TIMEOUT_SECONDS": str(args.request_timeout),
+        "EMAIL_OUTBOX_DIR": os.path.join(workdir, "outbox"),
+        "RECEIVERS": "load-test@example.com",
+        "PYTHONIOENCODING": "utf-8",
+    }
+    if args.workers:
+        env["FETCH_WORKERS_PER_HOST"] = str(args.workers)
+    smtp = None
+    if args.smtp:
+        smtp = FakeSmtpServer(smtp_config(args), port=args.smtp_port).start()
+        del env["EMAIL_OUTBOX_DIR"]
+        env.update(smtp.environment())
+        env.update({
+            "YOUR_EMAIL": "digest@example.com",
+            "YOUR_APP_PASSWORD": "not-a-password",
+            "RECEIVERS": ",".join(f"student{n}@example.com" for n in range(args.recipients)),
+            "SMTP_SENDS_PER_MINUTE": str(args.smtp_rate),
+        })
+    print(f"boards: {', '.join(f'{source} {url}' for source, url in boards.base_urls().items())}")
+    print(f"work directory: {workdir}")
+
+    try:
+        totals = []
+        for n in range(1, args.runs + 1):
+            state_dir = os.path.join(workdir, "state" if args.warm else f"state-{n}")
+            mark = boards.log.mark()
+            smtp_before = smtp.log.summary() if smtp else None
+            run_env = {**env, "SCRAPER_STATE_DIR": state_dir, "METRICS_DIR": os.path.join(workdir, f"report-{n}"),
+                       "SHARD_DIR": os.path.join(workdir, f"shards-{n}"), "ARTIFACT_DIR": os.path.join(workdir, f"artifacts-{n}")}
+            argv = [f"--shards={args.shards}"] if args.shards else []
+            elapsed, returncode, sent = run_pipeline(run_env, os.path.join(workdir, f"run-{n}.log"), argv)
+            records = boards.log.since(mark)
+            report(n, elapsed, returncode, sent, records)
+            if smtp:
+                report_smtp(smtp_before, smtp.log.summary())
+            totals.append((elapsed, len(records)))
+        if len(totals) > 1:
+            seconds = sum(elapsed for elapsed, _ in totals)
+            requests = sum(count for _, count in totals)
+            print(f"\noverall: {requests} requests in {seconds:.1f}s ({requests / seconds:.1f} req/s), "
+                  f"mean run {seconds / len(totals):.1f}s")
+    finally:
+        boards.stop()
+        if smtp:
+            smtp.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Write the synthetic fixture corpus used by bench_extract.py.
+
+    python benchmarks/make_fixtures.py
+
+Pages recorded from the live boards (SCRAPER_RECORD_DIR=benchmarks/fixtures
+python main.py) land in the same <host>/ directories and are picked up too.
+"""
+import os
+
+from sample_pages import SOURCE_HOSTS, SOURCES, blocked_page, malformed_page, sample_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def main():
+    for source in SOURCES:
+        directory = os.path.join(FIXTURE_DIR, SOURCE_HOSTS[source])
+        os.makedirs(directory, exist_ok=True)
+        pages = {
+            "synthetic-normal.html": sample_page(source, cards=25, filler_kb=10),
+            "synthetic-malformed.html": malformed_page(source, cards=25),
+            "synthetic-blocked.html": blocked_page(source),
+        }
+        for name, html in pages.items():
+            with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"wrote {os.path.join(SOURCE_HOSTS[source], name)} ({len(html) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Synthetic search-result pages that mimic the card markup of each job board.
+
+Used by the benchmarks so parser and selector changes can be measured without
+hitting the live sites. Pages are deterministic for a given seed.
+"""
+import random
+
+SOURCES = ("LinkedIn", "Indeed India", "Internshala", "Naukri.com")
+SOURCE_HOSTS = {
+    "LinkedIn": "www.linkedin.com",
+    "Indeed India": "in.indeed.com",
+    "Internshala": "internshala.com",
+    "Naukri.com": "www.naukri.com",
+}
+
+TITLES = [
+    "Software Engineer Intern", "Data Science Intern", "Machine Learning Intern",
+    "Python Developer Intern", "Full Stack Developer Intern", "Backend Developer Intern",
+    "Frontend Developer Intern", "DevOps Intern", "Mechanical Design Intern",
+    "Civil Site Engineer Intern", "Business Analyst Intern", "Digital Marketing Intern",
+    "UI/UX Design Intern", "Embedded Systems Trainee", "Graduate Engineer Trainee",
+]
+COMPANIES = [
+    "TechCorp India Pvt Ltd", "Analytics Solutions", "AI Innovations Ltd", "StartupHub Technologies",
+    "Infosys", "Zoho Corporation", "Freshworks", "Razorpay", "Swiggy", "Tata Motors",
+    "Larsen & Toubro", "Reliance Industries", "CRED", "Meesho", "PhonePe",
+]
+CITIES = [
+    ("Bangalore", "Karnataka"), ("Mumbai", "Maharashtra"), ("Delhi", "Delhi"),
+    ("Hyderabad", "Telangana"), ("Chennai", "Tamil Nadu"), ("Pune", "Maharashtra"),
+    ("Gurgaon", "Haryana"), ("Noida", "Uttar Pradesh"),
+]
+STIPENDS = ["₹ 10,000 /month", "₹ 15,000-20,000 /month", "₹ 5,000 /month", "Unpaid", "₹ 25,000 /month"]
+POSTED = ["Just now", "2 hours ago", "5 hours ago", "1 day ago", "3 days ago", "1 week ago"]
+
+
+def _slug(text):
+    return "-".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+def _linkedin_card(rng, i, job_id, title, company, city, state):
+    return f"""
+<li>
+  <div class="base-card relative w-full hover:no-underline focus:no-underline base-card--link base-search-card base-search-card--link job-search-card" data-entity-urn="urn:li:jobPosting:{job_id}" data-impression-id="jobs-search-result-{i}" data-reference-id="{rng.getrandbits(64):x}" data-tracking-id="{rng.getrandbits(64):x}" data-column="1" data-row="{i + 1}">
+    <a class="base-card__full-link absolute top-0 right-0 bottom-0 left-0 p-0 z-[2]" href="https://in.linkedin.com/jobs/view/{_slug(title)}-at-{_slug(company)}-{job_id}?refId={rng.getrandbits(64):x}&amp;trackingId={rng.getrandbits(64):x}&amp;position={i + 1}&amp;pageNum=0&amp;trk=public_jobs_jserp-result_search-card" data-tracking-control-name="public_jobs_jserp-result_search-card" data-tracking-client-ingraph data-tracking-will-navigate>
+      <span class="sr-only">{title}</span>
+    </a>
+    <div class="search-entity-media">
+      <img class="artdeco-entity-image artdeco-entity-image--square-4 lazy-loaded" data-delayed-url="https://media.licdn.com/dms/image/{rng.getrandbits(48):x}/company-logo_100_100/0/" data-ghost-classes="artdeco-entity-image--ghost" alt="{company}">
+    </div>
+    <div class="base-search-card__info">
+      <h3 class="base-search-card__title">
+            {title}
+      </h3>
+      <h4 class="base-search-card__subtitle">
+          <a class="hidden-nested-link" data-tracking-client-ingraph data-tracking-control-name="public_jobs_jserp-result_job-search-card-subtitle" href="https://in.linkedin.com/company/{_slug(company)}?trk=public_jobs_jserp-result_job-search-card-subtitle">
+            {company}
+          </a>
+      </h4>
+      <div class="base-search-card__metadata">
+        <span class="job-search-card__location">
+          {city}, {state}, India
+        </span>
+        <div class="job-posting-benefits text-sm">
+          <icon class="job-posting-benefits__icon" data-delayed-url="https://static.licdn.com/aero-v1/sc/h/icon" data-svg-class-name="job-posting-benefits__icon-svg"></icon>
+          <span class="job-posting-benefits__text">Actively Hiring</span>
+        </div>
+        <time class="job-search-card__listdate--new" datetime="2024-05-0{1 + i % 9}">
+          {rng.choice(POSTED)}
+        </time>
+      </div>
+    </div>
+  </div>
+</li>"""
+
+
+def _indeed_card(rng, i, job_id, title, company, city, state):
+    jk = f"{job_id:016x}"
+    return f"""
+<li>
+<div class="cardOutline tapItem dd-privacy-allow result job_{jk} resultWithShelf sponTapItem desktop">
+  <div class="slider_container css-8xisqv eu4oa1w0"><div class="slider_list css-bznm4e eu4oa1w0"><div class="slider_item css-kyg8or eu4oa1w0">
+  <div class="job_seen_beacon">
+    <table class="big6_visualChanges" role="presentation"><tbody><tr><td class="resultContent css-1qwrrf0 eu4oa1w0">
+      <div class="css-dekpa e37uo190"><h2 class="jobTitle css-198pbd eu4oa1w0" tabindex="-1">
+        <a id="job_{jk}" data-mobtk="{rng.getrandbits(64):x}" data-jk="{jk}" data-ci="{rng.getrandbits(32)}" role="button" class="jcs-JobTitle css-jspxzf eu4oa1w0" href="/rc/clk?jk={jk}&amp;bb={rng.getrandbits(64):x}&amp;xkcb=SoA{rng.getrandbits(32):x}&amp;fccid={rng.getrandbits(64):x}&amp;vjs=3">
+          <span title="{title}" id="jobTitle-{jk}">{title}</span>
+        </a>
+      </h2></div>
+      <div class="company_location css-17fky0v e37uo190"><div class="css-1afmp4o e37uo190">
+        <span class="companyName" data-testid="company-name">{company}</span>
+        <div data-testid="text-location" class="css-1restlb eu4oa1w0">{city}, {state}</div>
+      </div></div>
+      <div class="heading6 tapItem-gutter metadataContainer css-z5ecg7 eu4oa1w0">
+        <div class="metadata salary-snippet-container"><div data-testid="attribute_snippet_testid" class="css-1cvo3fd eu4oa1w0">{rng.choice(STIPENDS)}</div></div>
+        <div class="metadata css-5zy3wz eu4oa1w0"><div data-testid="attribute_snippet_testid" class="css-1cvo3fd eu4oa1w0">Internship</div></div>
+      </div>
+    </td></tr></tbody></table>
+    <table class="jobCardShelfContainer big6_visualChanges" role="presentation"><tbody><tr class="underShelfFooter"><td>
+      <div class="heading6 error-text tapItem-gutter"><div class="css-qvloho eu4oa1w0"><ul style="list-style-type:circle;margin-top: 0px;margin-bottom: 0px;padding-left:20px;">
+        <li>Work on real projects with our engineering team.</li><li>Stipend and certificate on completion.</li>
+      </ul></div></div>
+      <span data-testid="myJobsStateDate" class="css-10pe3me eu4oa1w0">Posted {rng.choice(POSTED)}</span>
+    </td></tr></tbody></table>
+  </div>
+  </div></div></div>
+</div>
+</li>"""
+
+
+def _internshala_card(rng, i, job_id, title, company, city, state):
+    detail = f"/internship/detail/{_slug(title)}-internship-in-{_slug(city)}-at-{_slug(company)}{job_id}"
+    return f"""
+<div class="container-fluid individual_internship visibilityTrackerItem" employment_type="internship" internshipid="{job_id}" data-href="{detail}">
+  <div class="internship_meta">
+    <div class="individual_internship_header">
+      <div class="company">
+        <h3 class="heading_4_5 profile"><a class="job-title-href" href="{detail}">{title}</a></h3>
+        <div class="heading_6 company_name"><a class="link_display_like_text view_detail_button" href="{detail}">{company}</a></div>
+      </div>
+      <div class="internship_logo"><img src="https://internshala-uploads.internshala.com/logo/{rng.getrandbits(40):x}.png" alt="{company}"></div>
+    </div>
+    <div class="individual_internship_details individual_internship_internship">
+      <div class="row-1-item locations"><i class="ic-16-map-pin"></i><span><a class="location_link view_detail_button" href="/internships/internship-in-{_slug(city)}">{city}</a></span></div>
+      <div class="row-1-item"><i class="ic-16-calendar"></i><span>{rng.randint(1, 6)} Months</span></div>
+      <div class="row-1-item"><i class="ic-16-money"></i><span class="stipend">{rng.choice(STIPENDS)}</span></div>
+    </div>
+    <div class="detail-row-2"><div class="status-container"><div class="status-inactive status-small"><i class="ic-16-reload"></i><span>{rng.choice(POSTED)}</span></div></div></div>
+  </div>
+</div>"""
+
+
+def _naukri_card(rng, i, job_id, title, company, city, state):
+    return f"""
+<div class="jobTuple bgWhite br4 mb-8" type="tuple" data-job-id="{job_id}">
+  <div class="jobTupleHeader">
+    <div class="info fleft">
+      <a class="title ellipsis" href="/job-listings-{_slug(title)}-{_slug(company)}-{_slug(city)}-0-to-1-years-{job_id}" target="_blank" title="{title}">{title}</a>
+      <div class="mt-7 companyInfo subheading lh16"><a class="subTitle ellipsis fleft" href="/{_slug(company)}-jobs-careers-{rng.randint(1000, 99999)}" title="{company} Careers">{company}</a></div>
+    </div>
+  </div>
+  <div class="jobTupleBody mt-8"><ul class="mt-7">
+    <li class="fleft grey-text br2 placeHolderLi experience"><span class="ellipsis fleft expwdth">0-1 Yrs</span></li>
+    <li class="fleft grey-text br2 placeHolderLi salary"><span class="ellipsis fleft">Not disclosed</span></li>
+    <li class="fleft grey-text br2 placeHolderLi location"><span class="ellipsis fleft locWdth">{city}</span></li>
+  </ul></div>
+  <div class="jobTupleFooter mt-20"><div class="type br2 fleft grey"><span class="fleft postedDate">{rng.choice(POSTED)}</span></div></div>
+</div>"""
+
+
+CARD_BUILDERS = {
+    "LinkedIn": _linkedin_card,
+    "Indeed India": _indeed_card,
+    "Internshala": _internshala_card,
+    "Naukri.com": _naukri_card,
+}
+
+
+def _chrome(rng, body, filler_kb):
+    """Wrap the cards in the kind of head scripts, navigation and footer real result pages carry"""
+    script = "".join(f"window.__d{n}={{k:'{rng.getrandbits(64):x}',v:[{','.join(str(rng.randint(0, 999)) for _ in range(20))}]}};" for n in range(filler_kb * 6))
+    nav = "".join(f'<li class="nav-item"><a class="nav-link" href="/browse/{n}">Category {n}</a></li>' for n in range(filler_kb * 4))
+    footer = "".join(f'<div class="footer-col"><p class="footer-text">Footer link group {n}</p></div>' for n in range(filler_kb * 3))
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Internships</title>
+<script type="text/javascript">{script}</script>
+<style>.nav-item{{display:inline-block}}.footer-col{{float:left}}</style></head>
+<body><header><nav><ul class="nav">{nav}</ul></nav></header>
+<main><section class="results">{body}</section></main>
+<footer>{footer}</footer></body></html>"""
+
+
+def sample_page(source, cards=25, seed=0, filler_kb=40):
+    """A search-result page for `source` with `cards` job cards"""
+    rng = random.Random(f"{source}-{seed}-{cards}")
+    build = CARD_BUILDERS[source]
+    parts = []
+    for i in range(cards):
+        city, state = rng.choice(CITIES)
+        parts.append(build(rng, i, rng.randint(10**9, 10**10 - 1), rng.choice(TITLES), rng.choice(COMPANIES), city, state))
+    return _chrome(rng, "".join(parts), filler_kb)
+
+
+DEADLINES = ["2 Jun' 24", "15 Jun' 24", "30 Jun' 24", "10 Jul' 24"]
+
+
+def _linkedin_detail(rng, title, company, city, state):
+    return f"""
+<section class="top-card-layout">
+  <h1 class="top-card-layout__title">{title}</h1>
+  <h4 class="top-card-layout__second-subline">
+    <span class="topcard__flavor"><a class="topcard__org-name-link" href="https://in.linkedin.com/company/{_slug(company)}">{company}</a></span>
+    <span class="topcard__flavor topcard__flavor--bullet">{city}, {state}, India</span>
+    <span class="posted-time-ago__text topcard__flavor--metadata">{rng.choice(POSTED)}</span>
+  </h4>
+</section>
+<section class="compensation"><div class="salary compensation__salary">{rng.choice(STIPENDS)}</div></section>
+<section class="description"><div class="show-more-less-html__markup">Join {company} as a {title}.</div></section>"""
+
+
+def _internshala_detail(rng, title, company, city, state):
+    return f"""
+<div class="detail_view">
+  <div class="heading_4_5 profile">{title}</div>
+  <div class="heading_6 company_name">{company}</div>
+  <p id="location_names"><span><a class="location_link" href="/internships/internship-in-{_slug(city)}">{city}</a></span></p>
+  <div class="other_detail_item stipend_container"><div class="item_body"><span class="stipend">{rng.choice(STIPENDS)}</span></div></div>
+  <div class="other_detail_item apply_by"><div class="item_heading">Apply By</div><div class="item_body">{rng.choice(DEADLINES)}</div></div>
+  <div class="status status-small"><span>{rng.choice(POSTED)}</span></div>
+</div>"""
+
+
+def _naukri_detail(rng, title, company, city, state):
+    return f"""
+<section class="styles_job-header-container">
+  <h1 class="styles_jd-header-title">{title}</h1>
+  <div class="styles_jd-header-comp-name"><a href="/{_slug(company)}-jobs-careers">{company}</a></div>
+  <div class="styles_jhc__exp-salary-container"><div class="salary"><span>{rng.choice(STIPENDS)}</span></div></div>
+  <span class="location"><a href="/jobs-in-{_slug(city)}">{city}</a></span>
+  <div class="styles_jhc__jd-stats"><span class="stat"><label>Posted:</label><span>{rng.choice(POSTED)}</span></span></div>
+</section>"""
+
+
+DETAIL_BUILDERS = {
+    "LinkedIn": _linkedin_detail,
+    "Internshala": _internshala_detail,
+    "Naukri.com": _naukri_detail,
+}
+# Path prefixes of each board's posting pages, as opposed to its search pages
+DETAIL_PATHS = ("/jobs/view/", "/internship/detail/", "/job-listings-")
+
+
+def detail_page(source, seed=0, filler_kb=10):
+    """One posting's own page on `source`, with the stipend, location, posting date and (Internshala) deadline"""
+    rng = random.Random(f"detail-{source}-{seed}")
+    city, state = rng.choice(CITIES)
+    body = DETAIL_BUILDERS[source](rng, rng.choice(TITLES), rng.choice(COMPANIES), city, state)
+    return _chrome(rng, body, filler_kb)
+
+
+def malformed_page(source, cards=25, seed=0, filler_kb=10):
+    """A page damaged the ways real responses are: cut off mid-card, stray closing tags, unquoted and broken attributes"""
+    html = sample_page(source, cards=cards, seed=seed, filler_kb=filler_kb)
+    rng = random.Random(f"malformed-{source}-{seed}")
+    cut = html[: int(len(html) * 0.7)]
+    damage = []
+    for n, chunk in enumerate(cut.split("<div ")):
+        if n and rng.random() < 0.15:
+            chunk = chunk.replace('"', "", 1)  # unbalanced attribute quote
+        if n and rng.random() < 0.1:
+            chunk = "</li></div></span>" + chunk  # closes nothing
+        damage.append(chunk)
+    return "<div ".join(damage) + "<div class=\"job-search-card individual_internship jobTuple\" data-entity-urn=\"urn:li:jobPosting:"
+
+
+def blocked_page(source):
+    """What a board serves instead of results when it rate limits or wants a login"""
+    return f"""<!DOCTYPE html><html><head><title>Security Verification</title></head>
+<body><div class="authwall"><h1>Sign in to view more jobs on {source}</h1>
+<form action="/login" method="post"><input name="session_key"><input name="session_password" type="password"></form>
+<p>Too many requests from your network. Please try again later.</p></div></body></html>"""
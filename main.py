@@ -1,23 +1,403 @@
 import os
-import smtplib
+import sqlite3
 import sys
+import argparse
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from bs4 import BeautifulSoup
-import requests
-from datetime import datetime
+# bs4/lxml, requests/urllib3 and smtplib are imported where they're used, so a stage that doesn't
+# scrape or send never loads them
+from datetime import datetime, timedelta
 import time
 import random
 import re
-from urllib.parse import urlencode, quote_plus
+import json
+import html
+import gzip
+import hashlib
+import struct
+import subprocess
+import threading
+import queue
+from collections import Counter, defaultdict
+from itertools import islice
+from string import Template
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+import cProfile
+import tracemalloc
+from urllib.parse import urlencode, quote_plus, urlparse, urlsplit, urlunsplit, parse_qsl
 
 # ----- Config from Environment Variables -----
 YOUR_EMAIL = os.environ.get("YOUR_EMAIL")
 YOUR_APP_PASSWORD = os.environ.get("YOUR_APP_PASSWORD")
-RECEIVER_EMAILS = os.environ.get("RECEIVERS", "").split(",")
+RECEIVER_EMAILS = [address.strip() for address in os.environ.get("RECEIVERS", "").split(",") if address.strip()]
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
+# Set SMTP_STARTTLS=0 for a local test server that only speaks plain SMTP
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "1") != "0"
+# Recipients per message (Gmail refuses more than 100), connections used in parallel, and a cap on
+# messages per minute across all of them (0 for no cap)
+SMTP_BATCH_SIZE = int(os.environ.get("SMTP_BATCH_SIZE", "50"))
+SMTP_CONNECTIONS = int(os.environ.get("SMTP_CONNECTIONS", "2"))
+SMTP_SENDS_PER_MINUTE = float(os.environ.get("SMTP_SENDS_PER_MINUTE", "20"))
+FETCH_WORKERS_PER_HOST = int(os.environ.get("FETCH_WORKERS_PER_HOST", "3"))
+# Optional cap (seconds) applied on top of every source's own deadline
+SCRAPE_DEADLINE_SECONDS = os.environ.get("SCRAPE_DEADLINE_SECONDS")
+# "lxml" (default) or "html.parser"; set CARD_SCOPED_PARSING=0 to build the whole document tree
+HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+CARD_SCOPED_PARSING = os.environ.get("CARD_SCOPED_PARSING", "1") != "0"
+# Everything the scraper remembers between runs lives here (the workflow caches this directory)
+STATE_DIR = os.environ.get("SCRAPER_STATE_DIR", ".scraper_state")
+# A shard keeps its own state in a subdirectory (see setup()); the merge's stays here, and shards read the
+# search watermarks and seen-jobs store the last merge left behind from it
+SHARED_STATE_DIR = STATE_DIR
+# Shard mode, SHARD=index/count (or --shard 1/4): this process crawls only its slice of the searches and writes
+# its jobs to SHARD_DIR, where `main.py --merge` dedups, ranks and sends them as one digest. Each shard keeps
+# its own state under STATE_DIR; `main.py --shards=4` runs four shards side by side and merges them.
+# The shard is picked once the command line is parsed (see setup()); until then this is the only shard.
+SHARD_INDEX, SHARD_COUNT = 0, 1
+SHARD_NAME = f"shard-{SHARD_INDEX}-of-{SHARD_COUNT}"
+SHARD_DIR = os.environ.get("SHARD_DIR", "shards")
+# Set HTTP_CACHE=0 to always download and parse pages in full
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE", "1") != "0"
+HTTP_CACHE_MAX_AGE_DAYS = int(os.environ.get("HTTP_CACHE_MAX_AGE_DAYS", "7"))
+# When set, every page fetched is also saved under <dir>/<host>/ for the offline benchmarks
+SCRAPER_RECORD_DIR = os.environ.get("SCRAPER_RECORD_DIR")
+# Jobs already emailed are remembered this long after they were last seen on a board
+SEEN_RETENTION_DAYS = int(os.environ.get("SEEN_RETENTION_DAYS", "30"))
+# Set ENRICH_DETAILS=1 to fetch the detail pages of the jobs going out for stipend, deadline, date and location
+ENRICH_DETAILS = os.environ.get("ENRICH_DETAILS", "0") != "0"
+# Set INCREMENTAL_CRAWL=0 to parse every card on every page, even ones older than what a search already saw
+INCREMENTAL_CRAWL = os.environ.get("INCREMENTAL_CRAWL", "1") != "0"
+# Most jobs one digest carries
+DIGEST_SIZE = int(os.environ.get("DIGEST_SIZE", "35"))
+# Per-recipient filters as JSON, {"someone@example.com": {"branches": [...], "cities": [...], "sources": [...]}},
+# inline or in a file; recipients without an entry get every job
+SUBSCRIPTIONS = os.environ.get("SUBSCRIPTIONS")
+SUBSCRIPTIONS_FILE = os.environ.get("SUBSCRIPTIONS_FILE")
+# Estimated Jaccard similarity (title, company, city) above which two postings count as the same job
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+# Where each board is fetched from; override (e.g. LINKEDIN_BASE_URL=http://127.0.0.1:8101) to point
+# a source at benchmarks/fake_boards.py instead of the live site
+BOARD_BASE_URLS = {
+    "LinkedIn": os.environ.get("LINKEDIN_BASE_URL", "https://www.linkedin.com").rstrip("/"),
+    "Indeed India": os.environ.get("INDEED_BASE_URL", "https://in.indeed.com").rstrip("/"),
+    "Internshala": os.environ.get("INTERNSHALA_BASE_URL", "https://internshala.com").rstrip("/"),
+    "Naukri.com": os.environ.get("NAUKRI_BASE_URL", "https://www.naukri.com").rstrip("/"),
+}
+# Multiplier on every host's request spacing (load tests against a local server use e.g. 0.01)
+RATE_LIMIT_SCALE = float(os.environ.get("RATE_LIMIT_SCALE", "1"))
+# Optional cap (seconds) applied on top of every request's own timeout
+REQUEST_TIMEOUT_SECONDS = os.environ.get("REQUEST_TIMEOUT_SECONDS")
+# When set, the digest is written to this directory as an .eml file instead of being sent
+EMAIL_OUTBOX_DIR = os.environ.get("EMAIL_OUTBOX_DIR")
+# Where the scrape, render and send stages hand their output to the next one
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", "artifacts")
+# Where each run's metrics go (run_report.json and metrics.prom); set it empty to skip them
+METRICS_DIR = os.environ.get("METRICS_DIR", "run_report")
+# Set PROFILE=1 (or pass --profile) to write per-stage cProfile stats and top allocations to PROFILE_DIR
+PROFILE = os.environ.get("PROFILE", "0") != "0"
+PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(METRICS_DIR or ".", "profile")
+
+# ----- Run Metrics -----
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+HOST_SOURCES = {urlparse(url).netloc: source for source, url in BOARD_BASE_URLS.items()}
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            total += count
+            yield bound, total
+
+class RunMetrics:
+    """Counters, latency histograms and per-query page stats for one run, written out at the end as
+    JSON and in Prometheus text format"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        self.gauges = {}
+        self.histograms = {}
+        self.queries = {}
+        self.local = threading.local()
+        self.started = datetime.now()
+
+    def _key(self, name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def count(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[self._key(name, labels)] += value
+
+    def gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def saw_cards(self, count):
+        # Parsing runs in the thread that fetched the page, so the cards seen since the last page are this page's
+        self.local.cards = getattr(self.local, "cards", 0) + count
+
+    def page(self, source, url, jobs, reused=False, cards=None):
+        """One parsed (or reused) result page: cards found on it vs jobs kept from it, per query. A reused
+        page passes the cards its parse found, since nothing was parsed this time; returns the card count"""
+        if cards is None:
+            cards = getattr(self.local, "cards", 0)
+        self.local.cards = 0
+        parts = urlsplit(url)
+        query = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        with self.lock:
+            stats = self.queries.setdefault((source, query), {"pages": 0, "reused": 0, "cards": 0, "jobs": 0})
+            stats["pages"] += 1
+            stats["reused"] += reused
+            stats["cards"] += cards
+            stats["jobs"] += jobs
+            self.counters[self._key("cards_total", {"source": source})] += cards
+            self.counters[self._key("jobs_parsed_total", {"source": source})] += jobs
+        return cards
+
+    def selector_stats(self):
+        """Hit rates of every selector cascade used this run, and the time spent in it"""
+        stats = {}
+        for key, cascade in SELECTORS.cascades.items():
+            lookups = sum(cascade.hits.values()) + cascade.misses
+            if lookups:
+                stats[key] = {"lookups": lookups, "hits": {label: n for label, n in cascade.hits.items() if n},
+                              "misses": cascade.misses, "seconds": round(cascade.seconds, 4)}
+        return stats
+
+    def snapshot(self):
+        def labelled(key):
+            name, labels = key
+            return {"name": name, "labels": dict(labels)}
+        with self.lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "seconds": round((datetime.now() - self.started).total_seconds(), 3),
+                "counters": [{**labelled(key), "value": value} for key, value in sorted(self.counters.items())],
+                "gauges": [{**labelled(key), "value": value} for key, value in sorted(self.gauges.items())],
+                "histograms": [{**labelled(key), "count": h.count, "sum": round(h.sum, 4),
+                                "buckets": {str(bound): n for bound, n in h.cumulative()}}
+                               for key, h in sorted(self.histograms.items())],
+                "queries": [{"source": source, "query": query, **stats} for (source, query), stats in sorted(self.queries.items())],
+                "selectors": self.selector_stats(),
+            }
+
+    def prometheus(self):
+        """The same numbers in Prometheus' text exposition format (per-query stats stay in the JSON)"""
+        def series(name, labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return f"scraper_{name}"
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+            return f"scraper_{name}{{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+        lines = []
+        with self.lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                typed = set()
+                for (name, labels), value in sorted(metrics.items()):
+                    if name not in typed:
+                        typed.add(name)
+                        lines.append(f"# TYPE scraper_{name} {kind}")
+                    lines.append(f"{series(name, labels)} {value}")
+            typed = set()
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE scraper_{name} histogram")
+                for bound, n in h.cumulative():
+                    lines.append(f"{series(name + '_bucket', labels, [('le', bound)])} {n}")
+                lines.append(f"{series(name + '_bucket', labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{series(name + '_sum', labels)} {h.sum:.6f}")
+                lines.append(f"{series(name + '_count', labels)} {h.count}")
+        selectors = self.selector_stats()
+        if selectors:
+            lines.append("# TYPE scraper_selector_lookups_total counter")
+            lines.extend(f'scraper_selector_lookups_total{{cascade="{key}"}} {stats["lookups"]}' for key, stats in sorted(selectors.items()))
+            lines.append("# TYPE scraper_selector_misses_total counter")
+            lines.extend(f'scraper_selector_misses_total{{cascade="{key}"}} {stats["misses"]}' for key, stats in sorted(selectors.items()))
+            lines.append("# TYPE scraper_selector_seconds_total counter")
+            lines.extend(f'scraper_selector_seconds_total{{cascade="{key}"}} {stats["seconds"]}' for key, stats in sorted(selectors.items()))
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory=None):
+        directory = directory or METRICS_DIR
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, "run_report.json"), "w") as f:
+                json.dump(self.snapshot(), f, indent=1)
+            with open(os.path.join(directory, "metrics.prom"), "w") as f:
+                f.write(self.prometheus())
+            print(f"📈 Run report written to {directory}")
+        except OSError as e:
+            print(f"⚠️ Could not write the run report: {e}")
+
+METRICS = RunMetrics()
+
+# ----- Profiling -----
+# Allocation sites listed per stage, and how many frames of traceback tracemalloc keeps for each
+PROFILE_TOP_ALLOCATIONS = 25
+PROFILE_TRACE_FRAMES = 5
+# Before 3.12 every thread can run its own cProfile; from 3.12 only one can be enabled in the whole process
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+class Profiler:
+    """cProfile stats for every stage, accumulated over each time it runs, and the allocations each
+    run of a stage left behind. CPU is only seen in the thread that runs the stage (a source's own
+    thread parses its pages; fetches and SMTP sends happen in pool threads), and tracemalloc is
+    process-wide, so sources running side by side show up in each other's allocations. From 3.12 a
+    stage started while another is profiled (each source inside collect) only gets its allocations."""
+    def __init__(self, directory):
+        self.directory = directory
+        self.profiles = {}
+        self.allocations = defaultdict(list)
+        self.enabled = 0
+        self.lock = threading.Lock()
+        tracemalloc.start(PROFILE_TRACE_FRAMES)
+
+    def _start(self, name):
+        """The stage's cProfile, enabled; None when none can run, and the stage runs unprofiled"""
+        with self.lock:
+            if self.enabled and not PER_THREAD_PROFILES:
+                return None
+            profile = self.profiles.get(name) or cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiling tool (a debugger, coverage) already holds the process
+                print(f"⚠️ Not profiling {name}: {e}")
+                return None
+            self.profiles[name] = profile
+            self.enabled += 1
+            return profile
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    @contextmanager
+    def stage(self, name):
+        before = self._snapshot()
+        start = time.perf_counter()
+        profile = self._start(name)
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                with self.lock:
+                    self.enabled -= 1
+            elapsed = time.perf_counter() - start
+            growth = self._snapshot().compare_to(before, "lineno")[:PROFILE_TOP_ALLOCATIONS]
+            with self.lock:
+                self.allocations[name].append((elapsed, growth))
+
+    def write(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for name in self.allocations:
+                filename = re.sub(r"[^\w.-]+", "-", name)
+                if name in self.profiles:
+                    self.profiles[name].dump_stats(os.path.join(self.directory, f"{filename}.pstats"))
+                with open(os.path.join(self.directory, f"{filename}-allocations.txt"), "w") as f:
+                    for n, (elapsed, growth) in enumerate(self.allocations[name], 1):
+                        f.write(f"# {name} run {n}: {elapsed:.3f}s, top {len(growth)} allocation sites by growth\n")
+                        f.writelines(f"{stat}\n" for stat in growth)
+                        f.write("\n")
+            current, peak = tracemalloc.get_traced_memory()
+            with open(os.path.join(self.directory, "memory.txt"), "w") as f:
+                f.write(f"traced now: {current / 1e6:.1f} MB, peak: {peak / 1e6:.1f} MB\n")
+            print(f"🔬 Profiles of {len(self.allocations)} stages ({len(self.profiles)} with CPU stats) written to {self.directory} (python -m pstats <file> to read)")
+        except OSError as e:
+            print(f"⚠️ Could not write the profiles: {e}")
+
+PROFILER = None
+NOT_PROFILED = nullcontext()
+
+def enable_profiling(directory=None):
+    global PROFILER
+    PROFILER = Profiler(directory or PROFILE_DIR)
+
+def profiled(stage):
+    """Profile a stage when profiling is on; otherwise a shared no-op context"""
+    return PROFILER.stage(stage) if PROFILER else NOT_PROFILED
+
+# ----- Job Record -----
+# One timestamp for the whole run: cards without a posting date, the seen-jobs store and the digest all use it
+RUN_STARTED = datetime.now()
+RUN_DATE = RUN_STARTED.strftime('%Y-%m-%d')
+NOT_MENTIONED = "Not Mentioned"
+
+class Job:
+    """One posting. Slotted rather than a dict per card; source, location, salary and date are interned
+    (a run repeats a handful of them thousands of times), and the keys dedup needs are worked out once."""
+    __slots__ = ("title", "company", "location", "salary", "link", "source", "date", "job_id", "posted", "deadline",
+                 "title_key", "company_key", "identity")
+    FIELDS = ("title", "company", "location", "salary", "link", "source", "date", "job_id", "posted", "deadline")
+
+    def __init__(self, title, company, location, salary, link, source, date=None, job_id=None, posted=None, deadline=None):
+        self.title = title
+        self.company = company
+        self.location = sys.intern(location)
+        self.salary = sys.intern(salary)
+        self.link = link
+        self.source = sys.intern(source)
+        self.date = sys.intern(date) if date else RUN_DATE
+        self.job_id = job_id
+        self.posted = posted
+        self.deadline = deadline
+        self.title_key = title.lower().strip()
+        self.company_key = company.lower().strip()
+        # The board's own id when we have it, otherwise title and company
+        self.identity = job_id or f"{self.title_key}-{self.company_key}"
+
+    def __repr__(self):
+        return f"Job({self.title!r} at {self.company!r}, {self.source})"
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
 
 # ----- Email Sending Function -----
-def send_email(subject, body):
+def send_email(subject, body, text_body=None, recipients=None):
+    """Send the digest; returns the recipients still owed it ([] once everyone has it or was refused for
+    good), or None when there was nobody to send to"""
+    recipients = RECEIVER_EMAILS if recipients is None else recipients
+    if not recipients:
+        print("❌ No recipients to send the email to")
+        return None
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
     # Set custom "From" email address as requested
@@ -25,30 +405,1608 @@ def send_email(subject, body):
     # Don't set "To" field - this hides recipients from each other
     # msg["To"] = ", ".join(RECEIVER_EMAILS)  # Commented out to hide recipients
 
-    msg.attach(MIMEText(body, "html"))
+    # Plain text first: clients show the last alternative they can render
+    if text_body:
+        msg.attach(MIMEText(text_body, "plain", "utf-8"))
+    msg.attach(MIMEText(body, "html", "utf-8"))
+
+    if EMAIL_OUTBOX_DIR:
+        return [] if write_to_outbox(msg, recipients) else list(recipients)
 
+    # Recipients only go in the envelope, in batches, so they stay hidden from each other
+    with METRICS.timed("send"):
+        outcomes = SMTP_DELIVERY.deliver(msg.as_string(), recipients)
+    delivered = sum(outcome.delivered() for outcome in outcomes)
+    refused = sum(len(outcome.refused) for outcome in outcomes)
+    outstanding = [address for outcome in outcomes for address in outcome.pending]
+    if not outstanding:
+        refused_note = f", {refused} refused for good" if refused else ""
+        print(f"✅ Email sent successfully to: {delivered} recipients in {len(outcomes)} batches (hidden from each other){refused_note}")
+        return []
+    print(f"❌ Failed to send email to every recipient: {delivered} of {len(recipients)} got it, {len(outstanding)} still owed it")
+    return outstanding
+
+def write_to_outbox(msg, recipients):
+    """Dry run: save the message that would have been sent"""
     try:
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(YOUR_EMAIL, YOUR_APP_PASSWORD)
-            # Send to each recipient individually using BCC
-            server.sendmail(YOUR_EMAIL, RECEIVER_EMAILS, msg.as_string())
-        print(f"✅ Email sent successfully to: {len(RECEIVER_EMAILS)} recipients (hidden from each other)")
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
+        os.makedirs(EMAIL_OUTBOX_DIR, exist_ok=True)
+        path = os.path.join(EMAIL_OUTBOX_DIR, f"digest-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.eml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(msg.as_string())
+        print(f"📭 Email written to {path} instead of being sent ({len(recipients)} recipients)")
+        return True
+    except OSError as e:
+        print(f"❌ Failed to write email to {EMAIL_OUTBOX_DIR}: {e}")
+        return False
+
+# ----- HTTP Response Cache -----
+# Where each source's job cards sit in the raw HTML, used to fingerprint just that region
+CARD_MARKERS = {
+    "LinkedIn": "job-search-card",
+    "Indeed India": "job_seen_beacon",
+    "Internshala": "individual_internship",
+    "Naukri.com": "jobTuple",
+}
+# Characters kept after the last card marker so the last card is part of the fingerprint
+CARD_REGION_TAIL = 4000
+# Tracking parameters and per-request ids change on every load without the cards changing
+VOLATILE_MARKUP = re.compile(r'\?[^"\'\s>]*|\s(?:data-[\w-]+|id)="[^"]*"')
+
+def normalize_url(url):
+    """Cache key for a URL: lowercase scheme and host, sorted query, no fragment or trailing slash"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", query, ""))
+
+def card_fingerprint(source, html):
+    """Hash of the job-card region of a page, or None when the page has no cards we recognise"""
+    marker = CARD_MARKERS.get(source)
+    start = html.find(marker) if marker else -1
+    if start < 0:
+        return None
+    region = html[start:html.rfind(marker) + CARD_REGION_TAIL]
+    return hashlib.sha1(VOLATILE_MARKUP.sub("", region).encode("utf-8", "replace")).hexdigest()
+
+class ResponseCache:
+    """Search pages and the jobs parsed from them, stored on disk between runs"""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(normalize_url(url).encode()).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def load(self, url):
+        try:
+            with open(self._path(url, ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_body(self, url):
+        try:
+            with gzip.open(self._path(url, ".html.gz"), "rb") as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def validators(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, response, fingerprint, jobs, cards, watermark=None, caught_up=False):
+        entry = {
+            "url": normalize_url(url),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding,
+            "fingerprint": fingerprint,
+            "jobs": [job.to_dict() for job in jobs],
+            "cards": cards,
+            "watermark": watermark.isoformat() if watermark else None,
+            "caught_up": caught_up,
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            if not response.not_modified:
+                self._write(self._path(url, ".html.gz"), gzip.compress(response.content))
+            else:
+                # Still the page the board has, so it ages with its entry and isn't pruned out from under it
+                try:
+                    os.utime(self._path(url, ".html.gz"))
+                except OSError:
+                    pass
+            self._write(self._path(url, ".json"), json.dumps(entry).encode())
+        except OSError as e:
+            print(f"⚠️ Could not cache {url[:60]}: {e}")
+
+    def parse(self, source, url, response, parse_func, watermark=None, caught_up=None):
+        """Parse a fetched page, or reuse last run's jobs when the board says (or the cards show) nothing changed.
+        For a search with a `watermark`, `caught_up` is asked after a parse whether it got back to it. A page
+        that did is reused with response.caught_up set; one parsed against another watermark is parsed again."""
+        response.reused = False
+        response.caught_up = False
+        if not HTTP_CACHE_ENABLED:
+            with METRICS.timed("parse", source=source):
+                jobs = parse_func(response.text)
+            METRICS.page(source, url, len(jobs))
+            return jobs
+        entry = getattr(response, "cache_entry", None)
+        html = response.text
+        fingerprint = card_fingerprint(source, html)
+        unchanged = response.not_modified or (fingerprint is not None and entry and entry.get("fingerprint") == fingerprint)
+        if unchanged and watermark and not entry.get("caught_up"):
+            # A parse against this watermark could stop at cards the last one kept
+            unchanged = entry.get("watermark") == watermark.isoformat()
+        if unchanged and entry.get("jobs") is not None:
+            jobs = [Job.from_dict(job) for job in entry["jobs"]]
+            response.reused = True
+            response.caught_up = entry.get("caught_up", False)
+            print(f"♻️ {source} page unchanged since {entry['fetched_at']}, reusing {len(jobs)} parsed jobs")
+            # Entries from before card counts were kept had at least as many cards as jobs
+            cards = METRICS.page(source, url, len(jobs), reused=True, cards=entry.get("cards", len(jobs)))
+        else:
+            with METRICS.timed("parse", source=source):
+                jobs = parse_func(html)
+            cards = METRICS.page(source, url, len(jobs))
+            response.caught_up = bool(caught_up and caught_up())
+        self.store(url, response, fingerprint, jobs, cards, watermark, response.caught_up)
+        return jobs
+
+    def prune(self, max_age_days=HTTP_CACHE_MAX_AGE_DAYS):
+        """Drop pages not fetched for max_age_days; an entry and its body always go together, and an entry
+        whose body is missing goes too"""
+        cutoff = time.time() - max_age_days * 86400
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        files = defaultdict(list)
+        for name in names:
+            files[name.split(".", 1)[0]].append(os.path.join(self.directory, name))
+        for paths in files.values():
+            try:
+                stale = min(os.path.getmtime(path) for path in paths) < cutoff or not any(path.endswith(".html.gz") for path in paths)
+            except OSError:
+                stale = True
+            if stale:
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+
+RESPONSE_CACHE = ResponseCache(os.path.join(STATE_DIR, "http_cache"))
+
+# ----- Pooled HTTP Client -----
+# Headers every board gets; scrapers only pass the ones that differ per source. Accept-Encoding is
+# added with the session: it lists only what urllib3 can actually decode here (br needs the brotli package).
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+class ConnectionStats:
+    """Counts requests against new connections, and the time spent opening those connections"""
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def request(self):
+        with self.lock:
+            self.requests += 1
+
+    def connected(self, seconds):
+        with self.lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+
+    def summary(self):
+        with self.lock:
+            reused = max(0, self.requests - self.connections)
+            average = self.connect_seconds / self.connections if self.connections else 0.0
+            return (f"{self.requests} requests over {self.connections} connections ({reused} reused), "
+                    f"{self.connect_seconds:.2f}s spent connecting, ~{reused * average:.2f}s of handshakes saved")
+
+CONNECTION_STATS = ConnectionStats()
+
+class TimedConnectionMixin:
+    def connect(self):
+        # TCP connect plus, for HTTPS, the TLS handshake
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            # Failed attempts count too, or refused requests would show up as reused connections
+            CONNECTION_STATS.connected(time.perf_counter() - start)
+
+def pooled_adapter(**kwargs):
+    """Keep-alive pools that count connection reuse. The urllib3 classes they extend are only
+    imported once something is actually fetched."""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+        pass
+
+    class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+        pass
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+        def urlopen(self, *args, **kwargs):
+            CONNECTION_STATS.request()
+            return super().urlopen(*args, **kwargs)
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+        def urlopen(self, *args, **kwargs):
+            CONNECTION_STATS.request()
+            return super().urlopen(*args, **kwargs)
+
+    class PooledAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+    return PooledAdapter(**kwargs)
+
+class HttpClient:
+    """One session shared by every scraper: cookies, default headers and a keep-alive pool per host.
+    The session is opened on the first request."""
+    def __init__(self, workers_per_host=FETCH_WORKERS_PER_HOST):
+        self.workers_per_host = workers_per_host
+        self.session = None
+        self.lock = threading.Lock()
+
+    def _open(self):
+        import requests
+        from urllib3.util import make_headers
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+        # A pool per board host, each with a connection for every fetch worker on that host
+        adapter = pooled_adapter(pool_connections=len(BOARD_BASE_URLS) + 2, pool_maxsize=self.workers_per_host)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        if self.session is None:
+            with self.lock:
+                if self.session is None:
+                    self.session = self._open()
+        return self.session.get(url, **kwargs)
+
+HTTP = HttpClient()
+
+# ----- Circuit Breakers -----
+# A source that keeps getting blocked is given up on for the rest of the run, and only probed
+# with a single request once its cooldown (which doubles every time it trips) has passed.
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive blocked/failed responses
+CIRCUIT_BASE_COOLDOWN = 60
+CIRCUIT_MAX_COOLDOWN = 24 * 3600
+# Retries a source may spend in one run, across all its requests
+SOURCE_RETRY_BUDGETS = {
+    "LinkedIn": 6,
+    "Indeed India": 8,
+    "Internshala": 3,
+    "Naukri.com": 2,
+}
+DEFAULT_RETRY_BUDGET = 3
+MAX_RETRIES_PER_REQUEST = 2
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+BLOCKED_STATUSES = {403, 999}
+
+class CircuitOpen(Exception):
+    pass
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open (one probe request) once the cooldown has passed"""
+    def __init__(self, name, retry_budget, state=None):
+        state = state or {}
+        self.name = name
+        self.retries_left = retry_budget
+        self.failures = 0
+        self.trips = state.get("trips", 0)
+        self.open_until = state.get("open_until", 0.0)
+        # A breaker that was still tripped when the last run ended starts out open
+        self.state = "open" if self.trips else "closed"
+        self.probing = False
+        self.condition = threading.Condition()
+
+    def allow(self, stop_event=None):
+        with self.condition:
+            while True:
+                if self.state == "closed":
+                    return
+                if self.state == "open":
+                    if time.time() < self.open_until:
+                        raise CircuitOpen(f"{self.name} circuit is open until {datetime.fromtimestamp(self.open_until):%H:%M:%S}")
+                    print(f"🟡 {self.name} circuit half-open, sending one probe request")
+                    self.state = "half_open"
+                if not self.probing:
+                    self.probing = True
+                    return
+                # Everyone else waits to hear how the probe went
+                self.condition.wait(0.5)
+                if stop_event is not None and stop_event.is_set():
+                    raise FetchCancelled("source was cancelled while its circuit was half-open")
+
+    def abandon(self):
+        """The request allowed through never went out"""
+        with self.condition:
+            self.probing = False
+            self.condition.notify_all()
+
+    def record_success(self):
+        with self.condition:
+            self.failures = 0
+            if self.state != "closed":
+                print(f"🟢 {self.name} is answering again, circuit closed")
+            self.state = "closed"
+            self.trips = 0
+            self.probing = False
+            self.condition.notify_all()
+
+    def record_failure(self, reason):
+        with self.condition:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= CIRCUIT_FAILURE_THRESHOLD):
+                self.trips += 1
+                # Exponential cooldown with jitter, so a blocked source is retried less and less often
+                cooldown = min(CIRCUIT_MAX_COOLDOWN, CIRCUIT_BASE_COOLDOWN * 2 ** (self.trips - 1))
+                cooldown = random.uniform(cooldown / 2, cooldown)
+                self.open_until = time.time() + cooldown
+                self.state = "open"
+                print(f"🔴 {self.name} circuit opened after {self.failures} failures ({reason}), next probe in {cooldown:.0f}s")
+            self.probing = False
+            self.condition.notify_all()
+
+    def take_retry(self):
+        with self.condition:
+            if self.state != "closed" or self.retries_left <= 0:
+                return False
+            self.retries_left -= 1
+            return True
+
+class CircuitBreakerRegistry:
+    """One breaker per source, with trips and cooldowns persisted between runs"""
+    def __init__(self, path):
+        self.path = path
+        self.breakers = {}
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.history = json.load(f)
+        except (OSError, ValueError):
+            self.history = {}
+        self.host_sources = {urlparse(url).netloc: source for source, url in BOARD_BASE_URLS.items()}
+
+    def for_host(self, host):
+        name = self.host_sources.get(host, host)
+        with self.lock:
+            if name not in self.breakers:
+                budget = SOURCE_RETRY_BUDGETS.get(name, DEFAULT_RETRY_BUDGET)
+                self.breakers[name] = CircuitBreaker(name, budget, self.history.get(name))
+            return self.breakers[name]
+
+    def save(self):
+        for name, breaker in self.breakers.items():
+            if breaker.trips:
+                self.history[name] = {"trips": breaker.trips, "open_until": breaker.open_until}
+            else:
+                self.history.pop(name, None)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.history, f, indent=1, sort_keys=True)
+        except OSError as e:
+            print(f"⚠️ Could not save circuit breaker state: {e}")
+
+BREAKERS = CircuitBreakerRegistry(os.path.join(STATE_DIR, "circuit_breakers.json"))
+
+def retry_delay(attempt, response=None):
+    """Exponential backoff with full jitter, stretched to the board's Retry-After when it sends one"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        delay = max(delay, min(RETRY_MAX_DELAY, float(retry_after)))
+    return delay * RATE_LIMIT_SCALE
+
+# ----- Concurrent Fetch Engine -----
+# Politeness budget per host: (seconds between requests, extra random jitter).
+# These match the random.uniform() sleeps each scraper used to do before every request.
+SOURCE_RATE_LIMITS = {
+    "LinkedIn": (3.0, 3.0),
+    "Indeed India": (1.0, 2.0),
+    "Internshala": (2.0, 2.0),
+    "Naukri.com": (2.0, 2.0),
+}
+HOST_RATE_LIMITS = {
+    urlparse(BOARD_BASE_URLS[source]).netloc: (interval * RATE_LIMIT_SCALE, jitter * RATE_LIMIT_SCALE)
+    for source, (interval, jitter) in SOURCE_RATE_LIMITS.items()
+}
+DEFAULT_RATE_LIMIT = (2.0 * RATE_LIMIT_SCALE, 2.0 * RATE_LIMIT_SCALE)
+
+class FetchCancelled(Exception):
+    pass
+
+class TokenBucket:
+    """Token bucket refilled at one token per `interval` seconds, holding at most `capacity` tokens"""
+    def __init__(self, interval, jitter=0.0, capacity=1):
+        self.rate = 1.0 / interval if interval > 0 else float("inf")
+        self.jitter = jitter
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self, cost):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            # A negative balance means earlier callers already hold the next slots
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self, stop_event=None):
+        # The jitter is charged to the bucket too, so the next caller is pushed back by it
+        wait = self._reserve(1 + random.uniform(0, self.jitter) * self.rate)
+        if stop_event is None:
+            if wait > 0:
+                time.sleep(wait)
+        elif stop_event.wait(wait):
+            raise FetchCancelled("source was cancelled while waiting for its rate limit")
+
+    def penalize(self, seconds):
+        self._reserve(seconds * self.rate)
+
+class FetchEngine:
+    """Runs requests concurrently across hosts while each host stays behind its own token bucket"""
+    def __init__(self, workers_per_host=FETCH_WORKERS_PER_HOST):
+        self.workers_per_host = workers_per_host
+        self.buckets = {}
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def _host_state(self, host):
+        with self.lock:
+            if host not in self.buckets:
+                interval, jitter = HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+                self.buckets[host] = TokenBucket(interval, jitter)
+                # One small pool per host so a slow host can't hold the workers another host needs
+                self.pools[host] = ThreadPoolExecutor(max_workers=self.workers_per_host, thread_name_prefix=f"fetch-{host}")
+            return self.buckets[host], self.pools[host]
+
+    def get(self, url, session=None, stop_event=None, use_cache=True, **kwargs):
+        import requests
+        host = urlparse(url).netloc
+        source = HOST_SOURCES.get(host, host)
+        bucket, _ = self._host_state(host)
+        entry = RESPONSE_CACHE.load(url) if use_cache and HTTP_CACHE_ENABLED else None
+        headers = kwargs.get("headers")
+        if entry:
+            kwargs["headers"] = {**(headers or {}), **RESPONSE_CACHE.validators(entry)}
+        if REQUEST_TIMEOUT_SECONDS:
+            kwargs["timeout"] = min(kwargs.get("timeout") or float("inf"), float(REQUEST_TIMEOUT_SECONDS))
+        breaker = BREAKERS.for_host(host)
+        attempt = 0
+        while True:
+            breaker.allow(stop_event)
+            try:
+                bucket.acquire(stop_event)
+                start = time.perf_counter()
+                response = (session or HTTP).get(url, **kwargs)
+            except FetchCancelled:
+                breaker.abandon()
+                raise
+            except requests.RequestException as e:
+                METRICS.observe("request_seconds", time.perf_counter() - start, source=source)
+                METRICS.count("requests_total", source=source, status=type(e).__name__)
+                METRICS.count("errors_total", source=source, stage="fetch")
+                breaker.record_failure(type(e).__name__)
+                if not self._retry(breaker, attempt, url, stop_event):
+                    raise
+                attempt += 1
+                continue
+            METRICS.observe("request_seconds", time.perf_counter() - start, source=source)
+            METRICS.count("requests_total", source=source, status=response.status_code)
+            METRICS.count("response_bytes_total", len(response.content), source=source)
+            if response.status_code in RETRYABLE_STATUSES:
+                breaker.record_failure(f"status {response.status_code}")
+                if self._retry(breaker, attempt, url, stop_event, response):
+                    attempt += 1
+                    continue
+            elif response.status_code in BLOCKED_STATUSES:
+                breaker.record_failure(f"status {response.status_code}")
+            else:
+                breaker.record_success()
+            break
+        response.cache_entry = entry
+        response.not_modified = False
+        if entry and response.status_code == 304:
+            body = RESPONSE_CACHE.load_body(url)
+            if body is not None:
+                # Serve the stored page as if the board had sent it again
+                response.status_code = 200
+                response._content = body
+                response.encoding = entry.get("encoding") or "utf-8"
+                response.not_modified = True
+            else:
+                # The entry outlived its body, so a 304 has nothing to stand for: ask for the page itself
+                print(f"♻️ Cached body for {url[:60]} is gone, fetching it again without validators")
+                return self.get(url, session, stop_event, use_cache=False, **{**kwargs, "headers": headers})
+        if SCRAPER_RECORD_DIR and response.status_code == 200 and not response.not_modified:
+            record_page(url, response.content)
+        return response
+
+    def _retry(self, breaker, attempt, url, stop_event, response=None):
+        """Wait before retrying, if this request and its source still have retries left"""
+        if attempt >= MAX_RETRIES_PER_REQUEST or not breaker.take_retry():
+            return False
+        delay = retry_delay(attempt, response)
+        print(f"🔁 Retrying {url[:60]} in {delay:.1f}s ({breaker.retries_left} retries left for {breaker.name})")
+        if stop_event is None:
+            time.sleep(delay)
+        elif stop_event.wait(delay):
+            raise FetchCancelled("source was cancelled while waiting to retry")
+        return True
+
+    def take_retry(self, host):
+        return BREAKERS.for_host(host).take_retry()
+
+    def backoff(self, host, seconds):
+        bucket, _ = self._host_state(host)
+        bucket.penalize(seconds)
+
+    def run(self, fetch_func, items, host, stop_event=None):
+        """Submit fetch_func(item) for every item and yield (item, future) as each one finishes.
+        Stops early, cancelling whatever hasn't started, once stop_event is set."""
+        _, pool = self._host_state(host)
+
+        def task(item):
+            if stop_event is not None and stop_event.is_set():
+                raise FetchCancelled("source was cancelled before this request started")
+            return fetch_func(item)
+
+        futures = {pool.submit(task, item): item for item in items}
+        try:
+            for future in as_completed(futures):
+                if stop_event is not None and stop_event.is_set():
+                    return
+                if not future.cancelled() and isinstance(future.exception(), CircuitOpen):
+                    # Everything still queued would be refused too
+                    remaining = sum(not f.done() for f in futures)
+                    print(f"⛔ {future.exception()}, skipping {remaining} remaining requests")
+                    return
+                yield futures[future], future
+        finally:
+            for future in futures:
+                future.cancel()
+
+FETCHER = FetchEngine()
+
+def record_page(url, body):
+    directory = os.path.join(SCRAPER_RECORD_DIR, urlparse(url).netloc)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, hashlib.sha1(normalize_url(url).encode()).hexdigest()[:16] + ".html"), "wb") as f:
+            f.write(body)
+    except OSError as e:
+        print(f"⚠️ Could not record {url[:60]}: {e}")
+
+# ----- SMTP Delivery -----
+SMTP_TIMEOUT = 30
+SMTP_MAX_ATTEMPTS = 3
+SMTP_RETRY_BASE_DELAY = 5.0
+SMTP_RETRY_MAX_DELAY = 60.0
+
+class BatchOutcome:
+    """What happened to one batch of recipients"""
+    def __init__(self, number, recipients):
+        self.number = number
+        self.recipients = recipients
+        self.ok = False
+        self.attempts = 0
+        # Still owed the message, and refused for good (5xx) with the server's reason
+        self.pending = list(recipients)
+        self.refused = {}
+        self.error = None
+
+    def settle(self, refused):
+        """Record one accepted transaction: every pending address got it except those `refused`; 5xx
+        refusals are final, 4xx ones ("452 too many recipients", greylisting) stay pending for a retry"""
+        self.refused.update((address, reply) for address, reply in refused.items() if reply[0] >= 500)
+        self.pending = [address for address in self.pending if address in refused and refused[address][0] < 500]
+        self.ok = not self.pending
+        if self.pending:
+            self.error = f"{len(self.pending)} recipients temporarily refused"
+
+    def delivered(self):
+        return len(self.recipients) - len(self.pending) - len(self.refused)
+
+class SmtpDelivery:
+    """Sends a message to recipient batches over a small pool of reused, logged-in SMTP connections"""
+    def __init__(self, connections=SMTP_CONNECTIONS, sends_per_minute=SMTP_SENDS_PER_MINUTE):
+        self.connections = max(1, connections)
+        self.idle = queue.LifoQueue()
+        # The bucket starts full, so the first few batches go out straight away
+        self.rate = TokenBucket(60.0 / sends_per_minute if sends_per_minute > 0 else 0, capacity=self.connections)
+
+    def _connect(self):
+        import smtplib
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if YOUR_EMAIL and YOUR_APP_PASSWORD:
+                server.login(YOUR_EMAIL, YOUR_APP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _discard(self, server):
+        try:
+            server.close()
+        except Exception:
+            pass
+
+    def send_batch(self, message, outcome):
+        """Send to the batch, then retry with backoff whoever is still owed the message: everyone after a
+        failed transaction, only the temporarily refused addresses after a partial one"""
+        import smtplib
+        sender = YOUR_EMAIL or "rohith@randoman.online"
+        for attempt in range(SMTP_MAX_ATTEMPTS):
+            outcome.attempts = attempt + 1
+            self.rate.acquire()
+            server = None
+            try:
+                server = self._acquire()
+                outcome.settle(server.sendmail(sender, outcome.pending, message))
+                self.idle.put(server)
+            except smtplib.SMTPRecipientsRefused as e:
+                # Nobody was accepted; each address's own code says whether it is worth another try
+                outcome.settle(e.recipients)
+                self.idle.put(server)
+            except smtplib.SMTPAuthenticationError as e:
+                outcome.error = e
+                return outcome
+            except (smtplib.SMTPException, OSError) as e:
+                outcome.error = e
+                if server is not None:
+                    self._discard(server)
+                permanent = isinstance(e, smtplib.SMTPResponseException) and 500 <= e.smtp_code < 600
+                if permanent:
+                    return outcome
+            if outcome.ok or attempt + 1 == SMTP_MAX_ATTEMPTS:
+                return outcome
+            delay = random.uniform(0, min(SMTP_RETRY_MAX_DELAY, SMTP_RETRY_BASE_DELAY * 2 ** attempt))
+            print(f"🔁 Batch {outcome.number} failed ({outcome.error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+        return outcome
+
+    def deliver(self, message, recipients, batch_size=SMTP_BATCH_SIZE):
+        """Send `message` to everyone, batch_size recipients per SMTP transaction; returns a BatchOutcome per batch"""
+        batches = [BatchOutcome(n + 1, recipients[i:i + batch_size]) for n, i in enumerate(range(0, len(recipients), batch_size))]
+        with ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="smtp") as pool:
+            outcomes = list(pool.map(lambda outcome: self.send_batch(message, outcome), batches))
+        for outcome in outcomes:
+            METRICS.count("smtp_batches_total", outcome="ok" if outcome.ok else "failed")
+            METRICS.count("smtp_attempts_total", outcome.attempts)
+            METRICS.count("smtp_recipients_total", outcome.delivered())
+            if outcome.ok:
+                refused = f", {len(outcome.refused)} refused" if outcome.refused else ""
+                print(f"📨 Batch {outcome.number}/{len(outcomes)}: {len(outcome.recipients)} recipients, sent on attempt {outcome.attempts}{refused}")
+            else:
+                print(f"❌ Batch {outcome.number}/{len(outcomes)}: {len(outcome.recipients)} recipients, {len(outcome.pending)} still owed it "
+                      f"after {outcome.attempts} attempts: {outcome.error}")
+        return outcomes
+
+    def close(self):
+        while True:
+            try:
+                server = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                server.quit()
+            except Exception:
+                self._discard(server)
+
+SMTP_DELIVERY = SmtpDelivery()
+
+# ----- HTML Parser Backend -----
+def card_strainer(tag_names, classes=(), attributes=()):
+    """SoupStrainer that only builds elements which look like job-card containers (plus their contents)"""
+    tag_names = frozenset(tag_names)
+    classes = frozenset(classes)
+    attributes = tuple(attributes)
+
+    def is_card(name, attrs):
+        if name not in tag_names:
+            return False
+        # The builder hands over raw attributes here, so class is still one space-separated string
+        if classes and not classes.isdisjoint(str(attrs.get("class", "")).split()):
+            return True
+        return any(attr in attrs for attr in attributes)
+
+    from bs4 import SoupStrainer
+    return SoupStrainer(is_card)
+
+# Card containers per source, covering every card selector its parser tries
+CARD_CONTAINERS = {
+    "LinkedIn": dict(tag_names=("div", "li"), classes=("job-search-card", "result-card", "base-search-card__info"), attributes=("data-entity-urn",)),
+    "Indeed India": dict(tag_names=("div",), classes=("job_seen_beacon", "slider_container", "result"), attributes=("data-result-id",)),
+    "Internshala": dict(tag_names=("div",), classes=("individual_internship", "internship_meta"), attributes=("internshipid",)),
+    "Naukri.com": dict(tag_names=("div",), classes=("jobTuple",)),
+}
+# Built on first use, so only stages that parse pages import bs4
+CARD_STRAINERS = {}
+
+def make_soup(html, source=None):
+    """Parse a page with the fast backend, keeping only the source's job cards when we know what they look like"""
+    from bs4 import BeautifulSoup
+    parse_only = None
+    if CARD_SCOPED_PARSING and source in CARD_CONTAINERS:
+        if source not in CARD_STRAINERS:
+            CARD_STRAINERS[source] = card_strainer(**CARD_CONTAINERS[source])
+        parse_only = CARD_STRAINERS[source]
+    if HTML_PARSER != "html.parser":
+        try:
+            return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+        except Exception as e:
+            print(f"⚠️ {HTML_PARSER} parser failed ({e}), falling back to html.parser")
+    return BeautifulSoup(html, "html.parser", parse_only=parse_only)
+
+# ----- Adaptive Selector Cascades -----
+# How many past runs of hit counts are kept to rank selectors
+SELECTOR_HISTORY_RUNS = 5
+
+class Selector:
+    """Arguments for one soup.find()/find_all() attempt"""
+    def __init__(self, name, label=None, **kwargs):
+        self.name = name
+        self.kwargs = kwargs
+        if label is None:
+            label = name
+            if "class_" in kwargs:
+                label += "." + ".".join(kwargs["class_"].split())
+            for attr, value in kwargs.get("attrs", {}).items():
+                label += f"[{attr}]" if value is True else f"[{attr}={value}]"
+        self.label = label
+
+class SelectorCascade:
+    """Fallback selectors for one card or field, tried in order of how often they matched on recent runs"""
+    def __init__(self, key, selectors, history):
+        self.key = key
+        self.selectors = selectors
+        self.hits = {selector.label: 0 for selector in selectors}
+        self.misses = 0
+        self.seconds = 0.0
+        self.drifted = False
+        self.rank(history)
+
+    def rank(self, history):
+        recent = {}
+        for run in history:
+            for label, count in run.items():
+                recent[label] = recent.get(label, 0) + count
+        # Stable sort, so selectors that never matched keep their declared order
+        self.order = sorted(self.selectors, key=lambda selector: -recent.get(selector.label, 0))
+        self.expected = self.order[0].label if recent.get(self.order[0].label) else None
+
+    def _first(self, node, method):
+        start = time.perf_counter()
+        try:
+            for selector in self.order:
+                found = getattr(node, method)(selector.name, **selector.kwargs)
+                if found:
+                    self.hits[selector.label] += 1
+                    if self.expected and selector.label != self.expected and not self.drifted:
+                        self.drifted = True
+                        print(f"⚠️ Selector drift in {self.key}: '{self.expected}' stopped matching, '{selector.label}' matched instead")
+                    return found
+            self.misses += 1
+            return None
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def reset(self):
+        self.hits = dict.fromkeys(self.hits, 0)
+        self.misses = 0
+        self.seconds = 0.0
+
+    def find(self, node):
+        return self._first(node, "find")
+
+    def find_all(self, node):
+        found = self._first(node, "find_all") or []
+        METRICS.saw_cards(len(found))
+        return found
+
+class SelectorRegistry:
+    """Per-source selector cascades whose hit statistics persist between runs"""
+    def __init__(self, path):
+        self.path = path
+        self.cascades = {}
+        try:
+            with open(path) as f:
+                self.history = json.load(f)
+        except (OSError, ValueError):
+            self.history = {}
+
+    def cascade(self, key, *selectors):
+        runs = self.history.get(key, {}).get("runs", [])
+        self.cascades[key] = SelectorCascade(key, list(selectors), runs)
+        return self.cascades[key]
+
+    def load(self, path):
+        """Switch to another stats file (a shard's own), re-ranking the cascades declared so far from it"""
+        self.path = path
+        try:
+            with open(path) as f:
+                self.history = json.load(f)
+        except (OSError, ValueError):
+            self.history = {}
+        for key, cascade in self.cascades.items():
+            cascade.rank(self.history.get(key, {}).get("runs", []))
+
+    def save(self):
+        for key, cascade in self.cascades.items():
+            if not any(cascade.hits.values()) and not cascade.misses:
+                continue  # Not used this run (e.g. the source was skipped)
+            entry = self.history.setdefault(key, {})
+            entry["runs"] = (entry.get("runs", []) + [{label: n for label, n in cascade.hits.items() if n}])[-SELECTOR_HISTORY_RUNS:]
+            entry["misses"] = cascade.misses
+            if cascade.expected and not cascade.hits[cascade.expected]:
+                print(f"⚠️ Selector {key} '{cascade.expected}' matched nothing this run, the page layout may have changed")
+                entry["stale_winner"] = cascade.expected
+            else:
+                entry.pop("stale_winner", None)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.history, f, indent=1, sort_keys=True)
+        except OSError as e:
+            print(f"⚠️ Could not save selector statistics: {e}")
+
+SELECTORS = SelectorRegistry(os.path.join(STATE_DIR, "selector_stats.json"))
+
+# ----- Job Identity & Seen-Jobs Store -----
+# Query parameters that are part of a job link's identity; everything else is tracking
+CANONICAL_QUERY_PARAMS = {
+    urlparse(BOARD_BASE_URLS["Indeed India"]).netloc: ("jk",),
+}
+# Numeric posting id at the end of a job path (LinkedIn /jobs/view/...-123, Internshala detail, Naukri listing)
+TRAILING_JOB_ID = re.compile(r"(\d{6,})/?$")
+
+def canonical_url(url):
+    """Job link with tracking parameters and fragments removed, the same way for every source"""
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    keep = CANONICAL_QUERY_PARAMS.get(host, ())
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query) if key in keep])
+    return urlunsplit((parts.scheme.lower(), host, parts.path, query, ""))
+
+def id_from_path(url):
+    match = TRAILING_JOB_ID.search(urlsplit(url).path)
+    return match.group(1) if match else None
+
+def make_job_id(source_prefix, raw_id):
+    return f"{source_prefix}:{raw_id}" if raw_id else None
+
+class SeenJobsStore:
+    """SQLite record of every job already emailed, so each digest only carries new postings"""
+    def __init__(self, path, read_only=False):
+        self.read_only = read_only
+        if read_only:
+            # A shard's view of what the merge already emailed; shards run side by side and never write
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_jobs (
+                job_key TEXT PRIMARY KEY,
+                title TEXT,
+                company TEXT,
+                source TEXT,
+                link TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_jobs_last_seen ON seen_jobs (last_seen)")
+        # Personalised digests: who got which job. A job only goes into seen_jobs once every recipient whose
+        # filters pick it has it, so one subscriber getting it doesn't use it up for another
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sent_to (
+                job_key TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                sent_at TEXT NOT NULL,
+                PRIMARY KEY (job_key, recipient)
+            )""")
+        self.conn.commit()
+
+    def is_new(self, job, now):
+        """True if the job was never emailed; a posting that is still up gets its last_seen refreshed"""
+        key = job.identity
+        if self.conn.execute("SELECT 1 FROM seen_jobs WHERE job_key = ?", (key,)).fetchone():
+            if not self.read_only:
+                self.conn.execute("UPDATE seen_jobs SET last_seen = ? WHERE job_key = ?", (now, key))
+            return False
+        return True
+
+    def remember(self, jobs):
+        now = RUN_STARTED.isoformat(timespec="seconds")
+        self.conn.executemany(
+            "INSERT INTO seen_jobs (job_key, title, company, source, link, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (job_key) DO UPDATE SET last_seen = excluded.last_seen",
+            [(job.identity, job.title, job.company, job.source, job.link, now, now) for job in jobs])
+        self.conn.commit()
+
+    def remember_sent(self, deliveries):
+        """Record (job, recipient) pairs that went out in personalised digests"""
+        now = RUN_STARTED.isoformat(timespec="seconds")
+        self.conn.executemany(
+            "INSERT INTO sent_to (job_key, recipient, sent_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (job_key, recipient) DO UPDATE SET sent_at = excluded.sent_at",
+            [(job.identity, recipient, now) for job, recipient in deliveries])
+        self.conn.commit()
+
+    def received(self, jobs):
+        """{identity: recipients} of which of these jobs each recipient already got in a personalised digest"""
+        keys = sorted({job.identity for job in jobs})
+        received = defaultdict(set)
+        # Chunked to stay under SQLite's limit on query parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(f"SELECT job_key, recipient FROM sent_to WHERE job_key IN ({', '.join('?' * len(chunk))})", chunk)
+            for key, recipient in rows:
+                received[key].add(recipient)
+        return received
+
+    def expire(self, retention_days=SEEN_RETENTION_DAYS):
+        cutoff = datetime.fromtimestamp(time.time() - retention_days * 86400).isoformat(timespec="seconds")
+        removed = self.conn.execute("DELETE FROM seen_jobs WHERE last_seen < ?", (cutoff,)).rowcount
+        self.conn.execute("DELETE FROM sent_to WHERE sent_at < ?", (cutoff,))
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+# ----- Near-Duplicate Detection -----
+# Sort order for the digest; also decides which copy of a cross-posted job is kept
+SOURCE_PRIORITY = {"LinkedIn": 1, "Indeed India": 2, "Internshala": 3, "Naukri.com": 4, "Sample Data": 5}
+MINHASH_PERMUTATIONS = 64
+MERSENNE_PRIME = (1 << 61) - 1
+_minhash_rng = random.Random(1729)
+MINHASH_PARAMS = [(_minhash_rng.randrange(1, MERSENNE_PRIME), _minhash_rng.randrange(MERSENNE_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+# Words that differ between boards' spellings of the same employer
+COMPANY_NOISE_WORDS = frozenset([
+    "pvt", "private", "ltd", "limited", "llp", "inc", "india", "co", "company", "corp", "corporation",
+    "technologies", "technology", "tech", "solutions", "services", "software", "labs", "the",
+])
+# Company-name 3-gram Jaccard two near-duplicates must also reach ("Infosys" vs "Infosys BPM" passes, "CRED" vs "Meesho" doesn't)
+COMPANY_MATCH_THRESHOLD = 0.5
+CITY_ALIASES = {"bengaluru": "bangalore", "gurugram": "gurgaon", "new delhi": "delhi", "bombay": "mumbai"}
+
+def _words(text):
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+def company_grams(job):
+    words = _words(job.company_key)
+    company = "".join(word for word in words if word not in COMPANY_NOISE_WORDS) or "".join(words)
+    return _grams(company)
+
+def job_shingles(job):
+    """Character 3-grams of title, company and city, tagged so they can't collide across fields"""
+    title = " ".join(_words(job.title_key))
+    city = " ".join(_words(job.location.split(",")[0]))
+    city = CITY_ALIASES.get(city, city)
+    shingles = {"t:" + gram for gram in _grams(title)}
+    shingles.update("c:" + gram for gram in company_grams(job))
+    shingles.update("l:" + gram for gram in _grams(city))
+    return shingles
+
+def minhash_signature(shingles):
+    hashes = [struct.unpack("<Q", hashlib.blake2b(shingle.encode(), digest_size=8).digest())[0] for shingle in shingles]
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in MINHASH_PARAMS)
+
+def lsh_shape(permutations, threshold):
+    """Bands x rows whose LSH S-curve threshold (1/b)^(1/r) is closest to the similarity threshold"""
+    shapes = [(bands, permutations // bands) for bands in range(1, permutations + 1) if permutations % bands == 0]
+    return min(shapes, key=lambda shape: abs((1 / shape[0]) ** (1 / shape[1]) - threshold))
+
+class NearDuplicateIndex:
+    """MinHash signatures bucketed by LSH bands, so each new job is only compared with likely matches"""
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_shape(MINHASH_PERMUTATIONS, threshold)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = []
+        self.companies = []
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows] for band in range(self.bands)]
+
+    def find(self, signature, company):
+        candidates = set()
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        for candidate in sorted(candidates):
+            other = self.signatures[candidate]
+            if sum(x == y for x, y in zip(signature, other)) / MINHASH_PERMUTATIONS < self.threshold:
+                continue
+            # A shared title and city outweighs the company name, so the companies have to agree on their own too
+            other_company = self.companies[candidate]
+            if len(company & other_company) / len(company | other_company) >= COMPANY_MATCH_THRESHOLD:
+                return candidate
+        return None
+
+    def add(self, signature, company):
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        self.companies.append(company)
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(position)
+        return position
+
+# ----- Streaming Digest Pipeline -----
+class DigestPipeline:
+    """Dedup -> rank -> select over jobs as the scrapers produce them, keeping the best-ranked copy of each
+    posting. Also knows when a source can no longer place anything in the digest, so it can stop fetching."""
+    def __init__(self, seen_store=None, size=DIGEST_SIZE, threshold=NEAR_DUPLICATE_THRESHOLD, early_stop=True):
+        self.seen_store = seen_store
+        self.size = size
+        # Personalised digests can each need different jobs, so nobody can be stopped early for them
+        self.early_stop = early_stop
+        self.index = NearDuplicateIndex(threshold)
+        # One entry per distinct posting, in arrival order; positions match the near-duplicate index
+        self.kept = []
+        self.new = []
+        # Whether any copy merged into the posting was emailed before
+        self.emailed = []
+        self.by_identity = {}
+        self.new_by_priority = Counter()
+        self.received = 0
+        self.now = RUN_STARTED.isoformat(timespec="seconds")
+
+    def add(self, job):
+        self.received += 1
+        key = job.identity
+        position = self.by_identity.get(key)
+        if position is None:
+            signature = minhash_signature(job_shingles(job))
+            company = company_grams(job)
+            position = self.index.find(signature, company)
+            if position is None:
+                self.by_identity[key] = self.index.add(signature, company)
+                self.kept.append(None)
+                self.new.append(False)
+                self.emailed.append(False)
+                self._check_seen(len(self.kept) - 1, job)
+                self._place(len(self.kept) - 1, job)
+                return
+            kept = self.kept[position]
+            better, worse = (job, kept) if self._priority(job) < self._priority(kept) else (kept, job)
+            print(f"🔁 Near-duplicate: {worse.title} at {worse.company} ({worse.source}) ~ {better.title} at {better.company} ({better.source})")
+        self.by_identity[key] = position
+        self._check_seen(position, job)
+        # Placing the kept copy again picks up a seen copy that ranked below it
+        self._place(position, job if self._priority(job) < self._priority(self.kept[position]) else self.kept[position])
+
+    def _priority(self, job):
+        return SOURCE_PRIORITY.get(job.source, 6)
+
+    def _place(self, position, job):
+        if self.new[position]:
+            self.new_by_priority[self._priority(self.kept[position])] -= 1
+        self.kept[position] = job
+        self.new[position] = not self.emailed[position]
+        if self.new[position]:
+            self.new_by_priority[self._priority(job)] += 1
+
+    def _check_seen(self, position, job):
+        """A posting was already emailed if any of its copies was, whichever copy survives"""
+        if self.seen_store and not self.seen_store.is_new(job, self.now):
+            self.emailed[position] = True
+
+    def cutoff(self):
+        """Lowest priority level whose new jobs (with everything ranked above them) already fill the digest"""
+        total = 0
+        for priority in sorted(self.new_by_priority):
+            total += self.new_by_priority[priority]
+            if total >= self.size:
+                return priority
+        return None
+
+    def wants(self, priority):
+        if not self.early_stop:
+            return True
+        # Anything at or below the cutoff would rank behind a full digest
+        cutoff = self.cutoff()
+        return cutoff is None or priority < cutoff
+
+    def new_count(self):
+        return sum(self.new)
+
+    def settled(self, selected):
+        """Identities (every merged copy's) of the postings going out in `selected` or emailed before"""
+        going_out = {id(job) for job in selected}
+        return {identity for identity, position in self.by_identity.items()
+                if not self.new[position] or id(self.kept[position]) in going_out}
+
+    def selected(self, size=None):
+        new_jobs = [job for job, new in zip(self.kept, self.new) if new]
+        return sorted(new_jobs, key=self._priority)[:size or self.size]
+
+# ----- Query Planning -----
+# Requests a source may make per run. Each run takes the keyword x location pairs that were searched
+# least recently, so successive runs sweep the whole matrix without any one run fetching more.
+SOURCE_QUERY_BUDGETS = {
+    "LinkedIn": 24,
+    "Indeed India": 48,
+}
+DEFAULT_QUERY_BUDGET = 24
+# Window the coverage line reports on (the workflow runs every 6 hours)
+QUERY_COVERAGE_WINDOW = 24 * 3600
+# A search whose results were at least this much contained in a broader search's is merged into it:
+# it isn't run while that measurement is fresh, and the broader search gets another page instead
+QUERY_OVERLAP_THRESHOLD = 0.8
+QUERY_OVERLAP_MAX_AGE = 7 * 24 * 3600
+MAX_SEARCH_PAGES = 4
+# Stale cards in a row that end a page: boards pin promoted cards above the date-sorted results, so a
+# single card older than the watermark doesn't mean the rest of the page is old
+WATERMARK_STALE_CARDS = 3
+# Runs of unique-jobs-per-request kept per source
+QUERY_EFFICIENCY_RUNS = 20
+# "2 hours ago", "30+ days ago", "Posted 1 week ago"
+RELATIVE_POSTED = re.compile(r"(\d+)\+?\s*(minute|min|hour|hr|day|week|month)s?\s+ago")
+POSTED_UNITS = {"minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400}
+
+def result_key(job):
+    return hashlib.sha1(job.identity.encode()).hexdigest()[:12]
+
+def in_shard(*search):
+    """Whether this shard crawls `search`; a stable hash of it, so every shard agrees without coordinating"""
+    if SHARD_COUNT == 1:
+        return True
+    return int.from_bytes(hashlib.sha1("|".join(search).encode()).digest()[:4], "big") % SHARD_COUNT == SHARD_INDEX
+
+def posted_at(text, stamp=None, now=None):
+    """(earliest, latest) a card could have been posted, from its relative text ("5 hours ago") and/or a
+    datetime attribute ("2024-05-01"), or None when neither says"""
+    now = now or RUN_STARTED
+    text = (text or "").lower()
+    window = None
+    match = RELATIVE_POSTED.search(text)
+    if match:
+        count, unit = int(match.group(1)), POSTED_UNITS[match.group(2)]
+        # "30+ days ago" could be any time before that
+        earliest = now - timedelta(days=365) if "+" in match.group(0) else now - timedelta(seconds=(count + 1) * unit)
+        window = (earliest, now - timedelta(seconds=count * unit))
+    elif "just" in text or "today" in text:
+        window = (now.replace(hour=0, minute=0, second=0, microsecond=0), now)
+    elif "yesterday" in text:
+        window = (now - timedelta(days=2), now - timedelta(days=1))
+    if stamp:
+        try:
+            day = datetime.fromisoformat(stamp[:10])
+        except ValueError:
+            return window
+        dated = (day, day + timedelta(days=1))
+        if window is None:
+            return dated
+        # Keep the narrower of the two where they agree; when they don't, the text was rendered with the page
+        both = (max(window[0], dated[0]), min(window[1], dated[1]))
+        if both[0] <= both[1]:
+            return both
+    return window
+
+def posting_fields(posted):
+    """The job's "date" (the latest day it could have been posted) and "posted" (the earliest time, for watermarks)"""
+    if not posted:
+        return {}
+    return {"date": posted[1].strftime('%Y-%m-%d'), "posted": posted[0].isoformat(timespec="minutes")}
+
+class QueryPlanner:
+    """Stalest-first rotation through each source's keyword x location matrix, with overlapping searches
+    merged into broader ones that page deeper instead; remembered between runs"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = Counter()
+        self.unique = defaultdict(set)
+        # Newest posting each search had seen before this run; searches that got back to it this run
+        self.watermarks = {}
+        # {(source, search): {identity: posted}} for every dated card parsed this run
+        self.posted = defaultdict(dict)
+        self.caught_up = set()
+        self.just_caught_up = set()
+        try:
+            with open(path) as f:
+                self.history = json.load(f)
+        except (OSError, ValueError):
+            self.history = {}
+
+    def _key(self, keyword, location):
+        return f"{keyword} | {location}"
+
+    def merged(self, results):
+        """{search: broader search} for every search whose last results the broader one mostly contained"""
+        fresh = {key: set(result["jobs"]) for key, result in results.items()
+                 if result["jobs"] and result["at"] > time.time() - QUERY_OVERLAP_MAX_AGE}
+        searches_with = defaultdict(list)
+        for key, jobs in fresh.items():
+            for job in jobs:
+                searches_with[job].append(key)
+        merged = {}
+        # Broadest first, so results are merged into the search that covers them best
+        for key in sorted(fresh, key=lambda key: (-len(fresh[key]), key)):
+            shared = Counter(other for job in fresh[key] for other in searches_with[job] if other != key)
+            for other, count in shared.most_common():
+                if count < QUERY_OVERLAP_THRESHOLD * len(fresh[key]):
+                    break
+                if other not in merged and len(fresh[other]) >= len(fresh[key]):
+                    merged[key] = other
+                    break
+        return merged
+
+    def plan(self, source, keywords, locations, budget=None):
+        """This run's (keyword, location, page) requests: never-run and least recently run searches first,
+        ties going to searches a stopped run planned but never completed, then from where the last run stopped;
+        broad searches are paged once for each search merged into them"""
+        budget = budget or SOURCE_QUERY_BUDGETS.get(source, DEFAULT_QUERY_BUDGET)
+        searches = [(keyword, location) for keyword in keywords for location in locations if in_shard(source, keyword, location)]
+        if not searches:
+            return []
+        keys = {self._key(*search) for search in searches}
+        with self.lock:
+            entry = self.history.setdefault(source, {})
+            # Pairs dropped from the keyword or location lists are forgotten
+            last_run = {key: at for key, at in entry.get("last_run", {}).items() if key in keys}
+            results = {key: result for key, result in entry.get("results", {}).items() if key in keys}
+            pending = {key for key in entry.get("pending", []) if key in keys}
+            entry["watermarks"] = {key: at for key, at in entry.get("watermarks", {}).items() if key in keys}
+            self.watermarks[source] = {key: datetime.fromisoformat(at) for key, at in entry["watermarks"].items()}
+            merged = self.merged(results)
+            absorbed = Counter(merged.values())
+            cursor = entry.get("cursor", 0) % len(searches)
+            rotated = [search for search in searches[cursor:] + searches[:cursor] if self._key(*search) not in merged]
+            requests = []
+            taken = 0
+            stalest = lambda search: (last_run.get(self._key(*search), 0), self._key(*search) not in pending)
+            for keyword, location in sorted(rotated, key=stalest):
+                if len(requests) >= budget:
+                    break
+                result = results.get(self._key(keyword, location), {})
+                # No deeper than the last page that still returned jobs
+                pages = min(1 + absorbed[self._key(keyword, location)], result.get("pages", MAX_SEARCH_PAGES), MAX_SEARCH_PAGES)
+                requests.extend((keyword, location, page) for page in range(max(1, pages)))
+                taken += 1
+                pending.add(self._key(keyword, location))
+            requests = requests[:budget]
+            entry["last_run"] = last_run
+            entry["results"] = results
+            entry["cursor"] = (cursor + taken) % len(searches)
+            # Cleared by done(); whatever is left when the run stops goes first among its ties next run
+            entry["pending"] = sorted(pending)
+            recent = sum(1 for at in last_run.values() if at > time.time() - QUERY_COVERAGE_WINDOW)
+        never = sum(1 for keyword, location, page in requests if not page and self._key(keyword, location) not in last_run)
+        print(f"🗓️ {source}: {len(requests)} requests for {taken} of {len(searches)} searches this run ({never} never run before, "
+              f"{len(merged)} merged into broader ones), {recent} searched in the last {QUERY_COVERAGE_WINDOW // 3600}h")
+        return requests
+
+    def watermark(self, source, keyword, location):
+        """Newest posting this search had seen before this run; date-sorted results stop being new past it"""
+        if not INCREMENTAL_CRAWL:
+            return None
+        with self.lock:
+            return self.watermarks.get(source, {}).get(self._key(keyword, location))
+
+    def reached_watermark(self, source, keyword, location):
+        """Called when a search got back to its watermark: a parser stopped at old cards, or a page came back
+        unchanged since a parse that did"""
+        with self.lock:
+            self.caught_up.add((source, self._key(keyword, location)))
+            self.just_caught_up.add((source, self._key(keyword, location)))
+
+    def is_caught_up(self, source, keyword, location):
+        """Whether an earlier page already got back to the watermark, so deeper pages have nothing new"""
+        with self.lock:
+            return (source, self._key(keyword, location)) in self.caught_up
+
+    def done(self, source, search, jobs=None):
+        """Record what one search page gave. Only searches that came back OK (jobs is a list) count as run;
+        failed ones stay stale and go first next run."""
+        keyword, location, page = search
+        key = self._key(keyword, location)
+        with self.lock:
+            if jobs is None:
+                return
+            found = {result_key(job) for job in jobs}
+            self.unique[source] |= found
+            entry = self.history.setdefault(source, {})
+            entry.setdefault("last_run", {})[key] = round(time.time())
+            if key in entry.get("pending", []):
+                entry["pending"].remove(key)
+            result = entry.setdefault("results", {}).get(key)
+            if not result or (result["at"] < self.started and found):
+                # First jobs this search returned this run: start a fresh measurement (a search that was
+                # already caught up keeps its last one)
+                result = entry["results"][key] = {"at": round(time.time()), "jobs": [], "pages": MAX_SEARCH_PAGES}
+            result["jobs"] = sorted(set(result["jobs"]) | found)
+            # Pages are parsed one at a time, so a watermark reached just now was reached on this page
+            if (source, key) in self.just_caught_up:
+                self.just_caught_up.discard((source, key))
+                result["pages"] = min(result["pages"], page + 1)
+            elif not jobs:
+                result["pages"] = min(result["pages"], max(1, page))
+            self.posted[(source, key)].update((job.identity, job.posted) for job in jobs if job.posted)
+
+    def requested(self, source):
+        """Count a request the board answered, whether or not its page gets used (an early stop or the
+        deadline can throw it away before done())"""
+        with self.lock:
+            self.requests[source] += 1
+
+    def advance_watermarks(self, settled):
+        """Move each search's watermark up to the newest posting it returned this run, but never past one
+        that isn't `settled` (going out in this digest or emailed before), so the next run parses it again"""
+        with self.lock:
+            for (source, key), posted in self.posted.items():
+                held_back = [at for identity, at in posted.items() if identity not in settled]
+                watermarks = self.history.setdefault(source, {}).setdefault("watermarks", {})
+                watermarks[key] = max(watermarks.get(key, ""), min(held_back) if held_back else max(posted.values()))
+
+    def export_posted(self):
+        """{source: {search: {identity: posted}}}, what a shard hands the merge to move its watermarks with"""
+        with self.lock:
+            exported = {}
+            for (source, key), posted in self.posted.items():
+                exported.setdefault(source, {})[key] = dict(posted)
+            return exported
+
+    def import_posted(self, exported):
+        with self.lock:
+            for source, searches in exported.items():
+                for key, posted in searches.items():
+                    self.posted[(source, key)].update(posted)
+
+    def adopt_watermarks(self, path):
+        """Take the watermarks the last merge saved to its own plan at `path`, where they're newer than ours"""
+        try:
+            with open(path) as f:
+                merged = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for source, entry in merged.items():
+                watermarks = self.history.setdefault(source, {}).setdefault("watermarks", {})
+                for key, at in entry.get("watermarks", {}).items():
+                    watermarks[key] = max(watermarks.get(key, ""), at)
+
+    def summary(self):
+        with self.lock:
+            parts = []
+            for source in sorted(self.requests):
+                unique = len(self.unique[source])
+                parts.append(f"{source} {unique} unique jobs from {self.requests[source]} requests "
+                             f"({unique / self.requests[source]:.1f} per request)")
+            return ", ".join(parts) or "no searches"
+
+    def save(self):
+        with self.lock:
+            for source, requests in self.requests.items():
+                entry = self.history.setdefault(source, {})
+                run = {"requests": requests, "unique": len(self.unique[source])}
+                entry["efficiency"] = (entry.get("efficiency", []) + [run])[-QUERY_EFFICIENCY_RUNS:]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self.lock, open(self.path, "w") as f:
+                json.dump(self.history, f, indent=1, sort_keys=True)
+        except OSError as e:
+            print(f"⚠️ Could not save the query plan: {e}")
+
+QUERY_PLANNER = QueryPlanner(os.path.join(STATE_DIR, "query_schedule.json"))
+
+def fetch_by_depth(fetch_func, searches, host, stop_event=None):
+    """FETCHER.run over one page depth at a time, so a search's next page is only fetched once the one
+    before it was parsed; one that caught up with its watermark there isn't paged any deeper"""
+    for page in sorted({search[2] for search in searches}):
+        if stop_event is not None and stop_event.is_set():
+            return
+        yield from FETCHER.run(fetch_func, [search for search in searches if search[2] == page], host, stop_event)
 
 # ----- Scrape LinkedIn Jobs -----
-def scrape_linkedin():
+# Multiple selector strategies for LinkedIn job cards and fields
+LINKEDIN_CARDS = SELECTORS.cascade("LinkedIn.cards",
+    Selector("div", class_="base-card relative w-full hover:no-underline focus:no-underline base-card--link base-search-card base-search-card--link job-search-card"),
+    Selector("div", class_="job-search-card"),
+    Selector("div", attrs={"data-entity-urn": True}),
+    Selector("li", class_="result-card job-result-card result-card--with-hover-state"),
+    Selector("div", class_="base-search-card__info"),
+)
+LINKEDIN_TITLE = SELECTORS.cascade("LinkedIn.title",
+    Selector("h3", class_="base-search-card__title"),
+    Selector("a", class_="base-card__full-link"),
+    Selector("h4", class_="base-search-card__title"),
+    Selector("span", attrs={"aria-hidden": "true"}),
+    Selector("a", attrs={"data-tracking-control-name": "public_jobs_jserp-result_search-card"}),
+)
+LINKEDIN_COMPANY = SELECTORS.cascade("LinkedIn.company",
+    Selector("h4", class_="base-search-card__subtitle"),
+    Selector("a", class_="hidden-nested-link"),
+    Selector("span", class_="job-search-card__subtitle-link"),
+    Selector("h4", class_="base-search-card__subtitle-link"),
+)
+LINKEDIN_LOCATION = SELECTORS.cascade("LinkedIn.location",
+    Selector("span", class_="job-search-card__location"),
+    Selector("span", class_="base-search-card__metadata"),
+    Selector("div", class_="base-search-card__metadata"),
+)
+LINKEDIN_LINK = SELECTORS.cascade("LinkedIn.link",
+    Selector("a", class_="base-card__full-link"),
+    Selector("a", attrs={"data-tracking-control-name": "public_jobs_jserp-result_search-card"}),
+)
+LINKEDIN_DATE = SELECTORS.cascade("LinkedIn.date",
+    Selector("time", class_="job-search-card__listdate"),
+    Selector("time", class_="job-search-card__listdate--new"),
+    Selector("span", class_="job-search-card__listdate"),
+)
+
+# Cards on one page of LinkedIn's results; deeper pages start this far apart
+LINKEDIN_PAGE_SIZE = 25
+# Cards taken from a search that isn't paged deeper; a paged search takes whole pages so none are skipped
+LINKEDIN_CARDS_PER_SEARCH = 8
+
+def parse_linkedin_page(html, keyword, location, url, watermark=None):
+    jobs = []
+    soup = make_soup(html, "LinkedIn")
+
+    job_cards = LINKEDIN_CARDS.find_all(soup)
+
+    print(f"Found {len(job_cards)} job cards for {keyword} in {location}")
+
+    stale = 0
+    for job in job_cards:
+        try:
+            # Extract job title, company and location
+            title_element = LINKEDIN_TITLE.find(job)
+            company_element = LINKEDIN_COMPANY.find(job)
+            location_element = LINKEDIN_LOCATION.find(job)
+
+            # Extract job link
+            link_element = (
+                LINKEDIN_LINK.find(job) or
+                title_element.find("a") if title_element else None
+            )
+
+            # Extract posting date; results are newest first, so a run of cards older than the newest
+            # posting this search has already seen means the rest of the page is old too
+            date_element = LINKEDIN_DATE.find(job)
+            posted = posted_at(date_element.get_text(" ", strip=True), date_element.get("datetime")) if date_element else None
+            if watermark and posted and posted[1] < watermark:
+                stale += 1
+                if stale >= WATERMARK_STALE_CARDS:
+                    print(f"⏹️ Caught up with {keyword} in {location}, skipping the older cards")
+                    QUERY_PLANNER.reached_watermark("LinkedIn", keyword, location)
+                    break
+                continue
+            if posted:
+                stale = 0
+
+            if title_element:
+                # Clean up title
+                if hasattr(title_element, 'get_text'):
+                    title = title_element.get_text(strip=True)
+                elif title_element.find('span'):
+                    title = title_element.find('span').get_text(strip=True)
+                else:
+                    title = str(title_element.get('title', '')).strip()
+
+                # Skip if title is empty or too generic
+                if not title or len(title) < 5:
+                    continue
+
+                # Extract company name
+                if company_element:
+                    if hasattr(company_element, 'get_text'):
+                        company = company_element.get_text(strip=True)
+                    else:
+                        company = str(company_element).strip()
+                else:
+                    company = "Company Not Listed"
+
+                # Extract location
+                if location_element:
+                    job_location = location_element.get_text(strip=True)
+                    # Clean up location text
+                    job_location = re.sub(r'\s+', ' ', job_location)
+                else:
+                    job_location = location
+
+                # Build proper LinkedIn job URL
+                if link_element and link_element.get('href'):
+                    href = link_element.get('href')
+                    if href.startswith('/'):
+                        job_link = f"{BOARD_BASE_URLS['LinkedIn']}{href}"
+                    else:
+                        job_link = href
+
+                    # Clean LinkedIn tracking parameters
+                    job_link = canonical_url(job_link)
+                else:
+                    job_link = url  # Fallback to search URL
+
+                # LinkedIn job id, from the card's urn:li:jobPosting:<id> or the /jobs/view/...-<id> link
+                urn = job.get("data-entity-urn", "")
+                job_id = make_job_id("linkedin", urn.rsplit(":", 1)[-1] if urn else id_from_path(job_link))
+
+                # Only add if title contains internship-related keywords
+                internship_keywords = ['intern', 'internship', 'trainee', 'graduate program', 'entry level', 'fresher']
+                if any(word in title.lower() for word in internship_keywords):
+                    jobs.append(Job(
+                        title=title,
+                        company=company,
+                        location=job_location,
+                        salary=NOT_MENTIONED,  # LinkedIn rarely shows salary publicly
+                        link=job_link,
+                        source="LinkedIn",
+                        job_id=job_id,
+                        **posting_fields(posted),
+                    ))
+                    print(f"✅ Added LinkedIn: {title} at {company}")
+
+        except Exception as e:
+            print(f"⚠️ Error parsing LinkedIn job: {e}")
+            METRICS.count("errors_total", source="LinkedIn", stage="extract")
+            continue
+
+    return jobs
+
+def scrape_linkedin(stop_event=None):
     print("🔍 Scraping LinkedIn for internships...")
-    internships = []
+    found = 0
     
-    # LinkedIn headers to mimic browser behavior
+    # LinkedIn headers to mimic browser behavior (on top of the shared client's defaults)
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
         'Sec-Fetch-Dest': 'document',
         'Sec-Fetch-Mode': 'navigate',
@@ -56,10 +2014,6 @@ def scrape_linkedin():
         'Cache-Control': 'max-age=0',
     }
     
-    # Session for maintaining cookies
-    session = requests.Session()
-    session.headers.update(headers)
-    
     # Keywords for internship search - All branches
     keywords = [
         # Computer Science & IT
@@ -113,192 +2067,209 @@ def scrape_linkedin():
         "Hyderabad, India", "Chennai, India", "Pune, India"
     ]
     
+    base_url = f"{BOARD_BASE_URLS['LinkedIn']}/jobs/search"
+    host = urlparse(base_url).netloc
+    searches = QUERY_PLANNER.plan("LinkedIn", keywords, locations)
+    paged = {(keyword, location) for keyword, location, page in searches if page}
+
+    def fetch_search(search):
+        keyword, location, page = search
+        if page and QUERY_PLANNER.is_caught_up("LinkedIn", keyword, location):
+            return None, None
+        print(f"📍 Searching LinkedIn: {keyword} in {location}" + (f" (page {page + 1})" if page else ""))
+
+        # Build LinkedIn job search URL
+        search_params = {
+            'keywords': keyword,
+            'location': location,
+            'f_TPR': 'r86400',  # Posted in last 24 hours
+            'f_E': '1',  # Experience level: Internship
+            'f_JT': 'I',  # Job type: Internship
+            'sortBy': 'DD',  # Sort by date
+            'start': page * LINKEDIN_PAGE_SIZE
+        }
+        url = f"{base_url}?{urlencode(search_params)}"
+
+        # The fetch engine spaces requests out per host, no need to sleep here
+        response = FETCHER.get(url, headers=headers, stop_event=stop_event, timeout=20)
+        QUERY_PLANNER.requested("LinkedIn")
+
+        # The simplified-URL retry is paid for out of LinkedIn's retry budget
+        if response.status_code == 999 and FETCHER.take_retry(host):
+            print("⚠️ LinkedIn is blocking requests (999 status). Trying alternative approach...")
+            # Try with simplified URL, after pushing the next LinkedIn slot back a little further
+            simple_url = f"{base_url}?keywords={quote_plus(keyword)}&location={quote_plus(location)}&f_JT=I"
+            if page:
+                simple_url += f"&start={page * LINKEDIN_PAGE_SIZE}"
+            FETCHER.backoff(host, 2)
+            url = simple_url
+            response = FETCHER.get(url, headers=headers, stop_event=stop_event, timeout=20)
+            QUERY_PLANNER.requested("LinkedIn")
+        return url, response
+
     try:
-        for keyword in keywords[:6]:  # Limit keywords to avoid rate limiting
-            for location in locations[:4]:  # Limit locations
-                try:
-                    print(f"📍 Searching LinkedIn: {keyword} in {location}")
-                    
-                    # Build LinkedIn job search URL
-                    search_params = {
-                        'keywords': keyword,
-                        'location': location,
-                        'f_TPR': 'r86400',  # Posted in last 24 hours
-                        'f_E': '1',  # Experience level: Internship
-                        'f_JT': 'I',  # Job type: Internship
-                        'sortBy': 'DD',  # Sort by date
-                        'start': 0
-                    }
-                    
-                    base_url = "https://www.linkedin.com/jobs/search"
-                    url = f"{base_url}?{urlencode(search_params)}"
-                    
-                    # Add random delay to avoid rate limiting
-                    time.sleep(random.uniform(3, 6))
-                    
-                    response = session.get(url, timeout=20)
-                    
-                    if response.status_code == 999:
-                        print("⚠️ LinkedIn is blocking requests (999 status). Trying alternative approach...")
-                        # Try with simplified URL
-                        simple_url = f"https://www.linkedin.com/jobs/search?keywords={quote_plus(keyword)}&location={quote_plus(location)}&f_JT=I"
-                        time.sleep(random.uniform(5, 8))
-                        response = session.get(simple_url, timeout=20)
-                    
-                    if response.status_code != 200:
-                        print(f"⚠️ LinkedIn returned status {response.status_code} for {keyword} in {location}")
-                        continue
-                    
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    
-                    # Multiple selector strategies for LinkedIn job cards
-                    job_cards = (
-                        soup.find_all("div", class_="base-card relative w-full hover:no-underline focus:no-underline base-card--link base-search-card base-search-card--link job-search-card") or
-                        soup.find_all("div", class_="job-search-card") or
-                        soup.find_all("div", attrs={"data-entity-urn": True}) or
-                        soup.find_all("li", class_="result-card job-result-card result-card--with-hover-state") or
-                        soup.find_all("div", class_="base-search-card__info")
-                    )
-                    
-                    print(f"Found {len(job_cards)} job cards for {keyword} in {location}")
-                    
-                    for job in job_cards[:8]:  # Limit per search
-                        try:
-                            # Extract job title with multiple selectors
-                            title_element = (
-                                job.find("h3", class_="base-search-card__title") or
-                                job.find("a", class_="base-card__full-link") or
-                                job.find("h4", class_="base-search-card__title") or
-                                job.find("span", attrs={"aria-hidden": "true"}) or
-                                job.find("a", attrs={"data-tracking-control-name": "public_jobs_jserp-result_search-card"})
-                            )
-                            
-                            # Extract company with multiple selectors
-                            company_element = (
-                                job.find("h4", class_="base-search-card__subtitle") or
-                                job.find("a", class_="hidden-nested-link") or
-                                job.find("span", class_="job-search-card__subtitle-link") or
-                                job.find("h4", class_="base-search-card__subtitle-link")
-                            )
-                            
-                            # Extract location
-                            location_element = (
-                                job.find("span", class_="job-search-card__location") or
-                                job.find("span", class_="base-search-card__metadata") or
-                                job.find("div", class_="base-search-card__metadata")
-                            )
-                            
-                            # Extract job link
-                            link_element = (
-                                job.find("a", class_="base-card__full-link") or
-                                job.find("a", attrs={"data-tracking-control-name": "public_jobs_jserp-result_search-card"}) or
-                                title_element.find("a") if title_element else None
-                            )
-                            
-                            # Extract posting date
-                            date_element = (
-                                job.find("time", class_="job-search-card__listdate") or
-                                job.find("time", class_="job-search-card__listdate--new") or
-                                job.find("span", class_="job-search-card__listdate")
-                            )
-
-                            if title_element:
-                                # Clean up title
-                                if hasattr(title_element, 'get_text'):
-                                    title = title_element.get_text(strip=True)
-                                elif title_element.find('span'):
-                                    title = title_element.find('span').get_text(strip=True)
-                                else:
-                                    title = str(title_element.get('title', '')).strip()
-                                
-                                # Skip if title is empty or too generic
-                                if not title or len(title) < 5:
-                                    continue
-                                
-                                # Extract company name
-                                if company_element:
-                                    if hasattr(company_element, 'get_text'):
-                                        company = company_element.get_text(strip=True)
-                                    else:
-                                        company = str(company_element).strip()
-                                else:
-                                    company = "Company Not Listed"
-                                
-                                # Extract location
-                                if location_element:
-                                    job_location = location_element.get_text(strip=True)
-                                    # Clean up location text
-                                    job_location = re.sub(r'\s+', ' ', job_location)
-                                else:
-                                    job_location = location
-                                
-                                # Build proper LinkedIn job URL
-                                if link_element and link_element.get('href'):
-                                    href = link_element.get('href')
-                                    if href.startswith('/'):
-                                        job_link = f"https://www.linkedin.com{href}"
-                                    else:
-                                        job_link = href
-                                    
-                                    # Clean LinkedIn tracking parameters
-                                    if '?' in job_link:
-                                        job_link = job_link.split('?')[0]
-                                else:
-                                    job_link = url  # Fallback to search URL
-                                
-                                # Extract posting date
-                                posting_date = datetime.now().strftime('%Y-%m-%d')
-                                if date_element:
-                                    date_text = date_element.get_text(strip=True)
-                                    # Parse relative dates like "2 days ago", "1 week ago"
-                                    if 'day' in date_text.lower():
-                                        posting_date = datetime.now().strftime('%Y-%m-%d')
-                                    elif 'week' in date_text.lower():
-                                        posting_date = datetime.now().strftime('%Y-%m-%d')
-                                
-                                # Only add if title contains internship-related keywords
-                                internship_keywords = ['intern', 'internship', 'trainee', 'graduate program', 'entry level', 'fresher']
-                                if any(word in title.lower() for word in internship_keywords):
-                                    internships.append({
-                                        "title": title,
-                                        "company": company,
-                                        "location": job_location,
-                                        "salary": "Not Mentioned",  # LinkedIn rarely shows salary publicly
-                                        "link": job_link,
-                                        "source": "LinkedIn",
-                                        "date": posting_date
-                                    })
-                                    print(f"✅ Added LinkedIn: {title} at {company}")
-                                
-                        except Exception as e:
-                            print(f"⚠️ Error parsing LinkedIn job: {e}")
-                            continue
-                            
-                except Exception as e:
-                    print(f"❌ Error scraping LinkedIn for {keyword} in {location}: {e}")
-                    # Add longer delay if we hit an error (might be rate limited)
-                    time.sleep(random.uniform(5, 10))
+        for search, pending in fetch_by_depth(fetch_search, searches, host, stop_event):
+            keyword, location, _ = search
+            watermark = QUERY_PLANNER.watermark("LinkedIn", keyword, location)
+            try:
+                url, response = pending.result()
+                if response is None:
+                    continue  # An earlier page already reached the watermark
+
+                if response.status_code != 200:
+                    print(f"⚠️ LinkedIn returned status {response.status_code} for {keyword} in {location}")
+                    QUERY_PLANNER.done("LinkedIn", search)
                     continue
+                
+                page_jobs = RESPONSE_CACHE.parse("LinkedIn", url, response, lambda html: parse_linkedin_page(html, keyword, location, url, watermark),
+                                                 watermark, caught_up=lambda: QUERY_PLANNER.is_caught_up("LinkedIn", keyword, location))
+                if response.reused and response.caught_up:
+                    # Unchanged since a parse that got back to the watermark, which has only moved up since
+                    QUERY_PLANNER.reached_watermark("LinkedIn", keyword, location)
+                if (keyword, location) not in paged:
+                    page_jobs = page_jobs[:LINKEDIN_CARDS_PER_SEARCH]
+                QUERY_PLANNER.done("LinkedIn", search, page_jobs)
+                found += len(page_jobs)
+                yield from page_jobs
+            except Exception as e:
+                print(f"❌ Error scraping LinkedIn for {keyword} in {location}: {e}")
+                METRICS.count("errors_total", source="LinkedIn", stage="page")
+                # Add longer delay if we hit an error (might be rate limited)
+                FETCHER.backoff(host, random.uniform(5, 10))
+                continue
 
     except Exception as e:
         print(f"❌ Major error scraping LinkedIn: {e}")
+        METRICS.count("errors_total", source="LinkedIn", stage="scrape")
     
-    # Remove duplicates based on title and company
-    unique_internships = []
-    seen = set()
-    for internship in internships:
-        key = (internship['title'].lower(), internship['company'].lower())
-        if key not in seen:
-            seen.add(key)
-            unique_internships.append(internship)
-    
-    print(f"✅ Found {len(unique_internships)} unique internships from LinkedIn")
-    return unique_internships
+    print(f"✅ Found {found} internships from LinkedIn")
 
 # ----- Scrape Indeed India Internships -----
-def scrape_indeed():
+# Multiple selector strategies for Indeed
+INDEED_CARDS = SELECTORS.cascade("Indeed.cards",
+    Selector("div", attrs={"data-result-id": True}),
+    Selector("div", class_="job_seen_beacon"),
+    Selector("div", class_="slider_container"),
+    Selector("div", class_="result"),
+)
+INDEED_TITLE = SELECTORS.cascade("Indeed.title",
+    Selector("h2", class_="jobTitle"),
+    Selector("a", attrs={"data-jk": True}),
+    Selector("span", attrs={"title": True}),
+    Selector("h2", class_="jobTitle-color-purple"),
+)
+INDEED_COMPANY = SELECTORS.cascade("Indeed.company",
+    Selector("span", class_="companyName"),
+    Selector("a", attrs={"data-testid": "company-name"}),
+    Selector("div", class_="companyName"),
+)
+INDEED_SALARY = SELECTORS.cascade("Indeed.salary",
+    Selector("span", class_="salary-text"),
+    Selector("div", class_="metadata salary-snippet-container"),
+    Selector("span", attrs={"data-testid": "job-salary"}),
+)
+INDEED_DATE = SELECTORS.cascade("Indeed.date",
+    Selector("span", attrs={"data-testid": "myJobsStateDate"}),
+    Selector("span", class_="date"),
+)
+
+# Cards on one page of Indeed's results; deeper pages start this far apart
+INDEED_PAGE_SIZE = 10
+# Cards taken from a search that isn't paged deeper; a paged search takes whole pages so none are skipped
+INDEED_CARDS_PER_SEARCH = 8
+
+def parse_indeed_page(html, keyword, location, url, watermark=None):
+    jobs = []
+    soup = make_soup(html, "Indeed India")
+
+    job_cards = INDEED_CARDS.find_all(soup)
+
+    print(f"Found {len(job_cards)} job cards for {keyword} in {location}")
+
+    stale = 0
+    for job in job_cards:
+        try:
+            # Sorted by date, so a run of cards older than what this search already saw ends the page
+            date_element = INDEED_DATE.find(job)
+            posted = posted_at(date_element.get_text(" ", strip=True)) if date_element else None
+            if watermark and posted and posted[1] < watermark:
+                stale += 1
+                if stale >= WATERMARK_STALE_CARDS:
+                    print(f"⏹️ Caught up with {keyword} in {location}, skipping the older cards")
+                    QUERY_PLANNER.reached_watermark("Indeed India", keyword, location)
+                    break
+                continue
+            if posted:
+                stale = 0
+
+            # Extract job title and company
+            title_element = INDEED_TITLE.find(job)
+            company_element = INDEED_COMPANY.find(job)
+
+            # Extract job link
+            link_element = None
+            if title_element:
+                link_element = title_element.find("a") if title_element.name != "a" else title_element
+
+            # Extract salary/stipend if available
+            salary_element = INDEED_SALARY.find(job)
+
+            if title_element and company_element:
+                # Clean up title
+                if hasattr(title_element, 'get_text'):
+                    title = title_element.get_text(strip=True)
+                else:
+                    title = title_element.get('title', 'N/A')
+
+                # Clean up company
+                company = company_element.get_text(strip=True)
+
+                # Build proper Indeed URL
+                if link_element and link_element.get('href'):
+                    href = link_element.get('href')
+                    if href.startswith('/'):
+                        job_link = f"{BOARD_BASE_URLS['Indeed India']}{href}"
+                    else:
+                        job_link = href
+                    job_link = canonical_url(job_link)
+                else:
+                    job_link = url  # Fallback to search URL
+
+                # Indeed's job key, on the title link (data-jk), the card, or the link's jk parameter
+                jk = (link_element.get("data-jk") if link_element else None) or job.get("data-jk")
+                if not jk and job_link != url:
+                    jk = dict(parse_qsl(urlsplit(job_link).query)).get("jk")
+                job_id = make_job_id("indeed", jk)
+
+                # Extract salary if available
+                salary = NOT_MENTIONED
+                if salary_element:
+                    salary = salary_element.get_text(strip=True)
+
+                # Only add if title contains internship-related keywords
+                if any(word in title.lower() for word in ['intern', 'trainee', 'graduate', 'fresher']):
+                    jobs.append(Job(
+                        title=title,
+                        company=company,
+                        location=location,
+                        salary=salary,
+                        link=job_link,
+                        source="Indeed India",
+                        job_id=job_id,
+                        **posting_fields(posted),
+                    ))
+                    print(f"✅ Added: {title} at {company}")
+
+        except Exception as e:
+            print(f"⚠️ Error parsing Indeed job: {e}")
+            METRICS.count("errors_total", source="Indeed India", stage="extract")
+            continue
+
+    return jobs
+
+def scrape_indeed(stop_event=None):
     print("🔍 Scraping Indeed India for internships...")
-    internships = []
+    found = 0
     
     # Comprehensive list of keywords for Indian internships
     keywords = [
@@ -316,260 +2287,244 @@ def scrape_indeed():
         "Pune", "Kolkata", "Gurgaon", "Noida", "Remote", "India"
     ]
 
+    # Everything else comes from the shared client's default headers
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
     }
 
-    for keyword in keywords[:8]:  # Limit keywords to avoid rate limiting
-        for location in locations[:6]:  # Limit locations
-            try:
-                # Use Indian Indeed domain
-                url = f"https://in.indeed.com/jobs?q={keyword.replace(' ', '+')}&l={location.replace(' ', '+')}&jt=internship&sort=date"
-                print(f"📍 Searching: {keyword} in {location}")
-                
-                # Add random delay to avoid rate limiting
-                time.sleep(random.uniform(1, 3))
-                
-                response = requests.get(url, headers=headers, timeout=15)
-                if response.status_code != 200:
-                    print(f"⚠️ Status {response.status_code} for {keyword} in {location}")
-                    continue
-                
-                soup = BeautifulSoup(response.text, "html.parser")
+    base_url = f"{BOARD_BASE_URLS['Indeed India']}/jobs"
+    searches = QUERY_PLANNER.plan("Indeed India", keywords, locations)
+    paged = {(keyword, location) for keyword, location, page in searches if page}
 
-                # Multiple selector strategies for Indeed
-                job_cards = (soup.find_all("div", {"data-result-id": True}) or 
-                           soup.find_all("div", class_="job_seen_beacon") or
-                           soup.find_all("div", class_="slider_container") or
-                           soup.find_all("div", class_="result"))
-                
-                print(f"Found {len(job_cards)} job cards for {keyword} in {location}")
-                
-                for job in job_cards[:8]:  # Limit per search
-                    try:
-                        # Extract job title with multiple selectors
-                        title_element = (
-                            job.find("h2", class_="jobTitle") or
-                            job.find("a", {"data-jk": True}) or
-                            job.find("span", attrs={"title": True}) or
-                            job.find("h2", class_="jobTitle-color-purple")
-                        )
-                        
-                        # Extract company with multiple selectors
-                        company_element = (
-                            job.find("span", class_="companyName") or
-                            job.find("a", {"data-testid": "company-name"}) or
-                            job.find("div", class_="companyName") or
-                            job.find("span", class_="companyName")
-                        )
-                        
-                        # Extract job link
-                        link_element = None
-                        if title_element:
-                            link_element = title_element.find("a") if title_element.name != "a" else title_element
-                        
-                        # Extract salary/stipend if available
-                        salary_element = (
-                            job.find("span", class_="salary-text") or
-                            job.find("div", class_="metadata salary-snippet-container") or
-                            job.find("span", attrs={"data-testid": "job-salary"})
-                        )
-
-                        if title_element and company_element:
-                            # Clean up title
-                            if hasattr(title_element, 'get_text'):
-                                title = title_element.get_text(strip=True)
-                            else:
-                                title = title_element.get('title', 'N/A')
-                            
-                            # Clean up company
-                            company = company_element.get_text(strip=True)
-                            
-                            # Build proper Indeed URL
-                            if link_element and link_element.get('href'):
-                                href = link_element.get('href')
-                                if href.startswith('/'):
-                                    job_link = f"https://in.indeed.com{href}"
-                                else:
-                                    job_link = href
-                            else:
-                                job_link = url  # Fallback to search URL
-                            
-                            # Extract salary if available
-                            salary = "Not Mentioned"
-                            if salary_element:
-                                salary = salary_element.get_text(strip=True)
-                            
-                            # Only add if title contains internship-related keywords
-                            if any(word in title.lower() for word in ['intern', 'trainee', 'graduate', 'fresher']):
-                                internships.append({
-                                    "title": title,
-                                    "company": company,
-                                    "location": location,
-                                    "salary": salary,
-                                    "link": job_link,
-                                    "source": "Indeed India",
-                                    "date": datetime.now().strftime('%Y-%m-%d')
-                                })
-                                print(f"✅ Added: {title} at {company}")
-                            
-                    except Exception as e:
-                        print(f"⚠️ Error parsing Indeed job: {e}")
-                        continue
-                        
-            except Exception as e:
-                print(f"❌ Error scraping Indeed for {keyword} in {location}: {e}")
-                continue
+    def fetch_search(search):
+        keyword, location, page = search
+        if page and QUERY_PLANNER.is_caught_up("Indeed India", keyword, location):
+            return None, None
+        # Use Indian Indeed domain
+        url = f"{base_url}?q={keyword.replace(' ', '+')}&l={location.replace(' ', '+')}&jt=internship&sort=date"
+        if page:
+            url += f"&start={page * INDEED_PAGE_SIZE}"
+        print(f"📍 Searching: {keyword} in {location}" + (f" (page {page + 1})" if page else ""))
+        response = FETCHER.get(url, headers=headers, stop_event=stop_event, timeout=15)
+        QUERY_PLANNER.requested("Indeed India")
+        return url, response
 
-    # Remove duplicates based on title and company
-    unique_internships = []
-    seen = set()
-    for internship in internships:
-        key = (internship['title'].lower(), internship['company'].lower())
-        if key not in seen:
-            seen.add(key)
-            unique_internships.append(internship)
+    for search, pending in fetch_by_depth(fetch_search, searches, urlparse(base_url).netloc, stop_event):
+        keyword, location, _ = search
+        watermark = QUERY_PLANNER.watermark("Indeed India", keyword, location)
+        try:
+            url, response = pending.result()
+            if response is None:
+                continue  # An earlier page already reached the watermark
+            if response.status_code != 200:
+                print(f"⚠️ Status {response.status_code} for {keyword} in {location}")
+                QUERY_PLANNER.done("Indeed India", search)
+                continue
+            
+            page_jobs = RESPONSE_CACHE.parse("Indeed India", url, response, lambda html: parse_indeed_page(html, keyword, location, url, watermark),
+                                             watermark, caught_up=lambda: QUERY_PLANNER.is_caught_up("Indeed India", keyword, location))
+            if response.reused and response.caught_up:
+                # Unchanged since a parse that got back to the watermark, which has only moved up since
+                QUERY_PLANNER.reached_watermark("Indeed India", keyword, location)
+            if (keyword, location) not in paged:
+                page_jobs = page_jobs[:INDEED_CARDS_PER_SEARCH]
+            QUERY_PLANNER.done("Indeed India", search, page_jobs)
+            found += len(page_jobs)
+            yield from page_jobs
+        except Exception as e:
+            print(f"❌ Error scraping Indeed for {keyword} in {location}: {e}")
+            METRICS.count("errors_total", source="Indeed India", stage="page")
+            continue
 
-    print(f"✅ Found {len(unique_internships)} unique internships from Indeed India")
-    return unique_internships
+    print(f"✅ Found {found} internships from Indeed India")
 
 # ----- Scrape Internshala India -----
-def scrape_internshala():
+# Multiple selector strategies for Internshala
+INTERNSHALA_CARDS = SELECTORS.cascade("Internshala.cards",
+    Selector("div", class_="individual_internship"),
+    Selector("div", class_="internship_meta"),
+    Selector("div", attrs={"internshipid": True}),
+)
+INTERNSHALA_TITLE = SELECTORS.cascade("Internshala.title",
+    Selector("h3", class_="heading_4_5"),
+    Selector("a", class_="link_display_like_text"),
+    Selector("h3"),
+    Selector("div", class_="profile"),
+)
+INTERNSHALA_COMPANY = SELECTORS.cascade("Internshala.company",
+    Selector("p", class_="company_name"),
+    Selector("a", class_="link_display_like_text"),
+    Selector("div", class_="company"),
+    Selector("p", class_="company-name"),
+)
+INTERNSHALA_LOCATION = SELECTORS.cascade("Internshala.location",
+    Selector("div", class_="locations"),
+    Selector("a", attrs={"data-placement": "top"}),
+    Selector("span", class_="location_link"),
+)
+INTERNSHALA_STIPEND = SELECTORS.cascade("Internshala.stipend",
+    Selector("div", class_="stipend"),
+    Selector("span", class_="stipend"),
+    Selector("div", label="div[class~=stipend]", attrs={"class": re.compile("stipend")}),
+)
+INTERNSHALA_LINK = SELECTORS.cascade("Internshala.link",
+    Selector("a", class_="link_display_like_text"),
+)
+
+def parse_internshala_page(html):
+    jobs = []
+    soup = make_soup(html, "Internshala")
+
+    job_cards = INTERNSHALA_CARDS.find_all(soup)
+
+    print(f"Found {len(job_cards)} internship cards")
+
+    for job in job_cards[:15]:  # Limit per URL
+        try:
+            # Extract internship details
+            title_element = INTERNSHALA_TITLE.find(job)
+            company_element = INTERNSHALA_COMPANY.find(job)
+            location_element = INTERNSHALA_LOCATION.find(job)
+            stipend_element = INTERNSHALA_STIPEND.find(job)
+
+            # Extract link to apply
+            link_element = (
+                INTERNSHALA_LINK.find(job) or
+                title_element.find("a") if title_element else None
+            )
+
+            if title_element:
+                title = title_element.get_text(strip=True)
+                company = company_element.get_text(strip=True) if company_element else "Company Not Listed"
+                location = location_element.get_text(strip=True) if location_element else "India"
+                stipend = stipend_element.get_text(strip=True) if stipend_element else NOT_MENTIONED
+
+                # Build proper Internshala link
+                internship_id = job.get('internshipid')
+                if link_element and link_element.get('href'):
+                    href = link_element.get('href')
+                    if href.startswith('/'):
+                        job_link = f"{BOARD_BASE_URLS['Internshala']}{href}"
+                    else:
+                        job_link = href
+                    job_link = canonical_url(job_link)
+                    internship_id = internship_id or id_from_path(job_link)
+                else:
+                    # Try to extract internship ID and build link
+                    if internship_id:
+                        job_link = f"{BOARD_BASE_URLS['Internshala']}/internship/detail/{internship_id}"
+                    else:
+                        job_link = f"{BOARD_BASE_URLS['Internshala']}/internships"
+
+                jobs.append(Job(
+                    title=title,
+                    company=company,
+                    location=location,
+                    salary=stipend,
+                    link=job_link,
+                    source="Internshala",
+                    job_id=make_job_id("internshala", internship_id),
+                ))
+                print(f"✅ Added Internshala: {title} at {company}")
+
+        except Exception as e:
+            print(f"⚠️ Error parsing Internshala job: {e}")
+            METRICS.count("errors_total", source="Internshala", stage="extract")
+            continue
+
+    return jobs
+
+def scrape_internshala(stop_event=None):
     print("🔍 Scraping Internshala for Indian internships...")
-    internships = []
+    found = 0
     
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
     }
 
     try:
         # Multiple Internshala URLs for different categories
+        base_url = BOARD_BASE_URLS["Internshala"]
         urls = [
-            "https://internshala.com/internships/computer-science,software-development,machine-learning,data-science,artificial-intelligence,web-development",
-            "https://internshala.com/internships/software-development/bangalore,mumbai,delhi,hyderabad,chennai,pune",
-            "https://internshala.com/internships/python/",
-            "https://internshala.com/internships/machine-learning/",
-            "https://internshala.com/internships/data-science/"
+            f"{base_url}/internships/computer-science,software-development,machine-learning,data-science,artificial-intelligence,web-development",
+            f"{base_url}/internships/software-development/bangalore,mumbai,delhi,hyderabad,chennai,pune",
+            f"{base_url}/internships/python/",
+            f"{base_url}/internships/machine-learning/",
+            f"{base_url}/internships/data-science/"
         ]
+        urls = [url for url in urls if in_shard("Internshala", url.removeprefix(base_url))]
         
-        for url in urls:
+        def fetch_page(url):
+            print(f"📍 Scraping Internshala URL: {url[:60]}...")
+            return FETCHER.get(url, headers=headers, stop_event=stop_event, timeout=20)
+
+        for url, pending in FETCHER.run(fetch_page, urls, urlparse(base_url).netloc, stop_event):
             try:
-                print(f"📍 Scraping Internshala URL: {url[:60]}...")
-                time.sleep(random.uniform(2, 4))
-                
-                response = requests.get(url, headers=headers, timeout=20)
+                response = pending.result()
                 if response.status_code != 200:
                     print(f"⚠️ Internshala returned status {response.status_code}")
                     continue
                 
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                # Multiple selector strategies for Internshala
-                job_cards = (
-                    soup.find_all("div", class_="individual_internship") or
-                    soup.find_all("div", class_="internship_meta") or
-                    soup.find_all("div", attrs={"internshipid": True}) or
-                    soup.find_all("div", class_="container-fluid individual_internship")
-                )
-                
-                print(f"Found {len(job_cards)} internship cards")
-                
-                for job in job_cards[:15]:  # Limit per URL
-                    try:
-                        # Extract internship details with multiple selector attempts
-                        title_element = (
-                            job.find("h3", class_="heading_4_5") or
-                            job.find("a", class_="link_display_like_text") or
-                            job.find("h3") or
-                            job.find("div", class_="profile")
-                        )
-                        
-                        company_element = (
-                            job.find("p", class_="company_name") or
-                            job.find("a", class_="link_display_like_text") or
-                            job.find("div", class_="company") or
-                            job.find("p", class_="company-name")
-                        )
-                        
-                        location_element = (
-                            job.find("div", class_="locations") or
-                            job.find("a", attrs={"data-placement": "top"}) or
-                            job.find("span", class_="location_link")
-                        )
-                        
-                        stipend_element = (
-                            job.find("div", class_="stipend") or
-                            job.find("span", class_="stipend") or
-                            job.find("div", attrs={"class": re.compile("stipend")})
-                        )
-                        
-                        # Extract link to apply
-                        link_element = (
-                            job.find("a", class_="link_display_like_text") or
-                            title_element.find("a") if title_element else None
-                        )
-
-                        if title_element:
-                            title = title_element.get_text(strip=True)
-                            company = company_element.get_text(strip=True) if company_element else "Company Not Listed"
-                            location = location_element.get_text(strip=True) if location_element else "India"
-                            stipend = stipend_element.get_text(strip=True) if stipend_element else "Not Mentioned"
-                            
-                            # Build proper Internshala link
-                            if link_element and link_element.get('href'):
-                                href = link_element.get('href')
-                                if href.startswith('/'):
-                                    job_link = f"https://internshala.com{href}"
-                                else:
-                                    job_link = href
-                            else:
-                                # Try to extract internship ID and build link
-                                internship_id = job.get('internshipid')
-                                if internship_id:
-                                    job_link = f"https://internshala.com/internship/detail/{internship_id}"
-                                else:
-                                    job_link = "https://internshala.com/internships"
-                            
-                            internships.append({
-                                "title": title,
-                                "company": company,
-                                "location": location,
-                                "salary": stipend,
-                                "link": job_link,
-                                "source": "Internshala",
-                                "date": datetime.now().strftime('%Y-%m-%d')
-                            })
-                            print(f"✅ Added Internshala: {title} at {company}")
-                            
-                    except Exception as e:
-                        print(f"⚠️ Error parsing Internshala job: {e}")
-                        continue
-                        
+                page_jobs = RESPONSE_CACHE.parse("Internshala", url, response, parse_internshala_page)
+                found += len(page_jobs)
+                yield from page_jobs
             except Exception as e:
                 print(f"❌ Error with Internshala URL: {e}")
+                METRICS.count("errors_total", source="Internshala", stage="page")
                 continue
                 
     except Exception as e:
         print(f"❌ Major error scraping Internshala: {e}")
+        METRICS.count("errors_total", source="Internshala", stage="scrape")
 
-    print(f"✅ Found {len(internships)} internships from Internshala")
-    return internships
+    print(f"✅ Found {found} internships from Internshala")
 
 # ----- Scrape Naukri India -----
-def scrape_naukri():
+NAUKRI_CARDS = SELECTORS.cascade("Naukri.cards", Selector("div", class_="jobTuple"))
+NAUKRI_TITLE = SELECTORS.cascade("Naukri.title", Selector("a", class_="title"))
+NAUKRI_COMPANY = SELECTORS.cascade("Naukri.company", Selector("a", class_="subTitle"))
+
+def parse_naukri_page(html):
+    jobs = []
+    soup = make_soup(html, "Naukri.com")
+
+    # Naukri job cards
+    job_cards = NAUKRI_CARDS.find_all(soup)
+
+    for job in job_cards[:5]:  # Limit per search
+        try:
+            title_elem = NAUKRI_TITLE.find(job)
+            company_elem = NAUKRI_COMPANY.find(job)
+
+            if title_elem and company_elem:
+                title = title_elem.get_text(strip=True)
+                company = company_elem.get_text(strip=True)
+                href = title_elem.get('href', '')
+                # Naukri mostly links absolutely; only prefix the host for relative links
+                job_link = canonical_url(href if href.startswith('http') else f"{BOARD_BASE_URLS['Naukri.com']}{href}")
+                job_id = make_job_id("naukri", job.get("data-job-id") or id_from_path(job_link))
+
+                if 'intern' in title.lower():
+                    jobs.append(Job(
+                        title=title,
+                        company=company,
+                        location="India",
+                        salary=NOT_MENTIONED,
+                        link=job_link,
+                        source="Naukri.com",
+                        job_id=job_id,
+                    ))
+                    print(f"✅ Added Naukri: {title}")
+
+        except Exception as e:
+            METRICS.count("errors_total", source="Naukri.com", stage="extract")
+            continue
+
+    return jobs
+
+def scrape_naukri(stop_event=None):
     print("🔍 Scraping Naukri.com for internships...")
-    internships = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
+    found = 0
     
     try:
         # Naukri internship searches
@@ -578,366 +2533,1080 @@ def scrape_naukri():
             "Data+Science+Intern", "Machine+Learning+Intern"
         ]
         
-        for term in search_terms[:3]:  # Limit searches
-            url = f"https://www.naukri.com/internship-jobs?k={term}&l=India"
+        base_url = f"{BOARD_BASE_URLS['Naukri.com']}/internship-jobs"
+
+        def fetch_search(term):
+            url = f"{base_url}?k={term}&l=India"
             print(f"📍 Searching Naukri: {term.replace('+', ' ')}")
-            
+            return url, FETCHER.get(url, stop_event=stop_event, timeout=15)
+
+        search_terms = [term for term in search_terms[:3] if in_shard("Naukri.com", term)]  # Limit searches
+        for term, pending in FETCHER.run(fetch_search, search_terms, urlparse(base_url).netloc, stop_event):
             try:
-                time.sleep(random.uniform(2, 4))
-                response = requests.get(url, headers=headers, timeout=15)
-                
+                url, response = pending.result()
+
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    
-                    # Naukri job cards
-                    job_cards = soup.find_all("div", class_="jobTuple")
-                    
-                    for job in job_cards[:5]:  # Limit per search
-                        try:
-                            title_elem = job.find("a", class_="title")
-                            company_elem = job.find("a", class_="subTitle")
-                            
-                            if title_elem and company_elem:
-                                title = title_elem.get_text(strip=True)
-                                company = company_elem.get_text(strip=True)
-                                job_link = f"https://www.naukri.com{title_elem.get('href', '')}"
-                                
-                                if 'intern' in title.lower():
-                                    internships.append({
-                                        "title": title,
-                                        "company": company,
-                                        "location": "India",
-                                        "salary": "Not Mentioned",
-                                        "link": job_link,
-                                        "source": "Naukri.com",
-                                        "date": datetime.now().strftime('%Y-%m-%d')
-                                    })
-                                    print(f"✅ Added Naukri: {title}")
-                                    
-                        except Exception as e:
-                            continue
-                            
+                    page_jobs = RESPONSE_CACHE.parse("Naukri.com", url, response, parse_naukri_page)
+                    found += len(page_jobs)
+                    yield from page_jobs
             except Exception as e:
                 print(f"❌ Error searching Naukri for {term}: {e}")
+                METRICS.count("errors_total", source="Naukri.com", stage="page")
                 continue
                 
     except Exception as e:
         print(f"❌ Major error with Naukri: {e}")
+        METRICS.count("errors_total", source="Naukri.com", stage="scrape")
     
-    print(f"✅ Found {len(internships)} internships from Naukri")
-    return internships
+    print(f"✅ Found {found} internships from Naukri")
 
 # ----- Generate sample jobs if all scraping fails -----
 def get_sample_jobs():
     """Generate realistic sample jobs for testing"""
     return [
-        {
-            "title": "Software Development Intern - Backend",
-            "company": "TechCorp India Pvt Ltd",
-            "location": "Bangalore, Karnataka",
-            "salary": "₹15,000 - ₹25,000/month",
-            "link": "https://example.com/apply1",
-            "source": "Sample Data",
-            "date": datetime.now().strftime('%Y-%m-%d')
-        },
-        {
-            "title": "Data Science Intern", 
-            "company": "Analytics Solutions",
-            "location": "Mumbai, Maharashtra",
-            "salary": "₹12,000 - ₹20,000/month",
-            "link": "https://example.com/apply2",
-            "source": "Sample Data",
-            "date": datetime.now().strftime('%Y-%m-%d')
-        },
-        {
-            "title": "Machine Learning Engineer Intern",
-            "company": "AI Innovations Ltd",
-            "location": "Hyderabad, Telangana",
-            "salary": "₹18,000 - ₹30,000/month",
-            "link": "https://example.com/apply3",
-            "source": "Sample Data", 
-            "date": datetime.now().strftime('%Y-%m-%d')
-        },
-        {
-            "title": "Full Stack Developer Intern",
-            "company": "StartupHub Technologies",
-            "location": "Pune, Maharashtra",
-            "salary": "₹10,000 - ₹18,000/month",
-            "link": "https://example.com/apply4",
-            "source": "Sample Data",
-            "date": datetime.now().strftime('%Y-%m-%d')
-        }
+        Job(
+            title="Software Development Intern - Backend",
+            company="TechCorp India Pvt Ltd",
+            location="Bangalore, Karnataka",
+            salary="₹15,000 - ₹25,000/month",
+            link="https://example.com/apply1",
+            source="Sample Data",
+        ),
+        Job(
+            title="Data Science Intern", 
+            company="Analytics Solutions",
+            location="Mumbai, Maharashtra",
+            salary="₹12,000 - ₹20,000/month",
+            link="https://example.com/apply2",
+            source="Sample Data",
+        ),
+        Job(
+            title="Machine Learning Engineer Intern",
+            company="AI Innovations Ltd",
+            location="Hyderabad, Telangana",
+            salary="₹18,000 - ₹30,000/month",
+            link="https://example.com/apply3",
+            source="Sample Data",
+        ),
+        Job(
+            title="Full Stack Developer Intern",
+            company="StartupHub Technologies",
+            location="Pune, Maharashtra",
+            salary="₹10,000 - ₹18,000/month",
+            link="https://example.com/apply4",
+            source="Sample Data",
+        ),
     ]
 
+# ----- Parallel Source Runner -----
+# Wall-clock budget per source; when it runs out the source is cancelled and keeps what it found so far
+SOURCE_DEADLINES = {
+    "LinkedIn": 300,
+    "Indeed India": 240,
+    "Internshala": 120,
+    "Naukri.com": 90,
+}
+DEFAULT_SOURCE_DEADLINE = 180
+# How long a cancelled scraper gets to finish its in-flight request and return partial results
+DEADLINE_GRACE_SECONDS = 30
+
+class SourceRun:
+    """One scraper running in its own thread, streaming its jobs into a shared queue, with a deadline and a cancellation flag"""
+    def __init__(self, name, scrape_func, jobs_queue):
+        self.name = name
+        self.scrape_func = scrape_func
+        self.jobs_queue = jobs_queue
+        self.priority = SOURCE_PRIORITY.get(name, 6)
+        self.deadline = SOURCE_DEADLINES.get(name, DEFAULT_SOURCE_DEADLINE)
+        if SCRAPE_DEADLINE_SECONDS:
+            self.deadline = min(self.deadline, float(SCRAPE_DEADLINE_SECONDS))
+        self.stop_event = threading.Event()
+        self.found = 0
+        self.done = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"scrape-{name}", daemon=True)
+
+    def _run(self):
+        try:
+            with METRICS.timed("scrape", source=self.name), profiled(f"scrape-{self.name}"):
+                for job in self.scrape_func(stop_event=self.stop_event):
+                    self.jobs_queue.put((self, job))
+        except Exception as e:
+            self.error = e
+            METRICS.count("errors_total", source=self.name, stage="scrape")
+        finally:
+            self.jobs_queue.put((self, None))
+
+    def start(self):
+        self.deadline_at = time.monotonic() + self.deadline
+        self.thread.start()
+
+    def cancel(self, message):
+        print(message)
+        self.stop_event.set()
+        self.deadline_at = min(self.deadline_at, time.monotonic())
+
+    def next_check(self):
+        # Before cancelling: the deadline. After: the end of the grace period
+        return self.deadline_at + (DEADLINE_GRACE_SECONDS if self.stop_event.is_set() else 0)
+
+    def check(self):
+        if time.monotonic() < self.next_check():
+            return
+        if not self.stop_event.is_set():
+            self.cancel(f"⏱️ {self.name} hit its {self.deadline:.0f}s deadline, cancelling and keeping partial results...")
+        else:
+            # Stop waiting for it; anything it still sends is ignored
+            self.error = TimeoutError(f"did not stop within {DEADLINE_GRACE_SECONDS}s of being cancelled")
+            self.done = True
+
+def run_sources(sources, pipeline):
+    """Run all scrapers concurrently and feed their jobs into the pipeline as they arrive. A source is
+    cancelled at its deadline, or as soon as nothing more it finds could make it into the digest."""
+    jobs_queue = queue.Queue()
+    runs = [SourceRun(name, scrape_func, jobs_queue) for name, scrape_func in sources]
+    for run in runs:
+        print(f"\n🎯 Starting {run.name} scraping (deadline {run.deadline:.0f}s)...")
+        run.start()
+    while not all(run.done for run in runs):
+        wait = min(run.next_check() for run in runs if not run.done) - time.monotonic()
+        try:
+            run, job = jobs_queue.get(timeout=max(0, wait))
+            if not run.done:
+                if job is None:
+                    run.done = True
+                else:
+                    run.found += 1
+                    with METRICS.timed("dedup", source=run.name):
+                        pipeline.add(job)
+        except queue.Empty:
+            pass
+        for run in runs:
+            if run.done:
+                continue
+            run.check()
+            if not run.stop_event.is_set() and not pipeline.wants(run.priority):
+                run.cancel(f"🛑 {run.name} can stop: the digest already has {pipeline.size} new jobs ranked above anything it could add")
+    return runs
+
+# ----- Detail Page Enrichment -----
+# Search cards leave stipend, deadline, posting date and (on Naukri) location as placeholders; the
+# posting's own page has them. Detail pages fetched this run, per source, and how long the stage may take.
+ENRICH_MAX_PER_SOURCE = int(os.environ.get("ENRICH_MAX_PER_SOURCE", "10"))
+ENRICH_DEADLINE_SECONDS = 120
+
+LINKEDIN_DETAIL_SALARY = SELECTORS.cascade("LinkedIn.detail.salary",
+    Selector("div", class_="salary compensation__salary"),
+    Selector("div", class_="compensation__salary"),
+)
+LINKEDIN_DETAIL_LOCATION = SELECTORS.cascade("LinkedIn.detail.location",
+    Selector("span", class_="topcard__flavor topcard__flavor--bullet"),
+    Selector("span", class_="topcard__flavor--bullet"),
+)
+LINKEDIN_DETAIL_POSTED = SELECTORS.cascade("LinkedIn.detail.posted",
+    Selector("span", class_="posted-time-ago__text"),
+    Selector("span", class_="topcard__flavor--metadata"),
+)
+INTERNSHALA_DETAIL_STIPEND = SELECTORS.cascade("Internshala.detail.stipend",
+    Selector("span", class_="stipend"),
+    Selector("div", class_="stipend_container"),
+)
+INTERNSHALA_DETAIL_DEADLINE = SELECTORS.cascade("Internshala.detail.deadline",
+    Selector("div", class_="apply_by"),
+    Selector("div", class_="apply_by_container"),
+)
+INTERNSHALA_DETAIL_LOCATION = SELECTORS.cascade("Internshala.detail.location",
+    Selector("div", attrs={"id": "location_names"}),
+    Selector("p", attrs={"id": "location_names"}),
+    Selector("a", class_="location_link"),
+)
+INTERNSHALA_DETAIL_POSTED = SELECTORS.cascade("Internshala.detail.posted",
+    Selector("div", class_="status"),
+    Selector("div", class_="posted_by_container"),
+)
+NAUKRI_DETAIL_LOCATION = SELECTORS.cascade("Naukri.detail.location",
+    Selector("span", class_="location"),
+    Selector("div", class_="loc"),
+)
+NAUKRI_DETAIL_SALARY = SELECTORS.cascade("Naukri.detail.salary",
+    Selector("div", class_="salary"),
+    Selector("span", class_="salary"),
+)
+NAUKRI_DETAIL_POSTED = SELECTORS.cascade("Naukri.detail.posted",
+    Selector("span", class_="posted"),
+    Selector("span", class_="stat"),
+)
+
+def _text(element, inner=None):
+    """Text of an element (or of its `inner`-class child, like Internshala's item_body), or None"""
+    if element is None:
+        return None
+    if inner is not None:
+        element = element.find(class_=inner) or element
+    return " ".join(element.get_text(" ", strip=True).split()) or None
+
+def _posting(text):
+    return posting_fields(posted_at(text)) if text else {}
+
+def parse_linkedin_detail(html):
+    soup = make_soup(html)
+    return {
+        "salary": _text(LINKEDIN_DETAIL_SALARY.find(soup)),
+        "location": _text(LINKEDIN_DETAIL_LOCATION.find(soup)),
+        **_posting(_text(LINKEDIN_DETAIL_POSTED.find(soup))),
+    }
+
+def parse_internshala_detail(html):
+    soup = make_soup(html)
+    return {
+        "salary": _text(INTERNSHALA_DETAIL_STIPEND.find(soup)),
+        "deadline": _text(INTERNSHALA_DETAIL_DEADLINE.find(soup), inner="item_body"),
+        "location": _text(INTERNSHALA_DETAIL_LOCATION.find(soup)),
+        **_posting(_text(INTERNSHALA_DETAIL_POSTED.find(soup))),
+    }
+
+def parse_naukri_detail(html):
+    soup = make_soup(html)
+    return {
+        "salary": _text(NAUKRI_DETAIL_SALARY.find(soup)),
+        "location": _text(NAUKRI_DETAIL_LOCATION.find(soup)),
+        **_posting(_text(NAUKRI_DETAIL_POSTED.find(soup))),
+    }
+
+DETAIL_PARSERS = {
+    "LinkedIn": parse_linkedin_detail,
+    "Internshala": parse_internshala_detail,
+    "Naukri.com": parse_naukri_detail,
+}
+
+def detail_url(job):
+    """The posting's own page on the configured board host, or None when we can't tell where it is"""
+    base = BOARD_BASE_URLS.get(job.source)
+    raw_id = job.job_id.partition(":")[2]
+    if job.source == "LinkedIn":
+        return f"{base}/jobs/view/{raw_id}"
+    if job.source == "Internshala":
+        return job.link if job.link.startswith(f"{base}/internship/detail/") else f"{base}/internship/detail/{raw_id}"
+    return job.link if base and job.link.startswith(base) else None
+
+def apply_details(job, details):
+    """Fill in what the card left as a placeholder; what the card did say is kept"""
+    if details.get("salary") and job.salary == NOT_MENTIONED:
+        job.salary = sys.intern(details["salary"])
+    if details.get("location") and job.location.lower() in NATIONWIDE_LOCATIONS:
+        job.location = sys.intern(details["location"])
+    if details.get("posted") and not job.posted:
+        job.posted = details["posted"]
+        job.date = sys.intern(details["date"])
+    if details.get("deadline"):
+        job.deadline = details["deadline"]
+
+class DetailEnricher:
+    """Fetches detail pages for the jobs going out, a few per source at a time, and remembers what each
+    page said by job id, so no posting's page is fetched twice across runs"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.details = json.load(f)
+        except (OSError, ValueError):
+            self.details = {}
+
+    def enrich(self, jobs, per_source=ENRICH_MAX_PER_SOURCE, deadline=ENRICH_DEADLINE_SECONDS):
+        cached = 0
+        pending = defaultdict(list)
+        for job in jobs:
+            if not job.job_id or job.source not in DETAIL_PARSERS:
+                continue
+            details = self.details.get(job.job_id)
+            if details is not None:
+                apply_details(job, details)
+                cached += 1
+                continue
+            url = detail_url(job)
+            if url and len(pending[job.source]) < per_source:
+                pending[job.source].append((job, url))
+        if not pending:
+            print(f"🔎 Details: {cached} from cache, nothing to fetch")
+            return
+        # Hosts are fetched side by side; within a host the fetch engine's rate limit and pool apply
+        stop_event = threading.Event()
+        timer = threading.Timer(deadline, stop_event.set)
+        timer.daemon = True
+        timer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="enrich") as pool:
+                fetched = sum(pool.map(lambda item: self._enrich_source(*item, stop_event), pending.items()))
+        finally:
+            timer.cancel()
+        wanted = sum(len(items) for items in pending.values())
+        print(f"🔎 Details: {cached} from cache, {fetched} of {wanted} detail pages fetched")
+
+    def _enrich_source(self, source, items, stop_event):
+        host = urlparse(BOARD_BASE_URLS[source]).netloc
+        fetched = 0
+
+        def fetch_detail(item):
+            return FETCHER.get(item[1], stop_event=stop_event, use_cache=False, timeout=15)
+
+        for (job, url), pending in FETCHER.run(fetch_detail, items, host, stop_event):
+            try:
+                response = pending.result()
+                if response.status_code != 200:
+                    # Not cached, so a later run can try again
+                    print(f"⚠️ {source} detail page returned status {response.status_code} for {job.title}")
+                    continue
+                with METRICS.timed("detail", source=source):
+                    details = DETAIL_PARSERS[source](response.text)
+            except Exception as e:
+                print(f"⚠️ Could not enrich {job.title} from {source}: {e}")
+                METRICS.count("errors_total", source=source, stage="detail")
+                continue
+            details = {field: value for field, value in details.items() if value}
+            apply_details(job, details)
+            with self.lock:
+                self.details[job.job_id] = {**details, "fetched_at": RUN_STARTED.isoformat(timespec="seconds")}
+            fetched += 1
+        return fetched
+
+    def save(self, retention_days=SEEN_RETENTION_DAYS):
+        cutoff = datetime.fromtimestamp(time.time() - retention_days * 86400).isoformat(timespec="seconds")
+        with self.lock:
+            self.details = {job_id: details for job_id, details in self.details.items() if details.get("fetched_at", "") >= cutoff}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.details, f)
+        except OSError as e:
+            print(f"⚠️ Could not save job details: {e}")
+
+DETAILS = DetailEnricher(os.path.join(STATE_DIR, "job_details.json"))
+
+# ----- Email Rendering -----
+# Gmail clips the HTML part of a message past ~102 KB and hides the rest behind "View entire message"
+EMAIL_SIZE_BUDGET = int(os.environ.get("EMAIL_SIZE_BUDGET", "100000"))
+# "split" sends the overflow as further emails, "trim" drops it and says how many didn't fit
+EMAIL_OVERFLOW = os.environ.get("EMAIL_OVERFLOW", "split")
+
+SOURCE_COLORS = {
+    "LinkedIn": "#0077B5",
+    "Indeed India": "#2557A7",
+    "Internshala": "#00A5EC",
+    "Naukri.com": "#7B68EE",
+    "Sample Data": "#95A5A6",
+}
+# Short class per source so each card only carries a few bytes of styling
+SOURCE_CLASSES = {source: f"s{n}" for n, source in enumerate(SOURCE_COLORS)}
+
+def minify_html(markup):
+    """Drop indentation and the whitespace between tags"""
+    markup = re.sub(r">\s+<", "><", markup.strip())
+    return re.sub(r"\s{2,}", " ", markup)
+
+EMAIL_CSS = """
+body{font-family:'Segoe UI',Tahoma,Geneva,Verdana,sans-serif;background-color:#f8f9fa;margin:0;padding:0}
+.container{max-width:900px;margin:0 auto;background-color:#fff;border-radius:15px;box-shadow:0 4px 20px rgba(0,0,0,.1);overflow:hidden}
+.header{background:linear-gradient(135deg,#2E86C1,#3498DB);color:#fff;padding:30px;text-align:center}
+.header h1{margin:0;font-size:28px;font-weight:300}
+.header p{margin:10px 0 0 0;opacity:.9;font-size:16px}
+.pill{background-color:rgba(255,255,255,.2);padding:5px 15px;border-radius:20px;font-size:12px}
+.summary-stats{padding:20px;background-color:#ECF0F1;text-align:center}
+.summary-stats p{margin:0;color:#34495E;font-size:14px;line-height:1.4}
+.jobs-container{padding:20px}
+.job-card{background-color:#f8f9fa;margin-bottom:20px;border-radius:12px;padding:20px;border-left:4px solid #95A5A6;box-shadow:0 2px 8px rgba(0,0,0,.05)}
+.job-title{margin:0 0 8px 0;color:#2E86C1;font-size:18px;line-height:1.3;font-weight:600}
+.badge{color:#fff;padding:2px 8px;border-radius:12px;font-size:10px;margin-left:8px;background-color:#95A5A6}
+.company-name{color:#34495E;font-size:16px;font-weight:500;margin-bottom:23px}
+.job-details{margin-bottom:15px;font-size:14px;color:#566573}
+.job-details div{margin-bottom:10px;word-wrap:break-word;overflow-wrap:break-word}
+.job-details b{font-weight:600}
+.job-details span{margin-left:5px;display:block;margin-top:2px}
+.job-details .pay{color:#27AE60}
+.cta{text-align:center}
+.apply-button{display:inline-block;background:linear-gradient(135deg,#3498DB,#2E86C1);color:#fff;padding:12px 25px;text-decoration:none;border-radius:25px;font-size:14px;font-weight:600;box-shadow:0 3px 12px rgba(46,134,193,.3);min-width:140px}
+.more{text-align:center;color:#566573;font-size:14px}
+.tips-section{background-color:#E8F6FF;padding:25px;margin:20px}
+.tips-section h3{color:#2E86C1;margin:0 0 15px 0;font-size:18px}
+.tips-section ul{color:#34495E;margin:0;padding-left:20px;line-height:1.6}
+.linkedin-tips{background-color:#E8F4FD;border-left:4px solid #0077B5}
+.linkedin-tips h3{color:#0077B5}
+.footer{text-align:center;padding:25px;background-color:#2C3E50;color:#fff}
+.footer p{margin:0;font-size:13px;opacity:.8;line-height:1.5}
+.footer div{margin-top:10px}
+.footer a{text-decoration:none}
+.tag{background-color:rgba(255,255,255,.1);padding:3px 8px;border-radius:10px;font-size:11px;color:#fff}
+.tag.platform{background-color:rgba(255,255,0,.1)}
+@media only screen and (max-width:600px){
+.container{width:100%!important;margin:0!important;padding:10px!important}
+.header{padding:20px 15px!important}
+.header h1{font-size:22px!important}
+.header p{font-size:14px!important}
+.job-card{margin:10px 0!important;padding:15px!important}
+.job-title{font-size:16px!important}
+.company-name{font-size:15px!important}
+.apply-button{width:100%!important;min-width:auto!important;padding:15px 20px!important;font-size:16px!important;box-sizing:border-box}
+.tips-section{padding:20px 15px!important;margin:10px!important}
+.tips-section h3{font-size:16px!important}
+.tips-section ul{padding-left:15px!important}
+.tips-section li{margin-bottom:8px!important;font-size:14px!important}
+.footer{padding:20px 15px!important}
+.summary-stats{padding:15px 10px!important;font-size:12px!important}
+}
+""" + "".join(f".job-card.{cls}{{border-left-color:{SOURCE_COLORS[source]}}}.badge.{cls}{{background-color:{SOURCE_COLORS[source]}}}"
+              for source, cls in SOURCE_CLASSES.items())
+
+# Built and minified once; only the $placeholders are filled in per message
+PAGE_TEMPLATE = Template(minify_html("""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Daily Internships</title>
+    <style>""" + minify_html(EMAIL_CSS).replace("\n", "") + """</style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Internships Daily Digest</h1>
+            <p>📅 $date | $count Fresh Opportunities$part</p>
+            <div style="margin-top:15px"><span class="pill">✨ Now including LinkedIn Jobs!</span></div>
+        </div>
+        <div class="summary-stats"><p>$summary</p></div>
+        <div class="jobs-container">$cards$more</div>
+        <div class="tips-section">
+            <h3>💡 Application Tips</h3>
+            <ul>
+                <li><strong>Apply Early:</strong> Most internships are filled within 48 hours of posting</li>
+                <li><strong>LinkedIn Strategy:</strong> Connect with recruiters and company employees before applying</li>
+                <li><strong>Customize Resume:</strong> Tailor your resume for each specific role and company</li>
+                <li><strong>Follow Up:</strong> Send a polite follow-up email after 1 week if no response</li>
+                <li><strong>Research Company:</strong> Show genuine interest by mentioning company-specific details</li>
+                <li><strong>Portfolio Ready:</strong> Have your GitHub, projects, and portfolio links ready</li>
+            </ul>
+        </div>
+        <div class="tips-section linkedin-tips">
+            <h3>🔗 LinkedIn Pro Tips</h3>
+            <ul>
+                <li><strong>Optimize Profile:</strong> Use internship-relevant keywords in your headline and summary</li>
+                <li><strong>Network Actively:</strong> Connect with alumni, professionals, and company employees</li>
+                <li><strong>Engage Content:</strong> Like and comment on posts from companies you want to work for</li>
+                <li><strong>Direct Messages:</strong> Send personalized messages to hiring managers (keep it brief!)</li>
+            </ul>
+        </div>
+        <div class="footer">
+            <p>🤖 Automated by GitHub Actions <br> 💪 Best of luck with your applications!</p>
+            <div><span class="tag">Made With ❤️</span></div>
+            <div><a href="https://randoman.online" target="_blank"><span class="tag platform">Check _Out_Your_Platform</span></a></div>
+        </div>
+    </div>
+</body>
+</html>
+"""))
+
+CARD_TEMPLATE = Template(minify_html("""
+<div class="job-card $cls">
+    <h3 class="job-title">$title<span class="badge $cls">$source</span></h3>
+    <div class="company-name">🏢 $company</div>
+    <div class="job-details">
+        <div><b>📍 Location:</b><span>$location</span></div>
+        <div><b>💰 Stipend:</b><span class="pay">$salary</span></div>
+        <div><b>📅 Posted:</b><span>$date</span></div>$deadline
+    </div>
+    <div class="cta"><a class="apply-button" href="$link" target="_blank">✨ Apply Now</a></div>
+</div>
+"""))
+
+TEXT_CARD_TEMPLATE = Template("""$title ($source)
+  Company:  $company
+  Location: $location
+  Stipend:  $salary
+  Posted:   $date
+$deadline  Apply:    $link
+""")
+
+# Room left for the part number and the "more jobs" note, which are filled in after packing
+PAGE_SLACK_BYTES = 300
+
+def render_card(job):
+    fields = {key: html.escape(str(getattr(job, key))) for key in ("title", "company", "location", "salary", "date", "link", "source")}
+    deadline = f"<div><b>⏳ Apply by:</b><span>{html.escape(job.deadline)}</span></div>" if job.deadline else ""
+    return CARD_TEMPLATE.substitute(fields, cls=SOURCE_CLASSES.get(job.source, ""), deadline=deadline)
+
+def render_text_card(job):
+    deadline = f"  Apply by: {job.deadline}\n" if job.deadline else ""
+    return TEXT_CARD_TEMPLATE.substitute({key: getattr(job, key) for key in ("title", "company", "location", "salary", "date", "link", "source")},
+                                         deadline=deadline)
+
+class CardCache:
+    """Each job's HTML and text card, rendered once per run however many digests include it"""
+    def __init__(self):
+        self.cards = {}
+
+    def get(self, job):
+        key = job.identity
+        if key not in self.cards:
+            self.cards[key] = (render_card(job), render_text_card(job))
+        return self.cards[key]
+
+    def html(self, job):
+        return self.get(job)[0]
+
+    def text(self, job):
+        return self.get(job)[1]
+
+CARD_CACHE = CardCache()
+
+def source_summary(jobs):
+    counts = Counter(job.source for job in jobs)
+    return " | ".join(f"{source}: {count}" for source, count in counts.items())
+
+def render_page(jobs, cards, total, part="", more=""):
+    return PAGE_TEMPLATE.substitute(
+        date=datetime.now().strftime('%B %d, %Y'), count=total, part=part,
+        summary=html.escape(source_summary(jobs)), cards="".join(cards), more=more)
+
+def render_text(jobs, total, part="", more=""):
+    header = f"Internships Daily Digest - {datetime.now().strftime('%B %d, %Y')} | {total} Fresh Opportunities{part}\n{source_summary(jobs)}\n\n"
+    return header + "\n".join(CARD_CACHE.text(job) for job in jobs) + (f"\n{more}\n" if more else "")
+
+def render_digest(jobs, budget=EMAIL_SIZE_BUDGET, overflow=EMAIL_OVERFLOW):
+    """[(jobs, html, text)], one per email, each HTML part kept under `budget` bytes"""
+    cards = [CARD_CACHE.html(job) for job in jobs]
+    chrome = len(render_page(jobs, [], len(jobs)).encode()) + PAGE_SLACK_BYTES
+    # Pack cards greedily; every email gets at least one card even if that one alone is too big
+    batches = [[]]
+    size = chrome
+    for job, card in zip(jobs, cards):
+        card_size = len(card.encode())
+        if batches[-1] and size + card_size > budget:
+            batches.append([])
+            size = chrome
+        batches[-1].append((job, card))
+        size += card_size
+
+    if overflow == "trim" and len(batches) > 1:
+        dropped = sum(len(batch) for batch in batches[1:])
+        print(f"✂️ Digest trimmed to {len(batches[0])} jobs to stay under {budget} bytes, {dropped} left out")
+        kept = [job for job, _ in batches[0]]
+        more = f"+ {dropped} more opportunities didn't fit in this email"
+        page = render_page(kept, [card for _, card in batches[0]], len(jobs), more=f'<p class="more">{more}</p>')
+        return [(kept, page, render_text(kept, len(jobs), more=more))]
+
+    messages = []
+    for number, batch in enumerate(batches, 1):
+        batch_jobs = [job for job, _ in batch]
+        part = f" | Part {number} of {len(batches)}" if len(batches) > 1 else ""
+        page = render_page(batch_jobs, [card for _, card in batch], len(jobs), part=part)
+        messages.append((batch_jobs, page, render_text(batch_jobs, len(jobs), part=part)))
+    if len(messages) > 1:
+        print(f"✂️ Digest split into {len(messages)} emails to stay under {budget} bytes each")
+    return messages
+
+# ----- Personalised Digests -----
+# Title words that put a job in a branch, following the groups of scrape_linkedin's keyword list
+BRANCH_KEYWORDS = {
+    "cs": ["software", "developer", "development", "data", "machine learning", "ai", "artificial intelligence", "python",
+           "full stack", "backend", "frontend", "web", "mobile app", "devops", "cyber", "cloud", "database", "computer"],
+    "mechanical": ["mechanical", "cad", "manufacturing", "production", "quality", "automotive", "robotics", "hvac", "design engineer"],
+    "electrical": ["electrical", "electronics", "power systems", "control systems", "embedded", "vlsi", "hardware", "circuit", "instrumentation"],
+    "civil": ["civil", "structural", "construction", "site engineer", "project engineer", "environmental engineer", "transportation",
+              "water resources", "surveying"],
+    "chemical": ["chemical", "process engineer", "petrochemical", "pharmaceutical engineer", "food engineer"],
+    "business": ["business", "marketing", "sales", "hr", "human resources", "finance", "operations", "consulting", "strategy", "brand"],
+    "science": ["research", "lab", "biotech", "pharmaceutical", "chemistry", "physics", "biology", "environmental science"],
+    "design": ["graphic", "ui ux", "ux", "product design", "architecture", "interior", "fashion"],
+}
+# Locations that don't name a city; they match every city filter
+NATIONWIDE_LOCATIONS = {"", "india", "pan india", "anywhere in india", "multiple locations"}
+
+def job_branches(job):
+    title = f" {' '.join(_words(job.title_key))} "
+    branches = {branch for branch, words in BRANCH_KEYWORDS.items() if any(f" {word} " in title for word in words)}
+    return branches or {"other"}
+
+def job_city(job):
+    city = " ".join(_words(job.location.split(",")[0]))
+    if city in NATIONWIDE_LOCATIONS:
+        return ""
+    if city in ("work from home", "wfh"):
+        return "remote"
+    return CITY_ALIASES.get(city, city)
+
+class Subscription:
+    """What one recipient wants: any of their branches, in any of their cities, from any of their sources"""
+    def __init__(self, branches=(), cities=(), sources=()):
+        self.branches = frozenset(branch.strip().lower() for branch in branches)
+        self.cities = frozenset(CITY_ALIASES.get(city.strip().lower(), city.strip().lower()) for city in cities)
+        self.sources = frozenset(source.strip().lower() for source in sources)
+
+    def is_everything(self):
+        return not (self.branches or self.cities or self.sources)
+
+def load_subscriptions():
+    """{email: Subscription} from SUBSCRIPTIONS or SUBSCRIPTIONS_FILE"""
+    raw = SUBSCRIPTIONS
+    if not raw and SUBSCRIPTIONS_FILE:
+        try:
+            with open(SUBSCRIPTIONS_FILE) as f:
+                raw = f.read()
+        except OSError as e:
+            print(f"⚠️ Could not read {SUBSCRIPTIONS_FILE}: {e}")
+    if not raw:
+        return {}
+    try:
+        entries = json.loads(raw)
+    except ValueError as e:
+        print(f"⚠️ Ignoring subscriptions, they aren't valid JSON: {e}")
+        return {}
+    return {email.strip(): Subscription(entry.get("branches", ()), entry.get("cities", ()), entry.get("sources", ()))
+            for email, entry in entries.items()}
+
+class JobIndex:
+    """Branch, city and source index over the run's ranked jobs"""
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.by_branch = {}
+        self.by_city = {}
+        self.by_source = {}
+        for position, job in enumerate(jobs):
+            for branch in job_branches(job):
+                self.by_branch.setdefault(branch, set()).add(position)
+            self.by_city.setdefault(job_city(job), set()).add(position)
+            self.by_source.setdefault(job.source.lower(), set()).add(position)
+
+    def _union(self, index, keys):
+        return set().union(*(index.get(key, ()) for key in keys))
+
+    def matching(self, subscription, size=DIGEST_SIZE, exclude=frozenset()):
+        """The best `size` jobs for one subscription, in ranking order, skipping the positions in `exclude`"""
+        if subscription.is_everything():
+            if not exclude:
+                return self.jobs[:size]
+            return list(islice((job for position, job in enumerate(self.jobs) if position not in exclude), size))
+        positions = self.positions(subscription) - exclude
+        return [self.jobs[position] for position in sorted(positions)[:size]]
+
+    def positions(self, subscription):
+        """Positions of every job the subscription picks, however many"""
+        if subscription.is_everything():
+            return set(range(len(self.jobs)))
+        selected = []
+        if subscription.branches:
+            selected.append(self._union(self.by_branch, subscription.branches))
+        if subscription.cities:
+            selected.append(self._union(self.by_city, subscription.cities | {""}))
+        if subscription.sources:
+            # "naukri" matches "naukri.com", "indeed" matches "indeed india"
+            sources = [name for name in self.by_source if any(name.startswith(wanted) for wanted in subscription.sources)]
+            selected.append(self._union(self.by_source, sources))
+        # Smallest set first, so no intersection walks more positions than the narrowest filter kept
+        return set.intersection(*sorted(selected, key=len))
+
+def all_recipients(subscriptions):
+    return RECEIVER_EMAILS + [email for email in subscriptions if email not in RECEIVER_EMAILS]
+
+def positions_received(jobs, received):
+    """{recipient: positions in jobs} from SeenJobsStore.received"""
+    had = defaultdict(set)
+    for position, job in enumerate(jobs):
+        for recipient in received.get(job.identity, ()):
+            had[recipient].add(position)
+    return had
+
+def plan_digests(jobs, recipients, subscriptions, received=None):
+    """[(jobs, recipients)]: recipients whose filters pick out the same jobs share one digest, and nobody is
+    picked a job they `received` before. Also returns the identities of the jobs someone's filters picked
+    that didn't fit in their digest, which are still owed to them."""
+    everything = Subscription()
+    index = JobIndex(jobs)
+    had = positions_received(jobs, received or {})
+    groups = {}
+    left_out = set()
+    for recipient in recipients:
+        subscription = subscriptions.get(recipient, everything)
+        picked = index.matching(subscription, exclude=had[recipient])
+        if len(picked) == DIGEST_SIZE:
+            left_out |= {jobs[position].identity for position in index.positions(subscription) - had[recipient]}
+            left_out -= {job.identity for job in picked}
+        key = tuple(job.identity for job in picked)
+        groups.setdefault(key, (picked, []))[1].append(recipient)
+    digests = []
+    for picked, members in groups.values():
+        if picked:
+            digests.append((picked, members))
+        else:
+            print(f"ℹ️ Nothing new matches the subscriptions of {len(members)} recipients, skipping them")
+    return digests, left_out
+
+def still_owed(jobs, recipients, subscriptions, received):
+    """Identities of the jobs some recipient's filters pick that they haven't received yet"""
+    everything = Subscription()
+    index = JobIndex(jobs)
+    had = positions_received(jobs, received)
+    owed = set()
+    for recipient in recipients:
+        owed |= index.positions(subscriptions.get(recipient, everything)) - had[recipient]
+    return {jobs[position].identity for position in owed}
+
+# ----- Stage Artifacts -----
+# scrape -> jobs.jsonl -> render -> messages.jsonl -> send, so a template fix or an SMTP outage only
+# reruns the stages after it. Bumped whenever a layout changes, so no stage misreads another version.
+ARTIFACT_VERSION = 1
+JOBS_ARTIFACT = os.path.join(ARTIFACT_DIR, "jobs.jsonl")
+MESSAGES_ARTIFACT = os.path.join(ARTIFACT_DIR, "messages.jsonl")
+
+def write_artifact(path, kind, header, records):
+    """A header line ({"version", "kind", ...}) and then one JSON object per record"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Written aside and moved into place, so the next stage never reads half an artifact
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": ARTIFACT_VERSION, "kind": kind, **header}) + "\n")
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+def read_artifact(path, kind):
+    """(header, records) of an artifact; ValueError if it is some other kind or version"""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("kind") != kind or header.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"expected {kind} artifact version {ARTIFACT_VERSION}, found {header.get('kind')} "
+                             f"version {header.get('version')}")
+        return header, [json.loads(line) for line in f]
+
+def stage_input(path, kind, stage):
+    try:
+        return read_artifact(path, kind)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ Could not read {path} ({e}); run `main.py {stage}` first")
+
+# ----- Sharded Runs -----
+SHARD_FILE = re.compile(r"shard-(\d+)-of-(\d+)\.jsonl")
+
+def parse_shard(value):
+    """(index, count) from an "index/count" given to --shard or SHARD"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT (from --shard or SHARD), like 1/4, not {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"the index must be at least 0 and below the count, not {value!r}")
+    return index, count
+
+def setup(shard):
+    """Make this process the given shard: it keeps its own state and metrics directories, and the stateful
+    singletons built at import from the shared ones are loaded again from its own"""
+    global SHARD_INDEX, SHARD_COUNT, SHARD_NAME, STATE_DIR, METRICS_DIR, PROFILE_DIR
+    global RESPONSE_CACHE, BREAKERS, QUERY_PLANNER, DETAILS
+    SHARD_INDEX, SHARD_COUNT = shard
+    if SHARD_COUNT == 1:
+        return
+    SHARD_NAME = f"shard-{SHARD_INDEX}-of-{SHARD_COUNT}"
+    STATE_DIR = os.path.join(STATE_DIR, SHARD_NAME)
+    if METRICS_DIR:
+        METRICS_DIR = os.path.join(METRICS_DIR, SHARD_NAME)
+    PROFILE_DIR = os.environ.get("PROFILE_DIR") or os.path.join(METRICS_DIR or ".", "profile")
+    RESPONSE_CACHE = ResponseCache(os.path.join(STATE_DIR, "http_cache"))
+    BREAKERS = CircuitBreakerRegistry(os.path.join(STATE_DIR, "circuit_breakers.json"))
+    SELECTORS.load(os.path.join(STATE_DIR, "selector_stats.json"))
+    QUERY_PLANNER = QueryPlanner(os.path.join(STATE_DIR, "query_schedule.json"))
+    QUERY_PLANNER.adopt_watermarks(os.path.join(SHARED_STATE_DIR, "query_schedule.json"))
+    DETAILS = DetailEnricher(os.path.join(STATE_DIR, "job_details.json"))
+
+def write_shard(pipeline, runs):
+    """Every distinct job this shard found (the best copy of each), one JSON object per line after a header"""
+    path = os.path.join(SHARD_DIR, f"{SHARD_NAME}.jsonl")
+    header = {
+        "shard": SHARD_INDEX,
+        "count": SHARD_COUNT,
+        "started": RUN_STARTED.isoformat(timespec="seconds"),
+        "sources": {run.name: run.found for run in runs},
+        # The merge moves the watermarks, since only it knows which jobs go out
+        "posted": QUERY_PLANNER.export_posted(),
+    }
+    write_artifact(path, "shard", header, (job.to_dict() for job in pipeline.kept))
+    print(f"📦 {SHARD_NAME}: wrote {len(pipeline.kept)} distinct jobs to {path}")
+
+def load_shards(pipeline):
+    """Feed every shard file in SHARD_DIR through the pipeline, which dedups across shards and drops what
+    an earlier digest already carried"""
+    try:
+        names = [match for match in map(SHARD_FILE.fullmatch, os.listdir(SHARD_DIR)) if match]
+    except OSError:
+        names = []
+    found = Counter()
+    loaded = set()
+    expected = 0
+    for match in sorted(names, key=lambda match: (int(match.group(2)), int(match.group(1)))):
+        try:
+            header, records = read_artifact(os.path.join(SHARD_DIR, match.group(0)), "shard")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Skipping {match.group(0)}: {e}")
+            continue
+        for record in records:
+            pipeline.add(Job.from_dict(record))
+        QUERY_PLANNER.import_posted(header.get("posted", {}))
+        loaded.add(header["shard"])
+        expected = max(expected, header["count"])
+        found.update(header["sources"])
+    missing = sorted(set(range(expected)) - loaded)
+    if missing:
+        print(f"⚠️ Shards {', '.join(map(str, missing))} of {expected} are missing, merging without them")
+    print(f"📦 Merged {len(loaded)} shards from {SHARD_DIR}: {pipeline.received} distinct jobs, {len(pipeline.kept)} after deduplication")
+    for source, count in found.items():
+        METRICS.gauge("source_jobs", count, source=source)
+        print(f"✅ {source}: Added {count} jobs")
+
+def run_local_shards(count, argv=()):
+    """Run `count` shard processes side by side, like the workflow's matrix does, before this one merges them"""
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    for name in os.listdir(SHARD_DIR):
+        if SHARD_FILE.fullmatch(name):
+            os.remove(os.path.join(SHARD_DIR, name))
+    print(f"🧩 Starting {count} shards...")
+    workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "scrape", f"--shard={index}/{count}", *argv])
+               for index in range(count)]
+    failed = [index for index, worker in enumerate(workers) if worker.wait()]
+    if failed:
+        print(f"⚠️ Shards {', '.join(map(str, failed))} exited with an error")
+
 # ----- Main Execution -----
-def main():
+def scrape(merge=False):
+    """Collect (or, with merge, read the shards' jobs), dedup and rank, and write the jobs going out to
+    jobs.jsonl; a shard writes everything it found to SHARD_DIR instead. Returns how many jobs go out."""
     print(f"🤖 Starting comprehensive India internship scraper at {datetime.now()}")
     
-    all_jobs = []
-    
+    # A shard only reads the store the last merge left behind, to tell which of its jobs are new; the
+    # merge decides again and is the only one to update it
+    sharded = SHARD_COUNT > 1
+    seen_path = os.path.join(SHARED_STATE_DIR, "seen_jobs.sqlite3")
+    if not sharded:
+        seen_store = SeenJobsStore(seen_path)
+    else:
+        seen_store = SeenJobsStore(seen_path, read_only=True) if os.path.exists(seen_path) else None
+    expired = seen_store.expire() if seen_store and not sharded else 0
+    if expired:
+        print(f"🧹 Forgot {expired} jobs not seen in the last {SEEN_RETENTION_DAYS} days")
+
     # Scrape from multiple sources including LinkedIn
     sources = [
         ("LinkedIn", scrape_linkedin),
         ("Indeed India", scrape_indeed),
         ("Internshala", scrape_internshala),
-        ("Naukri", scrape_naukri)
+        ("Naukri.com", scrape_naukri)
     ]
     
-    for source_name, scrape_func in sources:
-        try:
-            print(f"\n🎯 Starting {source_name} scraping...")
-            jobs = scrape_func()
-            all_jobs.extend(jobs)
-            print(f"✅ {source_name}: Added {len(jobs)} jobs")
-        except Exception as e:
-            print(f"❌ {source_name} completely failed: {e}")
-            continue
-    
+    subscriptions = load_subscriptions()
+    personalised = any(not subscriptions[email].is_everything() for email in subscriptions)
+
+    # Exact and near duplicates are dropped as jobs stream in (keeping the copy from the best-ranked
+    # source), along with everything an earlier digest already carried. A shard without a seen-jobs store
+    # can't tell which of its jobs are new, so it never knows the digest is full and collects everything.
+    pipeline = DigestPipeline(seen_store, early_stop=not personalised and seen_store is not None)
+    if merge:
+        load_shards(pipeline)
+    else:
+        with profiled("collect"):
+            runs = list(run_sources(sources, pipeline))
+        for run in runs:
+            METRICS.gauge("source_jobs", run.found, source=run.name)
+            if run.error and not run.found:
+                print(f"❌ {run.name} completely failed: {run.error}")
+                continue
+            print(f"✅ {run.name}: Added {run.found} jobs")
+        SELECTORS.save()
+        BREAKERS.save()
+        print(f"🧭 Queries: {QUERY_PLANNER.summary()}")
+        RESPONSE_CACHE.prune()
+        print(f"🔌 HTTP: {CONNECTION_STATS.summary()}")
+        if sharded:
+            # A shard can't tell which of its jobs go out: the merge moves its watermarks from what it wrote
+            QUERY_PLANNER.save()
+            write_shard(pipeline, runs)
+            if seen_store:
+                seen_store.close()
+            return 0
+
     # If no jobs found, use sample data
-    if not all_jobs:
+    using_sample_data = not pipeline.received
+    if using_sample_data:
         print("ℹ️ No jobs found from any source, using sample data")
-        all_jobs = get_sample_jobs()
+        pipeline = DigestPipeline()
+        for job in get_sample_jobs():
+            pipeline.add(job)
 
-    # Remove duplicates and sort by date
-    unique_jobs = []
-    seen_jobs = set()
-    
-    for job in all_jobs:
-        job_key = f"{job['title'].lower().strip()}-{job['company'].lower().strip()}"
-        if job_key not in seen_jobs:
-            seen_jobs.add(job_key)
-            unique_jobs.append(job)
-    
-    # Sort by source priority and limit results
-    priority_order = {"LinkedIn": 1, "Indeed India": 2, "Internshala": 3, "Naukri.com": 4, "Sample Data": 5}
-    unique_jobs.sort(key=lambda x: priority_order.get(x['source'], 6))
-    final_jobs = unique_jobs[:35]  # Increased limit to accommodate LinkedIn jobs
+    # Limit results; with subscriptions every new job is a candidate and each digest is capped on its own
+    final_jobs = pipeline.selected(len(pipeline.kept) if personalised else None)
+
+    # Searches only skip past postings that are going out now or went out before; after a merge these are
+    # the watermarks the next run's shards adopt. With subscriptions each recipient only gets their best
+    # DIGEST_SIZE matches, so a job that didn't fit in someone's digest doesn't count as going out.
+    going_out = final_jobs
+    if personalised and not using_sample_data:
+        _, left_out = plan_digests(final_jobs, all_recipients(subscriptions), subscriptions, seen_store.received(final_jobs))
+        going_out = [job for job in final_jobs if job.identity not in left_out]
+    QUERY_PLANNER.advance_watermarks(pipeline.settled(going_out))
+    QUERY_PLANNER.save()
 
     print(f"\n📊 Final Summary:")
-    print(f"Total jobs scraped: {len(all_jobs)}")
-    print(f"Unique jobs after deduplication: {len(unique_jobs)}")
+    print(f"Total jobs scraped: {pipeline.received}")
+    print(f"Unique jobs after deduplication: {len(pipeline.kept)}")
+    print(f"New since the last digest: {pipeline.new_count()}")
     print(f"Jobs to be sent in email: {len(final_jobs)}")
+    METRICS.gauge("jobs_received", pipeline.received)
+    METRICS.gauge("jobs_unique", len(pipeline.kept))
+    METRICS.gauge("jobs_new", pipeline.new_count())
+    METRICS.gauge("jobs_selected", len(final_jobs))
 
-    # Create mobile-responsive email content
-    job_rows = []
-    for job in final_jobs:
-        # Add source badge styling
-        source_color = {
-            "LinkedIn": "#0077B5",
-            "Indeed India": "#2557A7", 
-            "Internshala": "#00A5EC",
-            "Naukri.com": "#7B68EE",
-            "Sample Data": "#95A5A6"
-        }
-        
-        source_badge = f'<span style="background-color: {source_color.get(job["source"], "#95A5A6")}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 10px; margin-left: 8px;">{job["source"]}</span>'
-        
-        # Mobile-responsive job card layout
-        job_row = f"""
-        <div style="background-color: #f8f9fa; margin-bottom: 20px; border-radius: 12px; padding: 20px; border-left: 4px solid {source_color.get(job["source"], "#95A5A6")}; box-shadow: 0 2px 8px rgba(0,0,0,0.05);">
-            <div style="margin-bottom: 15px;">
-                <h3 style="margin: 0 0 8px 0; color: #2E86C1; font-size: 18px; line-height: 1.3; font-weight: 600;">
-                    {job['title']}{source_badge}
-                </h3>
-                <div style="color: #34495E; font-size: 16px; font-weight: 500; margin-bottom: 8px;">
-                    🏢 {job['company']}
-                </div>
-            </div>
-            
-            <div style="display: block; margin-bottom: 15px; font-size: 14px; color: #566573;">
-                <div style="margin-bottom: 10px; word-wrap: break-word; overflow-wrap: break-word;">
-                    <span style="font-weight: 600;">📍 Location:</span><br>
-                    <span style="margin-left: 5px; display: block; margin-top: 2px;">{job['location']}</span>
-                </div>
-                <div style="margin-bottom: 10px; word-wrap: break-word; overflow-wrap: break-word;">
-                    <span style="font-weight: 600;">💰 Stipend:</span><br>
-                    <span style="margin-left: 5px; color: #27AE60; display: block; margin-top: 2px;">{job['salary']}</span>
-                </div>
-                <div style="margin-bottom: 10px; word-wrap: break-word; overflow-wrap: break-word;">
-                    <span style="font-weight: 600;">📅 Posted:</span><br>
-                    <span style="margin-left: 5px; display: block; margin-top: 2px;">{job['date']}</span>
-                </div>
-            </div>
-            
-            <div style="text-align: center;">
-                <a href="{job['link']}" target="_blank" style="
-                    display: inline-block;
-                    background: linear-gradient(135deg, #3498DB, #2E86C1);
-                    color: white;
-                    padding: 12px 25px;
-                    text-decoration: none;
-                    border-radius: 25px;
-                    font-size: 14px;
-                    font-weight: 600;
-                    box-shadow: 0 3px 12px rgba(46, 134, 193, 0.3);
-                    transition: all 0.3s ease;
-                    min-width: 140px;
-                ">
-                    ✨ Apply Now
-                </a>
-            </div>
-        </div>
-        """
-        job_rows.append(job_row)
-
-    # Count jobs by source for summary
-    source_counts = {}
-    for job in final_jobs:
-        source = job['source']
-        source_counts[source] = source_counts.get(source, 0) + 1
-
-    source_summary = " | ".join([f"{source}: {count}" for source, count in source_counts.items()])
-
-    # Mobile-responsive email template
-    email_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Daily Internships</title>
-        <style>
-            /* Mobile-first responsive styles */
-            @media only screen and (max-width: 600px) {{
-                .container {{
-                    width: 100% !important;
-                    margin: 0 !important;
-                    padding: 10px !important;
-                }}
-                .header {{
-                    padding: 20px 15px !important;
-                }}
-                .header h1 {{
-                    font-size: 22px !important;
-                }}
-                .header p {{
-                    font-size: 14px !important;
-                }}
-                .job-card {{
-                    margin: 10px 0 !important;
-                    padding: 15px !important;
-                }}
-                .job-title {{
-                    font-size: 16px !important;
-                }}
-                .company-name {{
-                    font-size: 15px !important;
-                }}
-                .job-details {{
-                    flex-direction: column !important;
-                    gap: 10px !important;
-                }}
-                .job-detail-item {{
-                    min-width: auto !important;
-                    margin-bottom: 8px !important;
-                }}
-                .apply-button {{
-                    width: 100% !important;
-                    min-width: auto !important;
-                    padding: 15px 20px !important;
-                    font-size: 16px !important;
-                    box-sizing: border-box;
-                }}
-                .platform-grid {{
-                    flex-direction: column !important;
-                    gap: 10px !important;
-                }}
-                .platform-item {{
-                    flex: none !important;
-                    min-width: auto !important;
-                    margin-bottom: 5px !important;
-                }}
-                .tips-section {{
-                    padding: 20px 15px !important;
-                    margin: 10px !important;
-                }}
-                .tips-section h3 {{
-                    font-size: 16px !important;
-                }}
-                .tips-section ul {{
-                    padding-left: 15px !important;
-                }}
-                .tips-section li {{
-                    margin-bottom: 8px !important;
-                    font-size: 14px !important;
-                }}
-                .footer {{
-                    padding: 20px 15px !important;
-                }}
-                .summary-stats {{
-                    padding: 15px 10px !important;
-                    font-size: 12px !important;
-                }}
-            }}
-        </style>
-    </head>
-    <body style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f8f9fa; margin: 0; padding: 0;">
-        <div class="container" style="max-width: 900px; margin: 0 auto; background-color: white; border-radius: 15px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); overflow: hidden;">
-            <!-- Header -->
-            <div class="header" style="background: linear-gradient(135deg, #2E86C1, #3498DB); color: white; padding: 30px; text-align: center;">
-                <h1 style="margin: 0; font-size: 28px; font-weight: 300;">Internships Daily Digest</h1>
-                <p style="margin: 10px 0 0 0; opacity: 0.9; font-size: 16px;">📅 {datetime.now().strftime('%B %d, %Y')} | {len(final_jobs)} Fresh Opportunities</p>
-                <div style="margin-top: 15px;">
-                    <span style="background-color: rgba(255,255,255,0.2); padding: 5px 15px; border-radius: 20px; font-size: 12px;">✨ Now including LinkedIn Jobs!</span>
-                </div>
-            </div>
-            
-            <!-- Summary Stats -->
-            <div class="summary-stats" style="padding: 20px; background-color: #ECF0F1; text-align: center;">
-                <p style="margin: 0; color: #34495E; font-size: 14px; line-height: 1.4;">{source_summary}</p>
-            </div>
-            
-            <!-- Jobs Container - Mobile Responsive Cards -->
-            <div class="jobs-container" style="padding: 20px;">
-                {''.join(job_rows)}
-            </div>
-            
-            <!-- Footer Tips -->
-            <div class="tips-section" style="background-color: #E8F6FF; padding: 25px; margin: 20px;">
-                <h3 style="color: #2E86C1; margin: 0 0 15px 0; font-size: 18px;">💡 Application Tips</h3>
-                <ul style="color: #34495E; margin: 0; padding-left: 20px; line-height: 1.6;">
-                    <li><strong>Apply Early:</strong> Most internships are filled within 48 hours of posting</li>
-                    <li><strong>LinkedIn Strategy:</strong> Connect with recruiters and company employees before applying</li>
-                    <li><strong>Customize Resume:</strong> Tailor your resume for each specific role and company</li>
-                    <li><strong>Follow Up:</strong> Send a polite follow-up email after 1 week if no response</li>
-                    <li><strong>Research Company:</strong> Show genuine interest by mentioning company-specific details</li>
-                    <li><strong>Portfolio Ready:</strong> Have your GitHub, projects, and portfolio links ready</li>
-                </ul>
-            </div>
-            
-            <!-- LinkedIn Tips -->
-            <div class="tips-section" style="background-color: #E8F4FD; padding: 25px; margin: 20px; border-left: 4px solid #0077B5;">
-                <h3 style="color: #0077B5; margin: 0 0 15px 0; font-size: 18px;">🔗 LinkedIn Pro Tips</h3>
-                <ul style="color: #34495E; margin: 0; padding-left: 20px; line-height: 1.6;">
-                    <li><strong>Optimize Profile:</strong> Use internship-relevant keywords in your headline and summary</li>
-                    <li><strong>Network Actively:</strong> Connect with alumni, professionals, and company employees</li>
-                    <li><strong>Engage Content:</strong> Like and comment on posts from companies you want to work for</li>
-                    <li><strong>Direct Messages:</strong> Send personalized messages to hiring managers (keep it brief!)</li>
-                </ul>
-            </div>
-            
-            <!-- Footer -->
-            <div class="footer" style="text-align: center; padding: 25px; background-color: #2C3E50; color: white;">
-                <p style="margin: 0; font-size: 13px; opacity: 0.8; line-height: 1.5;">
-                    🤖 Automated by GitHub Actions <br>
-                    💪 Best of luck with your applications! 
-                </p>
-                <div style="margin-top: 10px;">
-                    <span style="background-color: rgba(255,255,255,0.1); padding: 3px 8px; border-radius: 10px; font-size: 11px;">Made With ❤️</span>
-                </div>
-                <div style="margin-top: 10px;">
-                 <a href="https://randoman.online" target="_blank" style="text-decoration: none;">
-                    <span style="background-color: rgba(255, 255, 0, 0.1); padding: 3px 8px; border-radius: 10px; font-size: 11px;">Check _Out_Your_Platform</span>
-                    </a>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+    if final_jobs and ENRICH_DETAILS:
+        with METRICS.timed("enrich"), profiled("enrich"):
+            DETAILS.enrich(final_jobs)
+        DETAILS.save()
+    # Written even when empty, so a later render never picks up an earlier run's jobs
+    header = {"started": RUN_STARTED.isoformat(timespec="seconds"), "sample": using_sample_data}
+    write_artifact(JOBS_ARTIFACT, "jobs", header, (job.to_dict() for job in final_jobs))
+    if not final_jobs:
+        print("ℹ️ Nothing new since the last digest, skipping the email")
+    seen_store.close()
+    return len(final_jobs)
+
+def render():
+    """Plan the digests for jobs.jsonl and render them into messages.jsonl. Returns how many messages."""
+    header, records = stage_input(JOBS_ARTIFACT, "jobs", "scrape")
+    final_jobs = [Job.from_dict(record) for record in records]
+    subscriptions = load_subscriptions()
+    recipients = all_recipients(subscriptions)
+    personalised = any(not subscriptions[email].is_everything() for email in subscriptions)
+    if personalised:
+        seen_store = SeenJobsStore(os.path.join(STATE_DIR, "seen_jobs.sqlite3"))
+        digests, _ = plan_digests(final_jobs, recipients, subscriptions, seen_store.received(final_jobs))
+        seen_store.close()
+        print(f"👥 {len(digests)} different digests for {len(recipients)} recipients")
+    else:
+        digests = [(final_jobs, recipients)]
 
-    send_email(" Daily Internships - Latest Opportunities ", email_content)
-    print("🎉 Email sent successfully! Process completed.")
+    # Mobile-responsive digest, split over several emails if it wouldn't fit under Gmail's clipping limit
+    messages = []
+    for digest_jobs, digest_recipients in digests:
+        if not digest_jobs:
+            continue
+        with METRICS.timed("render"), profiled("render"):
+            rendered = render_digest(digest_jobs)
+        for number, (jobs, html_body, text_body) in enumerate(rendered, 1):
+            subject = " Daily Internships - Latest Opportunities "
+            if len(rendered) > 1:
+                subject += f"({number}/{len(rendered)}) "
+            messages.append({
+                "subject": subject,
+                "html": html_body,
+                "text": text_body,
+                "recipients": digest_recipients,
+                "jobs": [job.to_dict() for job in jobs],
+                "sent": False,
+            })
+    write_artifact(MESSAGES_ARTIFACT, "messages", {"started": header["started"], "sample": header["sample"]}, messages)
+    print(f"🎨 Rendered {len(final_jobs)} jobs into {len(messages)} messages in {MESSAGES_ARTIFACT}")
+    return len(messages)
+
+def send():
+    """Deliver every message in messages.jsonl that hasn't gone out yet and remember its jobs as emailed.
+    Safe to rerun after a failure: only the messages that failed are tried again."""
+    header, messages = stage_input(MESSAGES_ARTIFACT, "messages", "render")
+    pending = [message for message in messages if not message["sent"]]
+    if not pending:
+        print(f"ℹ️ Nothing left to send in {MESSAGES_ARTIFACT}")
+        return
+    seen_store = SeenJobsStore(os.path.join(STATE_DIR, "seen_jobs.sqlite3"))
+    subscriptions = load_subscriptions()
+    personalised = any(not subscriptions[email].is_everything() for email in subscriptions)
+    delivered = {}
+    deliveries = []
+    for message in pending:
+        with profiled("send"):
+            outstanding = send_email(message["subject"], message["html"], message["text"], message["recipients"])
+        if personalised and outstanding is not None:
+            got_it = [recipient for recipient in message["recipients"] if recipient not in outstanding]
+            jobs = [Job.from_dict(job) for job in message["jobs"]]
+            deliveries.extend((job, recipient) for job in jobs for recipient in got_it)
+            if got_it:
+                delivered.update((job.identity, job) for job in jobs)
+        # Whoever already has it isn't sent it again when `main.py send` retries this message
+        if outstanding:
+            message["recipients"] = outstanding
+        message["sent"] = outstanding == []
+        if message["sent"]:
+            if not personalised:
+                delivered.update((job.identity, job) for job in map(Job.from_dict, message["jobs"]))
+            METRICS.count("emails_total", outcome="sent")
+        else:
+            METRICS.count("emails_total", outcome="failed")
+    write_artifact(MESSAGES_ARTIFACT, "messages", {"started": header["started"], "sample": header["sample"]}, messages)
+    if delivered and not header["sample"]:
+        if personalised:
+            # Emailed for good once nobody whose filters pick it is still owed it
+            seen_store.remember_sent(deliveries)
+            jobs = list(delivered.values())
+            owed = still_owed(jobs, all_recipients(subscriptions), subscriptions, seen_store.received(jobs))
+            delivered = {identity: job for identity, job in delivered.items() if identity not in owed}
+        seen_store.remember(list(delivered.values()))
+    SMTP_DELIVERY.close()
+    unsent = sum(not message["sent"] for message in messages)
+    if unsent:
+        print(f"⚠️ {unsent} messages were not sent; `main.py send` retries just those")
+    else:
+        print("🎉 Email sent successfully! Process completed.")
+    seen_store.close()
+
+def run_all(merge=False):
+    if scrape(merge) and render():
+        send()
+
+STAGES = {
+    "scrape": "collect, dedup and rank jobs into jobs.jsonl",
+    "render": "render jobs.jsonl into the emails in messages.jsonl",
+    "send": "deliver messages.jsonl, retrying only what didn't go out",
+    "run-all": "all three (the default)",
+}
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Indian internship boards and email a digest of the new postings",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(f"  {stage:<8} {summary}" for stage, summary in STAGES.items()))
+    parser.add_argument("stage", nargs="?", default="run-all", choices=STAGES, help="which stage to run")
+    parser.add_argument("--merge", action="store_true", help="scrape the shard files in SHARD_DIR instead of the boards")
+    parser.add_argument("--shards", type=int, default=0, metavar="N", help="run N shards side by side, then merge them")
+    parser.add_argument("--shard", type=parse_shard, default=os.environ.get("SHARD", "0/1"), metavar="INDEX/COUNT",
+                        help="scrape only this shard's searches (default: SHARD, or 0/1)")
+    parser.add_argument("--profile", action="store_true", help="write per-stage cProfile stats and allocations to PROFILE_DIR")
+    args = parser.parse_args(argv)
+    if args.shard[1] > 1 and (args.stage in ("render", "send") or args.merge or args.shards):
+        parser.error("a shard only scrapes; merging, rendering and sending happen in one process after all shards")
+    return args
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    setup(args.shard)
+    if PROFILE or args.profile:
+        enable_profiling()
+    if args.shards:
+        run_local_shards(args.shards, ["--profile"] if args.profile else [])
+    merge = args.merge or bool(args.shards)
+    try:
+        if args.stage == "scrape":
+            scrape(merge)
+        elif args.stage == "render":
+            render()
+        elif args.stage == "send":
+            send()
+        else:
+            run_all(merge)
+    finally:
+        # A stage run on its own reports next to the full run's report rather than over it
+        METRICS.write(os.path.join(METRICS_DIR, args.stage) if METRICS_DIR and args.stage != "run-all" else None)
+        if PROFILER:
+            PROFILER.write()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
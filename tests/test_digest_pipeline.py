@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+def make_job(source, job_id, title="Backend Developer Intern", company="Acme Technologies"):
+    return main.Job(title, company, "Pune, India", "₹10,000", f"https://example.com/{job_id}", source, job_id=job_id)
+
+def emailed(*jobs):
+    store = main.SeenJobsStore(":memory:")
+    store.remember(jobs)
+    return store
+
+def test_emailed_copy_replaced_by_better_ranked_one_stays_seen():
+    naukri = make_job("Naukri.com", "n1")
+    linkedin = make_job("LinkedIn", "l1", title="Backend Developer Intern (Python)")
+    for order in ([naukri, linkedin], [linkedin, naukri]):
+        pipeline = main.DigestPipeline(emailed(naukri))
+        for job in order:
+            pipeline.add(job)
+        assert pipeline.kept == [linkedin]
+        assert pipeline.new == [False]
+        assert pipeline.selected() == []
+        assert not +pipeline.new_by_priority
+
+def test_unseen_near_duplicates_stay_new():
+    pipeline = main.DigestPipeline(emailed(make_job("Internshala", "other", title="Chemical Process Intern", company="Else")))
+    pipeline.add(make_job("Naukri.com", "n1"))
+    pipeline.add(make_job("LinkedIn", "l1", title="Backend Developer Intern (Python)"))
+    assert [job.source for job in pipeline.selected()] == ["LinkedIn"]
+
+def test_wants_everything_until_the_digest_is_full():
+    pipeline = main.DigestPipeline(size=3)
+    for n in range(2):
+        pipeline.add(make_job("Indeed India", f"i{n}", company=f"Company {n}"))
+    assert all(pipeline.wants(priority) for priority in main.SOURCE_PRIORITY.values())
+
+def test_wants_only_sources_ranking_above_a_full_digest():
+    pipeline = main.DigestPipeline(size=3)
+    for n in range(3):
+        pipeline.add(make_job("Indeed India", f"i{n}", company=f"Company {n}"))
+    indeed = main.SOURCE_PRIORITY["Indeed India"]
+    assert pipeline.wants(main.SOURCE_PRIORITY["LinkedIn"])
+    assert not pipeline.wants(indeed)
+    assert not pipeline.wants(main.SOURCE_PRIORITY["Internshala"])
+    assert not pipeline.wants(main.SOURCE_PRIORITY["Naukri.com"])
+
+def test_seen_jobs_dont_fill_the_digest():
+    jobs = [make_job("Indeed India", f"i{n}", company=f"Company {n}") for n in range(3)]
+    pipeline = main.DigestPipeline(emailed(jobs[0]), size=3)
+    for job in jobs:
+        pipeline.add(job)
+    assert pipeline.wants(main.SOURCE_PRIORITY["Naukri.com"])
+
+def test_wants_everything_without_early_stop():
+    pipeline = main.DigestPipeline(size=1, early_stop=False)
+    pipeline.add(make_job("LinkedIn", "l1"))
+    assert pipeline.wants(main.SOURCE_PRIORITY["Naukri.com"])
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+KEYWORDS = ["python", "data", "backend"]
+LOCATIONS = ["Pune", "Mumbai"]
+
+def run(path, budget, complete=None):
+    """One run against the plan at `path`: the searches it planned, having completed the first `complete`"""
+    planner = main.QueryPlanner(path)
+    requests = planner.plan("Test", KEYWORDS, LOCATIONS, budget=budget)
+    for search in requests[:complete]:
+        planner.done("Test", search, [])
+    planner.save()
+    return [(keyword, location) for keyword, location, page in requests]
+
+def test_rotation_covers_the_whole_matrix_across_runs(tmp_path):
+    path = str(tmp_path / "plan.json")
+    first = run(path, budget=4)
+    second = run(path, budget=4)
+    assert len(set(first)) == 4
+    assert set(first) | set(second) == {(keyword, location) for keyword in KEYWORDS for location in LOCATIONS}
+    # The two searches the first run couldn't fit go first in the second
+    assert not set(second[:2]) & set(first)
+
+def test_searches_a_stopped_run_never_finished_go_first(tmp_path):
+    path = str(tmp_path / "plan.json")
+    first = run(path, budget=3, complete=1)
+    # Left behind by the early stop, so they beat the never-run searches the cursor now points at
+    assert sorted(run(path, budget=2)) == sorted(first[1:])
+
+def result(jobs):
+    return {"at": round(time.time()), "jobs": sorted(jobs), "pages": main.MAX_SEARCH_PAGES}
+
+def test_search_mostly_contained_in_a_broader_one_is_merged_into_it(tmp_path):
+    broad = [f"job{n}" for n in range(10)]
+    planner = main.QueryPlanner(str(tmp_path / "plan.json"))
+    planner.history["Test"] = {"results": {
+        "python | Pune": result(broad),
+        # 4 of 5 in the broad search's results: merged
+        "data | Pune": result(broad[:4] + ["other1"]),
+        # 3 of 5: still searched on its own
+        "backend | Pune": result(broad[4:7] + ["other2", "other3"]),
+    }}
+    requests = planner.plan("Test", KEYWORDS, ["Pune"], budget=10)
+    assert [(keyword, page) for keyword, _, page in requests if keyword == "python"] == [("python", 0), ("python", 1)]
+    assert not [search for search in requests if search[0] == "data"]
+    assert [page for keyword, _, page in requests if keyword == "backend"] == [0]
+
+def test_stale_overlap_measurements_are_not_merged(tmp_path):
+    broad = [f"job{n}" for n in range(10)]
+    stale = round(time.time() - main.QUERY_OVERLAP_MAX_AGE - 60)
+    planner = main.QueryPlanner(str(tmp_path / "plan.json"))
+    planner.history["Test"] = {"results": {
+        "python | Pune": result(broad),
+        "data | Pune": {**result(broad[:5]), "at": stale},
+    }}
+    requests = planner.plan("Test", ["python", "data"], ["Pune"], budget=10)
+    assert sorted(requests) == [("data", "Pune", 0), ("python", "Pune", 0)]
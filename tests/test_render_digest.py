@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+# Roomy enough for the page chrome plus a handful of cards, so a 20 job digest needs several parts
+BUDGET = 8000
+
+def make_jobs(count, source="LinkedIn"):
+    return [main.Job(f"Python Developer Intern {n}", f"Company {n}", "Pune, India", "₹10,000",
+                     f"https://example.com/jobs/{n}", source, date="2026-10-18") for n in range(count)]
+
+def test_everything_fits_in_one_email():
+    jobs = make_jobs(3)
+    messages = main.render_digest(jobs, budget=100000, overflow="split")
+    assert len(messages) == 1
+    batch, page, text = messages[0]
+    assert batch == jobs
+    assert "Part" not in page
+
+def test_split_keeps_every_part_under_budget_and_every_job():
+    jobs = make_jobs(20)
+    messages = main.render_digest(jobs, budget=BUDGET, overflow="split")
+    assert len(messages) > 1
+    for number, (batch, page, text) in enumerate(messages, 1):
+        assert batch
+        assert len(page.encode()) <= BUDGET
+        assert f"Part {number} of {len(messages)}" in page
+    assert [job for batch, _, _ in messages for job in batch] == jobs
+
+def test_trim_says_how_many_jobs_were_left_out():
+    jobs = make_jobs(20)
+    messages = main.render_digest(jobs, budget=BUDGET, overflow="trim")
+    assert len(messages) == 1
+    kept, page, text = messages[0]
+    assert 0 < len(kept) < len(jobs)
+    assert kept == jobs[:len(kept)]
+    assert len(page.encode()) <= BUDGET
+    note = f"+ {len(jobs) - len(kept)} more opportunities didn't fit in this email"
+    assert note in page
+    assert note in text
+
+def test_oversized_card_goes_out_alone():
+    jobs = make_jobs(4)
+    jobs[1] = main.Job("Python Developer Intern " + "x" * BUDGET, "Company", "Pune, India", "₹10,000",
+                       "https://example.com/jobs/oversized", "LinkedIn", date="2026-10-18")
+    messages = main.render_digest(jobs, budget=BUDGET, overflow="split")
+    batches = [batch for batch, _, _ in messages]
+    assert [jobs[1]] in batches
+    assert [job for batch in batches for job in batch] == jobs
+    for batch, page, _ in messages:
+        if batch != [jobs[1]]:
+            assert len(page.encode()) <= BUDGET
+
+def test_plain_text_part_is_always_present():
+    jobs = make_jobs(20)
+    for overflow in ("split", "trim"):
+        for batch, _, text in main.render_digest(jobs, budget=BUDGET, overflow=overflow):
+            assert text.strip()
+            for job in batch:
+                assert job.title in text
+                assert job.link in text
@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+RECIPIENTS = ["a@example.com", "b@example.com", "c@example.com", "d@example.com"]
+
+def test_everyone_accepted():
+    outcome = main.BatchOutcome(1, RECIPIENTS)
+    outcome.settle({})
+    assert outcome.ok
+    assert outcome.pending == []
+    assert outcome.delivered() == len(RECIPIENTS)
+
+def test_temporary_refusals_stay_pending_and_permanent_ones_are_final():
+    outcome = main.BatchOutcome(1, RECIPIENTS)
+    outcome.settle({"b@example.com": (452, b"too many recipients"), "c@example.com": (550, b"no such user")})
+    assert not outcome.ok
+    assert outcome.pending == ["b@example.com"]
+    assert outcome.refused == {"c@example.com": (550, b"no such user")}
+    assert outcome.delivered() == 2
+    assert outcome.error
+
+def test_retry_only_settles_what_was_still_pending():
+    outcome = main.BatchOutcome(1, RECIPIENTS)
+    outcome.settle({"b@example.com": (451, b"greylisted"), "c@example.com": (550, b"no such user")})
+    outcome.settle({})
+    assert outcome.ok
+    assert outcome.pending == []
+    assert list(outcome.refused) == ["c@example.com"]
+    assert outcome.delivered() == 3
+
+def test_retry_can_turn_a_temporary_refusal_final():
+    outcome = main.BatchOutcome(1, RECIPIENTS)
+    outcome.settle({"b@example.com": (452, b"too many recipients")})
+    outcome.settle({"b@example.com": (550, b"mailbox disabled")})
+    assert outcome.ok
+    assert list(outcome.refused) == ["b@example.com"]
+    assert outcome.delivered() == 3
+
+def test_zero_sends_per_minute_means_uncapped():
+    delivery = main.SmtpDelivery(connections=1, sends_per_minute=0)
+    start = main.time.monotonic()
+    for _ in range(5):
+        delivery.rate.acquire()
+    assert main.time.monotonic() - start < 1